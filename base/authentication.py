@@ -0,0 +1,279 @@
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+import threading
+import time
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that can also authenticate from async views.
+
+    Token validation is pure computation, only the user lookup touches the
+    database, so aauthenticate() runs it through the async ORM instead of
+    handing the whole authentication to a thread.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """
+        Async counterpart of JWTAuthentication.get_user().
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        return self.check_user(user, validated_token)
+
+    def check_user(self, user, validated_token):
+        """
+        Applies the checks JWTAuthentication.get_user() makes on a found user.
+        """
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != self.get_password_digest(user):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+        return user
+
+    def get_password_digest(self, user):
+        return get_md5_hash_password(user.password)
+
+
+def get_auth_version_key(user_id):
+    """
+    Returns the cache key holding the version of a user's cached copies.
+    """
+    return f"auth-version:{user_id}"
+
+
+def get_auth_user_key(user_id, version):
+    return f"auth-user:{user_id}:{version}"
+
+
+def get_auth_version(user_id):
+    """
+    Returns a user's auth version, seeded from the clock when missing like
+    the data versions.
+    """
+    cache = caches["default"]
+    key = get_auth_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_auth_version(user_id):
+    """
+    Async counterpart of get_auth_version().
+    """
+    cache = caches["default"]
+    key = get_auth_version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+# user id -> (auth version, field values, loaded at, checked at), least
+# recently used first
+_local_users = OrderedDict()
+_local_users_lock = threading.Lock()
+
+
+def invalidate_cached_user(user_id):
+    """
+    Makes the cached copies of a user unreachable: the Redis entries and this
+    process's copy at once, other processes' copies when they next check the
+    version. Call it once the change is committed.
+    """
+    user_id = str(user_id)
+    cache = caches["default"]
+    key = get_auth_version_key(user_id)
+    if not cache.add(key, time.time_ns(), timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The key expired between add() and incr()
+            cache.add(key, time.time_ns(), timeout=None)
+    with _local_users_lock:
+        _local_users.pop(user_id, None)
+
+
+def get_local_user(user_id, version=None):
+    """
+    Returns the field values of this process's copy of a user, or None.
+
+    Without a version the copy is only returned while it was checked less
+    than AUTH_USER_LOCAL_TIMEOUT seconds ago; with one, it is returned and
+    marked checked when the versions match.
+    """
+    now = time.time()
+    with _local_users_lock:
+        entry = _local_users.get(user_id)
+        if entry is None:
+            return None
+        entry_version, values, loaded_at, checked_at = entry
+        if now - loaded_at >= settings.AUTH_USER_CACHE_TIMEOUT:
+            del _local_users[user_id]
+            return None
+        if version is None:
+            if now - checked_at >= settings.AUTH_USER_LOCAL_TIMEOUT:
+                return None
+        elif version != entry_version:
+            return None
+        else:
+            _local_users[user_id] = (entry_version, values, loaded_at, now)
+        _local_users.move_to_end(user_id)
+        return values
+
+
+def set_local_user(user_id, version, values, loaded_at):
+    with _local_users_lock:
+        _local_users[user_id] = (version, values, loaded_at, time.time())
+        _local_users.move_to_end(user_id)
+        while len(_local_users) > settings.AUTH_USER_LOCAL_SIZE:
+            _local_users.popitem(last=False)
+
+
+class CachedJWTAuthentication(AsyncJWTAuthentication):
+    """
+    AsyncJWTAuthentication that resolves the token's user from a cache
+    instead of the database on most requests.
+
+    Users are cached in Redis under their id and auth version for
+    AUTH_USER_CACHE_TIMEOUT seconds, and in a per-process LRU of
+    AUTH_USER_LOCAL_SIZE users. A process trusts its copy for
+    AUTH_USER_LOCAL_TIMEOUT seconds, then reads the version before using it
+    again. Saving or deleting a user bumps the version (see users.signals),
+    so profile, password and is_active changes apply everywhere within
+    AUTH_USER_LOCAL_TIMEOUT; changes that bypass the model's save() within
+    AUTH_USER_CACHE_TIMEOUT.
+
+    The cached copies leave out the password hash, the request user never
+    needs it (the profile serializer is write-only for it) and it is loaded
+    deferred. With CHECK_REVOKE_TOKEN only the digest the tokens carry is kept.
+    """
+
+    excluded_fields = ("password",)
+
+    def get_user_id(self, validated_token):
+        try:
+            return str(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def dump_user(self, user):
+        """
+        Returns the values cached for a user, see excluded_fields.
+        """
+        values = {
+            field.attname: getattr(user, field.attname)
+            for field in user._meta.concrete_fields
+            if field.attname not in self.excluded_fields
+        }
+        if api_settings.CHECK_REVOKE_TOKEN:
+            values["password_digest"] = get_md5_hash_password(user.password)
+        return values
+
+    def build_user(self, values):
+        values = dict(values)
+        password_digest = values.pop("password_digest", None)
+        user = self.user_model.from_db(
+            self.user_model.objects.db, list(values), list(values.values())
+        )
+        user.password_digest = password_digest
+        return user
+
+    def get_password_digest(self, user):
+        if user.password_digest is None:
+            # Cached before CHECK_REVOKE_TOKEN was turned on
+            return super().get_password_digest(user)
+        return user.password_digest
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        values = get_local_user(user_id)
+        if values is None:
+            version = get_auth_version(user_id)
+            values = get_local_user(user_id, version)
+            if values is None:
+                values = self.load_user(user_id, version)
+        return self.check_user(self.build_user(values), validated_token)
+
+    def load_user(self, user_id, version):
+        """
+        Returns a user's field values from Redis, or from the database when
+        not cached, and keeps them in this process.
+        """
+        cache = caches["default"]
+        key = get_auth_user_key(user_id, version)
+        entry = cache.get(key)
+        if entry is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            entry = (self.dump_user(user), time.time())
+            cache.set(key, entry, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        set_local_user(user_id, version, *entry)
+        return entry[0]
+
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        values = get_local_user(user_id)
+        if values is None:
+            version = await aget_auth_version(user_id)
+            values = get_local_user(user_id, version)
+            if values is None:
+                values = await self.aload_user(user_id, version)
+        return self.check_user(self.build_user(values), validated_token)
+
+    async def aload_user(self, user_id, version):
+        """
+        Async counterpart of load_user().
+        """
+        cache = caches["default"]
+        key = get_auth_user_key(user_id, version)
+        entry = await cache.aget(key)
+        if entry is None:
+            try:
+                user = await self.user_model.objects.aget(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            entry = (self.dump_user(user), time.time())
+            await cache.aset(key, entry, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        set_local_user(user_id, version, *entry)
+        return entry[0]
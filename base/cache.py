@@ -0,0 +1,230 @@
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+import functools
+import hashlib
+import time
+
+GLOBAL_SCOPE = "global"
+
+
+def get_version_key(scope):
+    """
+    Returns the cache key holding the data version of a scope (a user id or global).
+    """
+    return f"data-version:{scope}"
+
+
+def get_data_version(user_id):
+    """
+    Returns the combined data version of a user and the global scope.
+
+    Cache entries that embed this version are never read again once either
+    scope is bumped, so no key scanning is needed to invalidate them. Missing
+    versions are seeded from the clock so an evicted counter cannot fall back
+    to a value that older entries were written with.
+    """
+    cache = caches["default"]
+    keys = [get_version_key(user_id), get_version_key(GLOBAL_SCOPE)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return ".".join(str(versions[key]) for key in keys)
+
+
+async def aget_data_version(user_id):
+    """
+    Async counterpart of get_data_version().
+    """
+    cache = caches["default"]
+    keys = [get_version_key(user_id), get_version_key(GLOBAL_SCOPE)]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            versions[key] = await cache.aget(key)
+    return ".".join(str(versions[key]) for key in keys)
+
+
+def bump_data_version(user_id=None):
+    """
+    Invalidates everything cached for a user, or for everyone when user_id is None.
+    """
+    cache = caches["default"]
+    key = get_version_key(user_id or GLOBAL_SCOPE)
+    if not cache.add(key, time.time_ns(), timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The key expired between add() and incr()
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def make_etag(request, *parts):
+    """
+    Returns an entity tag for a representation built from parts, varying with
+    the requested path, query string and media type.
+    """
+    key = (request.get_full_path(), request.META.get("HTTP_ACCEPT"), *parts)
+    return hashlib.md5(repr(key).encode()).hexdigest()
+
+
+def get_data_etag(request, *args, **kwargs):
+    """
+    ETag function for django.views.decorators.http.condition on views that
+    only expose the requesting user's (and global) data. The data version
+    changes on every write, so validating costs one cache read and no query.
+    """
+    if not request.user.is_authenticated:
+        return None
+    return make_etag(request, request.user.id, get_data_version(request.user.id))
+
+
+async def aget_data_etag(request):
+    """
+    Async counterpart of get_data_etag(), condition() cannot await it.
+    """
+    if not request.user.is_authenticated:
+        return None
+    return make_etag(request, request.user.id, await aget_data_version(request.user.id))
+
+
+# Views wrapped with cache_response, for hit/miss reporting
+CACHED_VIEWS = set()
+
+
+def get_stats_key(view_name, outcome):
+    """
+    Returns the cache key counting hits or misses of a view.
+    """
+    return f"response-cache:{outcome}:{view_name}"
+
+
+def count_cache_outcome(view_name, outcome):
+    cache = caches["default"]
+    key = get_stats_key(view_name, outcome)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+
+async def acount_cache_outcome(view_name, outcome):
+    cache = caches["default"]
+    key = get_stats_key(view_name, outcome)
+    if not await cache.aadd(key, 1, timeout=None):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aadd(key, 1, timeout=None)
+
+
+def get_cache_stats():
+    """
+    Returns {view name: {"hits", "misses", "hit_rate"}} for every cached view.
+    """
+    cache = caches["default"]
+    keys = {
+        (name, outcome): get_stats_key(name, outcome)
+        for name in CACHED_VIEWS
+        for outcome in ("hits", "misses")
+    }
+    values = cache.get_many(keys.values())
+    stats = {}
+    for name in sorted(CACHED_VIEWS):
+        hits = values.get(keys[name, "hits"], 0)
+        misses = values.get(keys[name, "misses"], 0)
+        stats[name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        }
+    return stats
+
+
+def reset_cache_stats():
+    caches["default"].delete_many(
+        [get_stats_key(name, outcome) for name in CACHED_VIEWS for outcome in ("hits", "misses")]
+    )
+
+
+def get_response_cache_key(view_name, request, data_version):
+    """
+    Returns the cache key of a response: user, data version, view and the
+    query parameters in canonical order. Today's date is included because
+    views default to periods relative to it.
+    """
+    params = sorted((key, sorted(values)) for key, values in request.query_params.lists())
+    digest = hashlib.md5(
+        repr((request.path, params, timezone.localdate())).encode()
+    ).hexdigest()
+    return f"response:{request.user.id}:{data_version}:{view_name}:{digest}"
+
+
+def cache_response(timeout=None):
+    """
+    Caches successful responses of an APIView GET handler per user.
+
+    The key embeds the user's data version, so any Transaction or Category
+    write makes earlier entries unreachable. timeout defaults to
+    settings.RESPONSE_CACHE_TIMEOUT. Responses carry an X-Cache HIT/MISS header.
+    Async handlers are supported.
+    """
+
+    def decorator(handler):
+        view_name = handler.__qualname__.rsplit(".", 1)[0]
+        CACHED_VIEWS.add(view_name)
+        ttl = settings.RESPONSE_CACHE_TIMEOUT if timeout is None else timeout
+
+        def cached(data):
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        if iscoroutinefunction(handler):
+
+            @functools.wraps(handler)
+            async def async_wrapper(self, request, *args, **kwargs):
+                cache = caches["default"]
+                data_version = await aget_data_version(request.user.id)
+                key = get_response_cache_key(view_name, request, data_version)
+                data = await cache.aget(key)
+                if data is not None:
+                    await acount_cache_outcome(view_name, "hits")
+                    return cached(data)
+
+                await acount_cache_outcome(view_name, "misses")
+                response = await handler(self, request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    await cache.aset(key, response.data, ttl)
+                response["X-Cache"] = "MISS"
+                return response
+
+            return async_wrapper
+
+        @functools.wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            cache = caches["default"]
+            data_version = get_data_version(request.user.id)
+            key = get_response_cache_key(view_name, request, data_version)
+            data = cache.get(key)
+            if data is not None:
+                count_cache_outcome(view_name, "hits")
+                return cached(data)
+
+            count_cache_outcome(view_name, "misses")
+            response = handler(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data, ttl)
+            response["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
@@ -1,19 +1,126 @@
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
+from django.core.cache import caches
+from django.db import connections
+from django.db.models import Q
 from urllib.parse import urlencode
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from asgiref.sync import sync_to_async
+from .cache import aget_data_version, get_data_version
+import datetime
+import hashlib
+import json
+import uuid
 
 
-class CustomPagination:
-    def __init__(self, page_size=2):
-        self.page_size = page_size
+class ExactCount:
+    """
+    Counts the queryset with a COUNT(*) query.
+    """
 
-    def paginate_queryset(self, queryset, request):
+    name = "exact"
+
+    def count(self, queryset, request):
         """
-        Paginates the queryset manually based on page size and page number.
+        Returns (count, name of the strategy that produced it).
+        """
+        return queryset.count(), self.name
 
-        queryset: The queryset to paginate
-        request: The request object that contains pagination params
+    async def acount(self, queryset, request):
+        return await queryset.acount(), self.name
+
+
+class CachedCount:
+    """
+    Caches exact counts in the default cache, keyed by user and filter signature.
+
+    The key embeds the user's data version, so any write by that user (or to
+    global data) makes the cached value unreachable instead of stale.
+    """
+
+    name = "cached"
+
+    def __init__(self, timeout=300, signature=None):
+        self.timeout = timeout
+        self.signature = signature
+
+    def get_signature(self, queryset):
+        """
+        Returns the filter signature given by the view, or a hash of the queryset SQL.
         """
+        if self.signature:
+            return self.signature
+        return hashlib.md5(str(queryset.query).encode()).hexdigest()
+
+    def get_key(self, queryset, user_id, data_version):
+        return "count:{}:{}:{}".format(user_id, data_version, self.get_signature(queryset))
+
+    def count(self, queryset, request):
+        user_id = request.user.pk
+        key = self.get_key(queryset, user_id, get_data_version(user_id))
+        cache = caches["default"]
+        total_count = cache.get(key)
+        if total_count is None:
+            total_count = queryset.count()
+            cache.set(key, total_count, timeout=self.timeout)
+        return total_count, self.name
+
+    async def acount(self, queryset, request):
+        user_id = request.user.pk
+        key = self.get_key(queryset, user_id, await aget_data_version(user_id))
+        cache = caches["default"]
+        total_count = await cache.aget(key)
+        if total_count is None:
+            total_count = await queryset.acount()
+            await cache.aset(key, total_count, timeout=self.timeout)
+        return total_count, self.name
+
+
+class EstimatedCount:
+    """
+    Uses the PostgreSQL planner's row estimate instead of counting.
+
+    Meant for large admin-wide querysets where an exact number is not worth a
+    full scan. Small estimates (and other databases) fall back to an exact count.
+    """
+
+    name = "estimated"
+
+    def __init__(self, threshold=10000):
+        self.threshold = threshold
+
+    def count(self, queryset, request):
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return ExactCount().count(queryset, request)
+
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+
+        if estimate < self.threshold:
+            return ExactCount().count(queryset, request)
+        return estimate, self.name
+
+    async def acount(self, queryset, request):
+        # EXPLAIN goes through a raw cursor, which has no async API
+        return await sync_to_async(self.count)(queryset, request)
 
+
+class CustomPagination:
+    def __init__(self, page_size=2, count_strategy=None):
+        self.page_size = page_size
+        self.count_strategy = count_strategy or ExactCount()
+        self.count_strategy_used = None
+
+    def get_page(self, queryset, request):
+        """
+        Returns the slice of the queryset for the requested page.
+        """
         page_size = int(request.query_params.get("page_size", self.page_size))
 
         page_number = int(request.query_params.get("page", 1))
@@ -21,9 +128,32 @@ class CustomPagination:
         offset = (page_number - 1) * page_size
         limit = page_size
 
-        paginated_queryset = queryset[offset : offset + limit]
+        return queryset[offset : offset + limit]
+
+    def paginate_queryset(self, queryset, request):
+        """
+        Paginates the queryset manually based on page size and page number.
+
+        queryset: The queryset to paginate
+        request: The request object that contains pagination params
+        """
+        paginated_queryset = self.get_page(queryset, request)
 
-        return paginated_queryset, queryset.count()
+        total_count, self.count_strategy_used = self.count_strategy.count(
+            queryset, request
+        )
+        return paginated_queryset, total_count
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        Async counterpart of paginate_queryset(), the page is returned as a list.
+        """
+        rows = [row async for row in self.get_page(queryset, request)]
+
+        total_count, self.count_strategy_used = await self.count_strategy.acount(
+            queryset, request
+        )
+        return rows, total_count
 
     def get_paginated_response(self, data, request, total_count):
         """
@@ -45,6 +175,7 @@ class CustomPagination:
 
         pagination_metadata = {
             "count": total_count,
+            "count_strategy": self.count_strategy_used,
             "next": next,
             "previous": previous,
             "results": data,
@@ -58,3 +189,164 @@ class CustomPagination:
         query_params = request.query_params.copy()
         query_params["page"] = page_number
         return f"{request.build_absolute_uri(request.path)}?{urlencode(query_params)}"
+
+
+class CursorPagination:
+    """
+    Keyset pagination over a (date, id) ordering.
+
+    Instead of OFFSET slicing, each page seeks past the last row of the previous
+    page, so page N costs the same as page 1 as long as the ordering is backed
+    by an index. The total count is only computed when ``?count=true`` is passed.
+    """
+
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+
+    def __init__(self, page_size=2):
+        self.page_size = page_size
+        self.next_position = None
+        self.previous_position = None
+        self.page = None
+
+    def paginate_queryset(self, queryset, request):
+        """
+        Returns the rows of the requested page and the total count (or None).
+
+        queryset: The queryset to paginate, it is re-ordered by (date, id)
+        request: The request object that contains pagination params
+        """
+        page_queryset = self.get_page(queryset, request)
+
+        total_count = None
+        if self.wants_count(request):
+            total_count = queryset.count()
+        return self.set_page_rows(list(page_queryset)), total_count
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        Async counterpart of paginate_queryset().
+        """
+        page_queryset = self.get_page(queryset, request)
+
+        total_count = None
+        if self.wants_count(request):
+            total_count = await queryset.acount()
+        return self.set_page_rows([row async for row in page_queryset]), total_count
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param) in ("1", "true")
+
+    def get_page(self, queryset, request):
+        """
+        Returns the queryset of the requested page plus one row, which tells
+        whether there is another page.
+        """
+        page_size = int(request.query_params.get("page_size", self.page_size))
+        cursor = request.query_params.get(self.cursor_query_param)
+        position, reverse = self.decode_cursor(cursor) if cursor else (None, False)
+        self.page = (page_size, position, reverse)
+
+        if reverse:
+            queryset = queryset.order_by("date", "id")
+            if position is not None:
+                queryset = queryset.filter(
+                    Q(date__gt=position[0]) | Q(date=position[0], id__gt=position[1])
+                )
+        else:
+            queryset = queryset.order_by("-date", "-id")
+            if position is not None:
+                queryset = queryset.filter(
+                    Q(date__lt=position[0]) | Q(date=position[0], id__lt=position[1])
+                )
+
+        return queryset[: page_size + 1]
+
+    def set_page_rows(self, rows):
+        """
+        Trims the fetched rows to the page, records the next/previous positions
+        and returns the rows.
+        """
+        page_size, position, reverse = self.page
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # Walking backwards, the extra row means there is a previous page and
+        # the cursor we came from guarantees a next one (and vice versa).
+        if reverse:
+            has_next, has_previous = position is not None, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_position = None
+        self.previous_position = None
+        if rows and has_next:
+            self.next_position = self.get_position(rows[-1])
+        if rows and has_previous:
+            self.previous_position = self.get_position(rows[0])
+
+        return rows
+
+    def get_paginated_response(self, data, request, total_count=None):
+        """
+        Builds the paginated response.
+        """
+        if self.next_position is not None:
+            next = self.get_url(self.encode_cursor(self.next_position), request)
+        else:
+            next = None
+
+        if self.previous_position is not None:
+            previous = self.get_url(
+                self.encode_cursor(self.previous_position, reverse=True), request
+            )
+        else:
+            previous = None
+
+        pagination_metadata = {
+            "count": total_count,
+            "next": next,
+            "previous": previous,
+            "results": data,
+        }
+        return Response(pagination_metadata)
+
+    def get_position(self, row):
+        """
+        Returns the (date, id) seek position of a row, an instance or a values() dict.
+        """
+        if isinstance(row, dict):
+            return row["date"], row["id"]
+        return row.date, row.id
+
+    def encode_cursor(self, position, reverse=False):
+        """
+        Encodes a seek position into an opaque, url-safe cursor.
+        """
+        date, pk = position
+        raw = f"{'p' if reverse else 'n'}|{date.isoformat()}|{pk}"
+        return urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        """
+        Decodes a cursor into ((date, id), reverse). Raises NotFound if it is invalid.
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            direction, date, pk = urlsafe_b64decode(padded).decode().split("|")
+            if direction not in ("n", "p"):
+                raise ValueError(direction)
+            return (datetime.date.fromisoformat(date), uuid.UUID(pk)), direction == "p"
+        except (ValueError, TypeError, UnicodeDecodeError):
+            raise NotFound("Invalid cursor")
+
+    def get_url(self, cursor, request):
+        """
+        Generates the URL for the page starting at the given cursor.
+        """
+        query_params = request.query_params.copy()
+        query_params.pop("page", None)
+        query_params[self.cursor_query_param] = cursor
+        return f"{request.build_absolute_uri(request.path)}?{urlencode(query_params)}"
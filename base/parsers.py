@@ -0,0 +1,33 @@
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from .renderers import FastJSONRenderer
+import io
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional dependency
+    orjson = None
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser backed by orjson for UTF-8 request bodies.
+
+    Anything orjson rejects (e.g. NaN when STRICT_JSON is off) is parsed again
+    with JSONParser, which also keeps DRF's error messages. Unlike the stdlib,
+    orjson reads integers beyond 64 bits as floats.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("_", "-") not in ("utf-8", "utf8"):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
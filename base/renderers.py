@@ -0,0 +1,69 @@
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+import decimal
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional dependency
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson, which encodes UUID, date and datetime
+    natively instead of through JSONEncoder.default().
+
+    Output matches JSONRenderer. Decimals are rendered as numbers like DRF's
+    encoder does, or as strings when settings.JSON_DECIMAL_AS_STRING is True
+    (DecimalFields already render as strings unless COERCE_DECIMAL_TO_STRING
+    is off). Falls back to JSONRenderer when orjson is not installed, for
+    indented, ASCII-only or non-strict (NaN) output, and for values orjson
+    rejects (e.g. integers beyond 64 bits). In strict mode NaN renders as
+    null instead of raising.
+    """
+
+    @property
+    def decimal_as_string(self):
+        # Read per render, so override_settings() applies
+        return getattr(settings, "JSON_DECIMAL_AS_STRING", False)
+
+    def get_options(self):
+        if orjson is None:
+            return None
+        return orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    def get_default(self):
+        """
+        Returns the callback for types orjson does not encode itself.
+        """
+        encoder_default = self.encoder_class().default
+        decimal_as_string = self.decimal_as_string
+
+        def default(obj):
+            if isinstance(obj, decimal.Decimal):
+                return f"{obj:f}" if decimal_as_string else float(obj)
+            return encoder_default(obj)
+
+        return default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.get_default(), option=self.get_options())
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escape U+2028 and U+2029 like JSONRenderer, so the output stays a
+        # strict javascript subset
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
@@ -0,0 +1,149 @@
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+import decimal
+
+
+class ValuesPlan:
+    """
+    Renders QuerySet.values() rows exactly like a ModelSerializer renders
+    instances, without building model instances or walking DRF fields per row.
+
+    The plan is compiled once from the serializer's fields: common field types
+    get a specialised converter, anything else falls back to the field's own
+    to_representation.
+
+        plan = ValuesPlan(TransactionSerializer)
+        data = plan.convert(queryset.values(*plan.fields))
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        self.serializer_class = serializer_class
+        self.only = fields
+        self._plan = None
+
+    @property
+    def plan(self):
+        if self._plan is None:
+            self._plan = self.compile()
+        return self._plan
+
+    @property
+    def fields(self):
+        """
+        The names to pass to QuerySet.values().
+        """
+        return [source for _, source, _ in self.plan]
+
+    def compile(self):
+        """
+        Returns a (name, values() key, converter factory) triple per readable field.
+        """
+        serializer_fields = self.serializer_class().fields
+        names = self.only or [
+            name for name, field in serializer_fields.items() if not field.write_only
+        ]
+        plan = []
+        for name in names:
+            field = serializer_fields[name]
+            if "." in field.source or field.source == "*":
+                raise ValueError(f"Field {name} does not map to a model column.")
+            plan.append((name, field.source, self.get_converter_factory(field)))
+        return plan
+
+    def get_converter_factory(self, field):
+        """
+        Returns a function that, called once per batch, returns the function
+        rendering a non-null value of the field, or None when values() already
+        yields the rendered value.
+        """
+        if isinstance(field, serializers.DateTimeField):
+            return self.get_datetime_converter_factory(field)
+        converter = self.get_converter(field)
+        return lambda: converter
+
+    def get_converter(self, field):
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            # values() yields the primary key, which is what the field renders
+            return None if field.pk_field is None else field.pk_field.to_representation
+        if isinstance(field, serializers.ChoiceField):
+            choices = field.choice_strings_to_values
+            return lambda value: value if value == "" else choices.get(str(value), value)
+        if isinstance(field, serializers.CharField):
+            return str
+        if isinstance(field, serializers.UUIDField) and field.uuid_format == "hex_verbose":
+            return str
+        if isinstance(field, serializers.DecimalField):
+            return self.get_decimal_converter(field)
+        if isinstance(field, serializers.DateField):
+            output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+            if output_format and output_format.lower() == ISO_8601:
+                return lambda value: value.isoformat()
+        return field.to_representation
+
+    def get_decimal_converter(self, field):
+        coerce_to_string = getattr(
+            field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING
+        )
+        if (
+            not coerce_to_string
+            or field.localize
+            or getattr(field, "normalize_output", False)
+            or field.decimal_places is None
+        ):
+            return field.to_representation
+
+        quantum = decimal.Decimal(".1") ** field.decimal_places
+        context = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+        rounding = field.rounding
+
+        def convert(value):
+            if not isinstance(value, decimal.Decimal):
+                value = decimal.Decimal(str(value).strip())
+            return "{:f}".format(value.quantize(quantum, rounding=rounding, context=context))
+
+        return convert
+
+    def get_datetime_converter_factory(self, field):
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        if not output_format or output_format.lower() != ISO_8601:
+            return lambda: field.to_representation
+
+        def factory():
+            # The current time zone is per request, resolving it per value is
+            # what makes DateTimeField slow
+            tz = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+
+            def convert(value):
+                if tz is not None and value.tzinfo is not None:
+                    value = value.astimezone(tz).isoformat()
+                else:
+                    value = field.enforce_timezone(value).isoformat()
+                if value.endswith("+00:00"):
+                    value = value[:-6] + "Z"
+                return value
+
+            return convert
+
+        return factory
+
+    def get_row_converter(self):
+        """
+        Returns a function rendering one values() row as a dict in serializer
+        field order. Build one per batch, it captures the current time zone.
+        """
+        plan = [(name, source, factory()) for name, source, factory in self.plan]
+
+        def convert_row(row):
+            return {
+                name: value if converter is None or value is None else converter(value)
+                for name, source, converter in plan
+                for value in (row[source],)
+            }
+
+        return convert_row
+
+    def convert(self, rows):
+        convert_row = self.get_row_converter()
+        return [convert_row(row) for row in rows]
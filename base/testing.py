@@ -0,0 +1,45 @@
+from django.core.cache import caches
+from django.test import override_settings
+from rest_framework.test import APITestCase as BaseAPITestCase
+from users.models import CustomUser
+from .authentication import _local_users
+
+# Tests must not depend on (or leave data in) the Redis servers of settings
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "tests-default",
+    },
+    "token_cache": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "tests-token-cache",
+    },
+}
+
+
+def create_user(email="user@example.com", **fields):
+    """
+    Creates a verified user, the username is taken from the email.
+    """
+    fields.setdefault("username", email.split("@")[0])
+    fields.setdefault("password", "Passw0rd!")
+    fields.setdefault("first_name", "Test")
+    fields.setdefault("last_name", "User")
+    fields.setdefault("is_verified", True)
+    return CustomUser.objects.create_user(email=email, **fields)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class APITestCase(BaseAPITestCase):
+    """
+    APITestCase running on empty in-memory caches, with fast password hashing.
+    """
+
+    def setUp(self):
+        super().setUp()
+        for cache in caches.all():
+            cache.clear()
+        _local_users.clear()
@@ -0,0 +1,36 @@
+import datetime
+import decimal
+import unittest
+import uuid
+from django.test import SimpleTestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from .renderers import FastJSONRenderer, orjson
+
+
+@unittest.skipIf(orjson is None, "orjson is not installed")
+class FastJSONRendererTests(SimpleTestCase):
+    data = {
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "date": datetime.date(2024, 3, 1),
+        "utc": datetime.datetime(2024, 3, 1, 12, 30, tzinfo=datetime.timezone.utc),
+        "local": datetime.datetime(
+            2024, 3, 1, 18, 0, 0, 123456,
+            tzinfo=datetime.timezone(datetime.timedelta(hours=5, minutes=30)),
+        ),
+        "amount": decimal.Decimal("12.50"),
+        "text": "caf\u00e9 \u2028 line",
+        "rows": [{"count": 3, "share": 1.5, "empty": None}],
+    }
+
+    def test_matches_json_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_decimal_as_string_is_read_at_render_time(self):
+        renderer = FastJSONRenderer()
+        self.assertIn(b'"amount":12.5', renderer.render(self.data))
+        with override_settings(JSON_DECIMAL_AS_STRING=True):
+            self.assertIn(b'"amount":"12.50"', renderer.render(self.data))
+
+    def test_falls_back_for_values_orjson_rejects(self):
+        data = {"big": 2**70}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-18 21:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='budgetalert',
+            name='budget_alert_pending_idx',
+        ),
+        migrations.RemoveField(
+            model_name='budgetalert',
+            name='attempts',
+        ),
+        migrations.RemoveField(
+            model_name='budgetalert',
+            name='sent_at',
+        ),
+        migrations.RemoveField(
+            model_name='budgetalert',
+            name='status',
+        ),
+    ]
@@ -0,0 +1,318 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.mail import EmailMessage
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from users.models import CustomUser, OutboxEmail
+from categories.models import Category
+from base.models import BaseModel
+import datetime
+import operator
+from decimal import Decimal
+from functools import reduce
+
+
+def get_month(value):
+    """
+    Returns the first day of the month of a date.
+    """
+    if isinstance(value, str):
+        value = datetime.date.fromisoformat(value)
+    return value.replace(day=1)
+
+
+def get_spend_key(budget_id, month):
+    """
+    Returns the cache key of a budget's spend counter for a month, in cents.
+    """
+    return f"budget-spend:{budget_id}:{month:%Y-%m}"
+
+
+class Budget(BaseModel):
+    """
+    A monthly spending limit for one of the user's categories.
+
+    alert_thresholds are percentages of amount; crossing one records a
+    BudgetAlert and queues its email in the outbox.
+    """
+
+    user = models.ForeignKey(CustomUser, on_delete=models.DO_NOTHING, related_name="budgets")
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="budgets")
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    alert_thresholds = models.JSONField(default=list)
+    is_active = models.BooleanField(default=True)
+
+    DEFAULT_ALERT_THRESHOLDS = [80, 100]
+
+    def __str__(self):
+        return f"Budget {self.user_id} - {self.category_id} - {self.amount}"
+
+    class Meta:
+        verbose_name = "Budget"
+        verbose_name_plural = "Budgets"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "category"], name="budget_user_category_uniq"),
+        ]
+
+
+class BudgetSpend(BaseModel):
+    """
+    Debits of a budget's category in a month, the source of truth behind the
+    cached counters.
+
+    Created from one aggregate of the month's transactions the first time it
+    is needed, then adjusted by every transaction write in the same database
+    transaction, like the monthly rollups. Cached counters are adjusted once
+    the write commits and re-seeded from this row when they expire.
+    """
+
+    budget = models.ForeignKey(Budget, on_delete=models.CASCADE, related_name="spends")
+    month = models.DateField()  # First day of the month
+    spent = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    alerted_threshold = models.IntegerField(default=0)  # Highest threshold alerted
+
+    def __str__(self):
+        return f"Spend {self.budget_id} - {self.month:%Y-%m} - {self.spent}"
+
+    class Meta:
+        verbose_name = "Budget spend"
+        verbose_name_plural = "Budget spends"
+        constraints = [
+            models.UniqueConstraint(fields=["budget", "month"], name="budget_spend_month_uniq"),
+        ]
+
+    @staticmethod
+    def collect(rows, sign=1, deltas=None):
+        """
+        Builds {(user_id, category_id, month): debit delta} from transactions or
+        value dicts, accumulating into ``deltas`` when given.
+        """
+        deltas = {} if deltas is None else deltas
+        for row in rows:
+            if isinstance(row, dict):
+                user_id, category_id, date = row["user"], row["category"], row["date"]
+                amount, transaction_type = row["amount"], row["transaction_type"]
+            else:
+                user_id, category_id, date = row.user_id, row.category_id, row.date
+                amount, transaction_type = row.amount, row.transaction_type
+            if transaction_type != "debit" or category_id is None:
+                continue
+            key = (user_id, category_id, get_month(date))
+            deltas[key] = deltas.get(key, 0) + sign * Decimal(str(amount))
+        return deltas
+
+    @staticmethod
+    def collect_queryset(queryset, sign=1):
+        """
+        Same as collect() but grouped in the database.
+        """
+        grouped = (
+            queryset.filter(transaction_type="debit", category__isnull=False)
+            .order_by()
+            .annotate(spend_month=TruncMonth("date"))
+            .values("user", "category", "spend_month")
+            .annotate(spent=Sum("amount"))
+        )
+        return {
+            (row["user"], row["category"], get_month(row["spend_month"])): sign * row["spent"]
+            for row in grouped
+        }
+
+    @classmethod
+    def seed(cls, budget, month):
+        """
+        Creates the month's row from its transactions. Returns None when
+        another writer created it first.
+        """
+        end = (month + datetime.timedelta(days=31)).replace(day=1)
+        spent = budget.category.transactions.filter(
+            user_id=budget.user_id, transaction_type="debit", date__gte=month, date__lt=end
+        ).aggregate(spent=Sum("amount", default=0))["spent"]
+        try:
+            with transaction.atomic():
+                return cls.objects.create(budget=budget, month=month, spent=spent)
+        except IntegrityError:
+            return None
+
+    @classmethod
+    def reset(cls, budget):
+        """
+        Drops a budget's spends and cached counters, to be seeded again from
+        the transactions. Needed when apply() stopped matching them: the
+        category changed, or the budget was inactive and skipped debits.
+        """
+        spends = cls.objects.filter(budget=budget)
+        keys = [get_spend_key(budget.id, month) for month in spends.values_list("month", flat=True)]
+        spends.delete()
+        transaction.on_commit(lambda: caches["default"].delete_many(keys))
+
+    @classmethod
+    def apply(cls, deltas):
+        """
+        Adds collected deltas to the spends of the matching active budgets and
+        queues alerts for thresholds crossed. Must run inside the transaction
+        that wrote the rows, the cached counters follow on commit.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        budgets = Budget.objects.filter(
+            reduce(
+                operator.or_,
+                (Q(user_id=user_id, category_id=category_id) for user_id, category_id, _ in deltas),
+            ),
+            is_active=True,
+        ).select_related("category")
+        changed = {}
+        for budget in sorted(budgets, key=lambda budget: str(budget.id)):
+            for (user_id, category_id, month), delta in sorted(deltas.items(), key=str):
+                if (user_id, category_id) != (budget.user_id, budget.category_id):
+                    continue
+                updated = cls.objects.filter(budget=budget, month=month).update(
+                    updated_at=timezone.now(), spent=F("spent") + delta
+                )
+                if not updated and cls.seed(budget, month) is None:
+                    # Seeded by another writer, without this transaction's rows
+                    cls.objects.filter(budget=budget, month=month).update(
+                        updated_at=timezone.now(), spent=F("spent") + delta
+                    )
+                changed[budget.id, month] = delta
+        if not changed:
+            return
+
+        BudgetAlert.queue(
+            cls.objects.filter(
+                reduce(
+                    operator.or_,
+                    (Q(budget_id=budget_id, month=month) for budget_id, month in changed),
+                )
+            ).select_related("budget__user", "budget__category")
+        )
+        transaction.on_commit(lambda: cls.count(changed))
+
+    @staticmethod
+    def count(changed):
+        """
+        Adds committed deltas to the cached counters that exist.
+        """
+        cache = caches["default"]
+        for (budget_id, month), delta in changed.items():
+            try:
+                cache.incr(get_spend_key(budget_id, month), int(delta * 100))
+            except ValueError:
+                pass  # Not cached, the next read seeds it from the row
+
+    @classmethod
+    def get_spent(cls, budgets, month):
+        """
+        Returns {budget id: spent} for a month from the cached counters,
+        loading (and if needed seeding) the rows of missing ones. New counters
+        are checked against the rows once more, so one seeded from a row read
+        before a concurrent commit does not stay stale until it expires.
+        """
+        cache = caches["default"]
+        keys = {get_spend_key(budget.id, month): budget for budget in budgets}
+        cached = cache.get_many(keys)
+        spent = {keys[key].id: Decimal(cents) / 100 for key, cents in cached.items()}
+
+        missing = [budget for key, budget in keys.items() if key not in cached]
+        if missing:
+            rows = {
+                row.budget_id: row
+                for row in cls.objects.filter(budget__in=missing, month=month)
+            }
+            for budget in missing:
+                row = rows.get(budget.id) or cls.seed(budget, month)
+                if row is None:
+                    row = cls.objects.get(budget=budget, month=month)
+                spent[budget.id] = row.spent
+                cache.add(
+                    get_spend_key(budget.id, month),
+                    int(row.spent * 100),
+                    timeout=settings.BUDGET_COUNTER_TIMEOUT,
+                )
+            # A write that committed after the read found no counter to adjust,
+            # drop the counters whose row has changed since
+            current = dict(
+                cls.objects.filter(budget__in=missing, month=month).values_list("budget", "spent")
+            )
+            cache.delete_many(
+                [
+                    get_spend_key(budget.id, month)
+                    for budget in missing
+                    if current.get(budget.id) != spent[budget.id]
+                ]
+            )
+        return spent
+
+
+class BudgetAlert(BaseModel):
+    """
+    A threshold crossing of a budget in a month. Its email is queued in the
+    outbox (see users.OutboxEmail) in the same transaction.
+    """
+
+    budget = models.ForeignKey(Budget, on_delete=models.CASCADE, related_name="alerts")
+    month = models.DateField()
+    threshold = models.IntegerField()
+    spent = models.DecimalField(max_digits=14, decimal_places=2)
+
+    def __str__(self):
+        return f"Alert {self.budget_id} - {self.month:%Y-%m} - {self.threshold}%"
+
+    class Meta:
+        verbose_name = "Budget alert"
+        verbose_name_plural = "Budget alerts"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["budget", "month", "threshold"], name="budget_alert_threshold_uniq"
+            ),
+        ]
+
+    @classmethod
+    def queue(cls, spends):
+        """
+        Records the highest threshold each spend has newly crossed and queues
+        its email. A threshold already alerted for the month (e.g. before the
+        spend was re-seeded) is not emailed again.
+        """
+        crossed = []
+        for spend in spends:
+            budget = spend.budget
+            reached = [
+                threshold
+                for threshold in budget.alert_thresholds
+                if threshold > spend.alerted_threshold
+                and spend.spent * 100 >= budget.amount * threshold
+            ]
+            if not reached:
+                continue
+            spend.alerted_threshold = max(reached)
+            crossed.append(spend)
+            alert = cls(
+                budget=budget, month=spend.month, threshold=spend.alerted_threshold, spent=spend.spent
+            )
+            try:
+                with transaction.atomic():
+                    alert.save(force_insert=True)
+            except IntegrityError:
+                continue
+            OutboxEmail.enqueue(alert.build_message())
+        if crossed:
+            BudgetSpend.objects.bulk_update(crossed, ["alerted_threshold"])
+
+    def build_message(self):
+        budget = self.budget
+        return EmailMessage(
+            subject=f"{budget.category.name} budget: {self.threshold}% used",
+            body=(
+                f"Hello {budget.user.first_name},\n\n"
+                f"You have spent {self.spent} of your {budget.amount} "
+                f"{budget.category.name} budget for {self.month:%B %Y} "
+                f"({self.threshold}% threshold).\n"
+            ),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[budget.user.email],
+        )
@@ -0,0 +1,32 @@
+from rest_framework import serializers
+from .models import Budget
+
+
+class BudgetSerializer(serializers.ModelSerializer):
+    alert_thresholds = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=1000),
+        required=False,
+        max_length=10,
+    )
+
+    class Meta:
+        model = Budget
+        fields = "__all__"
+        read_only_fields = ["id", "created_at", "updated_at"]
+
+    def validate_amount(self, amount):
+        if amount <= 0:
+            raise serializers.ValidationError("Amount must be greater than zero")
+        return amount
+
+    def validate_alert_thresholds(self, thresholds):
+        return sorted(set(thresholds))
+
+    def validate(self, attrs):
+        user = attrs.get("user", getattr(self.instance, "user", None))
+        category = attrs.get("category")
+        if category and category.user_id not in (None, user.id):
+            raise serializers.ValidationError({"category": "Category not found"})
+        if self.instance is None:
+            attrs.setdefault("alert_thresholds", Budget.DEFAULT_ALERT_THRESHOLDS)
+        return attrs
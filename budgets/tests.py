@@ -0,0 +1,144 @@
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import caches
+from django.core.management import call_command
+from django.utils import timezone
+from base.testing import APITestCase, create_user
+from categories.models import Category
+from transactions.models import Transaction
+from users.models import OutboxEmail
+from .models import Budget, BudgetAlert, BudgetSpend, get_month, get_spend_key
+
+
+class BudgetSpendTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.food = Category.objects.create(name="Food", user=self.user)
+        self.rent = Category.objects.create(name="Rent", user=self.user)
+        self.budget = Budget.objects.create(
+            user=self.user, category=self.food, amount=Decimal("100.00"), alert_thresholds=[80, 100]
+        )
+        self.month = get_month(timezone.localdate())
+
+    def spend(self, amount, category=None, **fields):
+        fields.setdefault("transaction_type", "debit")
+        # Counters are adjusted once the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return Transaction.objects.create(
+                user=self.user,
+                category=category or self.food,
+                amount=Decimal(amount),
+                date=timezone.localdate(),
+                payment_method="cash",
+                **fields,
+            )
+
+    def get_spent(self):
+        response = self.client.get("/budgets/status/")
+        self.assertEqual(response.status_code, 200)
+        return {row["name"]: row["spent"] for row in response.data["budgets"]}
+
+    def update(self, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(f"/budgets/{self.budget.id}/", data, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_counter_follows_writes(self):
+        self.spend("10.00")
+        self.assertEqual(self.get_spent(), {"Food": Decimal("10.00")})
+        self.assertEqual(caches["default"].get(get_spend_key(self.budget.id, self.month)), 1000)
+
+        transaction = self.spend("25.50")
+        self.spend("40.00", transaction_type="credit")
+        self.spend("7.00", category=self.rent)
+        self.assertEqual(self.get_spent(), {"Food": Decimal("35.50")})
+
+        transaction.amount = Decimal("5.50")
+        with self.captureOnCommitCallbacks(execute=True):
+            transaction.save()
+        self.assertEqual(self.get_spent(), {"Food": Decimal("15.50")})
+        with self.captureOnCommitCallbacks(execute=True):
+            transaction.delete()
+        self.assertEqual(self.get_spent(), {"Food": Decimal("10.00")})
+
+    def test_expired_counter_is_reloaded_from_the_row(self):
+        self.spend("10.00")
+        self.get_spent()
+        caches["default"].clear()
+        self.spend("5.00")
+        self.assertEqual(self.get_spent(), {"Food": Decimal("15.00")})
+
+    def test_seeding_an_existing_row_returns_none(self):
+        self.spend("10.00")
+        self.assertIsNone(BudgetSpend.seed(self.budget, self.month))
+        self.assertEqual(BudgetSpend.objects.get(budget=self.budget).spent, Decimal("10.00"))
+
+    def test_reactivated_budget_counts_debits_made_while_inactive(self):
+        self.spend("10.00")
+        self.assertEqual(self.get_spent(), {"Food": Decimal("10.00")})
+        self.update(is_active=False)
+        self.spend("50.00")
+        self.update(is_active=True)
+        self.assertEqual(self.get_spent(), {"Food": Decimal("60.00")})
+
+    def test_category_change_recounts_the_spend(self):
+        self.spend("10.00")
+        self.assertEqual(self.get_spent(), {"Food": Decimal("10.00")})
+        self.update(category=str(self.rent.id))
+        self.spend("5.00", category=self.rent)
+        self.assertEqual(self.get_spent(), {"Rent": Decimal("5.00")})
+        self.assertEqual(BudgetSpend.objects.get(budget=self.budget).spent, Decimal("5.00"))
+
+    def test_other_changes_keep_the_spend(self):
+        self.spend("10.00")
+        self.get_spent()
+        self.update(amount="200.00", is_active=True)
+        self.assertTrue(BudgetSpend.objects.filter(budget=self.budget).exists())
+        self.assertEqual(self.get_spent(), {"Food": Decimal("10.00")})
+
+    def test_counter_seeded_before_a_commit_is_dropped(self):
+        self.spend("10.00")
+        cache = caches["default"]
+        add = cache.add
+
+        def add_after_commit(*args, **kwargs):
+            # Another request commits between the row read and add(), its
+            # increment finds no counter
+            BudgetSpend.objects.filter(budget=self.budget).update(spent=Decimal("15.00"))
+            return add(*args, **kwargs)
+
+        with mock.patch.object(cache, "add", add_after_commit):
+            self.assertEqual(self.get_spent(), {"Food": Decimal("10.00")})
+        self.assertIsNone(cache.get(get_spend_key(self.budget.id, self.month)))
+        self.assertEqual(self.get_spent(), {"Food": Decimal("15.00")})
+
+    def test_alerts_are_emailed_once_through_the_outbox(self):
+        self.spend("50.00")
+        self.assertFalse(BudgetAlert.objects.exists())
+        self.spend("35.00")
+        self.spend("1.00")
+        alert = BudgetAlert.objects.get()
+        self.assertEqual((alert.threshold, alert.spent), (80, Decimal("85.00")))
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.subject, email.to), ("Food budget: 80% used", [self.user.email]))
+
+        call_command("send_outbox_emails", stdout=io.StringIO())
+        self.assertEqual([message.subject for message in mail.outbox], ["Food budget: 80% used"])
+
+        # Reseeding after a change does not alert the same threshold again
+        self.update(is_active=False)
+        self.update(is_active=True)
+        self.spend("1.00")
+        self.assertEqual((BudgetAlert.objects.count(), OutboxEmail.objects.count()), (1, 1))
+
+        self.spend("20.00")
+        self.assertEqual(
+            list(BudgetAlert.objects.order_by("threshold").values_list("threshold", flat=True)),
+            [80, 100],
+        )
+        self.assertEqual(OutboxEmail.objects.filter(status="pending").count(), 1)
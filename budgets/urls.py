@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import BudgetStatusView, BudgetView
+
+urlpatterns = [
+    path("", BudgetView.as_view(), name="budget-list-create"),
+    path("status/", BudgetStatusView.as_view(), name="budget-status"),
+    path("<uuid:pk>/", BudgetView.as_view(), name="budget-detail"),
+]
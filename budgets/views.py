@@ -0,0 +1,129 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from django.db.transaction import atomic
+from django.utils import timezone
+from base.pagination import CustomPagination
+from .models import Budget, BudgetSpend, get_month
+from .serializers import BudgetSerializer
+
+
+class BudgetView(APIView):
+    """
+    API endpoint for listing, creating, retrieving, updating, and deleting
+    monthly category budgets.
+    """
+
+    permission_classes = [IsAuthenticated]
+    pagination_class = CustomPagination
+
+    def get_object(self, pk, user):
+        return Budget.objects.filter(id=pk, user=user).first()
+
+    def not_found(self):
+        return Response(
+            {"error": "Budget not found or you do not have permission"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    def get(self, request, pk=None):
+        if pk:
+            budget = self.get_object(pk, request.user)
+            if not budget:
+                return self.not_found()
+            return Response(BudgetSerializer(budget).data)
+
+        queryset = Budget.objects.filter(user=request.user).order_by("created_at", "id")
+        paginator = self.pagination_class(page_size=5)
+        paginated_queryset, total_count = paginator.paginate_queryset(
+            queryset=queryset, request=request
+        )
+        return paginator.get_paginated_response(
+            data=BudgetSerializer(paginated_queryset, many=True).data,
+            request=request,
+            total_count=total_count,
+        )
+
+    def post(self, request, pk=None):
+        data = request.data.copy()
+        data["user"] = request.user.id
+        serializer = BudgetSerializer(data=data)
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def put(self, request, pk):
+        budget = self.get_object(pk, request.user)
+        if not budget:
+            return self.not_found()
+        data = request.data.copy()
+        data.pop("user", None)  # Prevent user change
+        serializer = BudgetSerializer(budget, data=data, partial=True)
+        if serializer.is_valid():
+            # The spends only follow the category while the budget is active
+            category = serializer.validated_data.get("category", budget.category)
+            stale = category.id != budget.category_id or (
+                serializer.validated_data.get("is_active") and not budget.is_active
+            )
+            with atomic():
+                serializer.save()
+                if stale:
+                    BudgetSpend.reset(budget)
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def delete(self, request, pk):
+        budget = self.get_object(pk, request.user)
+        if not budget:
+            return self.not_found()
+        budget.delete()
+        return Response({"message": "Deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
+
+
+class BudgetStatusView(APIView):
+    """
+    API endpoint for the spend of every active budget in a month
+
+    Query Parameters (optional):
+    - month: YYYY-MM (default: current month)
+
+    Spends come from the cached counters, the transactions are not aggregated.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        month = request.query_params.get("month")
+        try:
+            month = get_month(f"{month}-01" if month else timezone.localdate())
+        except ValueError:
+            return Response(
+                {"error": "Invalid month parameter, expected YYYY-MM"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        budgets = list(
+            Budget.objects.filter(user=request.user, is_active=True)
+            .select_related("category")
+            .order_by("category__name", "id")
+        )
+        spent = BudgetSpend.get_spent(budgets, month)
+        return Response(
+            {
+                "month": f"{month:%Y-%m}",
+                "budgets": [
+                    {
+                        "budget": budget.id,
+                        "category": budget.category_id,
+                        "name": budget.category.name,
+                        "amount": budget.amount,
+                        "spent": spent[budget.id],
+                        "remaining": budget.amount - spent[budget.id],
+                        "percent_used": round(spent[budget.id] * 100 / budget.amount, 2),
+                    }
+                    for budget in budgets
+                ],
+            }
+        )
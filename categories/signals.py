@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from base.cache import bump_data_version
+from .models import Category
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    """
+    Bumps the owner's data version once the write commits, global categories
+    invalidate every user.
+    """
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_data_version(user_id))
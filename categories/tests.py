@@ -1,3 +1,52 @@
-from django.test import TestCase
+from base.testing import APITestCase, create_user
+from .models import Category
 
-# Create your tests here.
+
+class CategoryConditionalGetTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = create_user()
+        self.admin = create_user("admin@example.com", is_admin=True)
+        self.category = Category.objects.create(name="Food", user=self.owner)
+        self.url = f"/categories/{self.category.id}/"
+
+    def get(self, user, etag=None):
+        self.client.force_authenticate(user)
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get(self.url, headers=headers)
+
+    def test_unchanged_category_is_not_modified(self):
+        etag = self.get(self.owner)["ETag"]
+        self.assertEqual(self.get(self.owner, etag).status_code, 304)
+
+    def test_admin_sees_the_owners_changes(self):
+        etag = self.get(self.admin)["ETag"]
+        self.assertEqual(self.get(self.admin, etag).status_code, 304)
+
+        self.client.force_authenticate(self.owner)
+        response = self.client.patch(self.url, {"name": "Groceries"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.get(self.admin, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["name"], "Groceries")
+
+    def test_other_users_get_forbidden_not_a_validator(self):
+        other = create_user("other@example.com")
+        # "*" matches any current representation
+        response = self.get(other, "*")
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(response.has_header("ETag"))
+
+    def test_list_validator_changes_on_write(self):
+        self.client.force_authenticate(self.owner)
+        etag = self.client.get("/categories/")["ETag"]
+        self.assertEqual(
+            self.client.get("/categories/", headers={"If-None-Match": etag}).status_code, 304
+        )
+        # The version is bumped once the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name="Rent", user=self.owner)
+        self.assertEqual(
+            self.client.get("/categories/", headers={"If-None-Match": etag}).status_code, 200
+        )
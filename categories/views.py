@@ -2,11 +2,35 @@ from base.permissions import IsAdminOrOwner
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Q
+from django.db.models import Count, Max, Q
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from .models import Category
 from .serializers import CategorySerializer
 from django.shortcuts import get_object_or_404
-from base.pagination import CustomPagination
+from base.pagination import CustomPagination, CachedCount, EstimatedCount
+from base.cache import get_data_etag, make_etag
+
+
+def get_category_etag(request, pk=None):
+    """
+    Admins list every user's categories, so their validator comes from the
+    table's latest update and row count instead of their own data version.
+
+    A single category is validated by its own updated_at, whoever owns it, and
+    only for users allowed to read it, so others still get their 403 or 404.
+    """
+    if not request.user.is_authenticated:
+        return None
+    if pk is not None:
+        category = Category.objects.select_related("user").filter(id=pk).first()
+        if category is None or not IsAdminOrOwner().has_object_permission(request, None, category):
+            return None
+        return make_etag(request, category.updated_at)
+    if request.user.is_admin:
+        state = Category.objects.aggregate(Max("updated_at"), Count("id"))
+        return make_etag(request, state["updated_at__max"], state["id__count"])
+    return get_data_etag(request)
 
 
 class CategoryView(APIView):
@@ -47,6 +71,7 @@ class CategoryView(APIView):
     permission_classes = [IsAdminOrOwner]
     pagination_class = CustomPagination
 
+    @method_decorator(condition(etag_func=get_category_etag))
     def get(self, request, pk=None):
         """
         Handle both listing all categories (if no pk) and retrieving a single category (if pk provided).
@@ -63,8 +88,12 @@ class CategoryView(APIView):
                     is_active=True
                 )
 
-            # Initialize paginator
-            paginator = self.pagination_class()
+            # Initialize paginator, admins page over every category so the
+            # planner estimate is good enough for their total
+            if user.is_admin:
+                paginator = self.pagination_class(count_strategy=EstimatedCount())
+            else:
+                paginator = self.pagination_class(count_strategy=CachedCount())
             
             # Paginate the queryset
             paginated_queryset, total_count = paginator.paginate_queryset(
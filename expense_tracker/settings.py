@@ -41,12 +41,14 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework_simplejwt",
     'rest_framework_simplejwt.token_blacklist',
     "users",
     "transactions",
     "categories",
+    "budgets",
 ]
 
 MIDDLEWARE = [
@@ -137,13 +139,18 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "base.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'base.renderers.FastJSONRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'base.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
      'EXCEPTION_HANDLER': 'base.exceptions.global_exception_handler',
 }
@@ -179,6 +186,17 @@ SIMPLE_JWT = {
     'JTI_CLAIM': 'jti',
 }
 
+# Users resolved by CachedJWTAuthentication: seconds they stay cached in
+# Redis (the bound for changes that bypass CustomUser.save()), seconds a
+# process uses its own copy before re-checking the user's auth version (the
+# bound for saved changes such as deactivation), and users kept per process
+AUTH_USER_CACHE_TIMEOUT = 300
+AUTH_USER_LOCAL_TIMEOUT = 5
+AUTH_USER_LOCAL_SIZE = 1024
+
+# Expired refresh tokens deleted per transaction by the purge_tokens command
+TOKEN_PURGE_BATCH_SIZE = 1000
+
 
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -189,6 +207,17 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL')
 
+# Emails are queued in the outbox and sent by the send_outbox_emails worker.
+# Failed sends are retried after OUTBOX_RETRY_DELAY seconds, doubling per
+# attempt up to OUTBOX_MAX_RETRY_DELAY.
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60
+OUTBOX_MAX_RETRY_DELAY = 3600
+
+# Seconds a verification link stays valid, long enough to outlive outbox retries
+EMAIL_VERIFICATION_TOKEN_TIMEOUT = 60 * 60 * 24
+
 
 CACHES = {
     "default": {
@@ -207,5 +236,31 @@ CACHES = {
     },
 }
 
+# Render raw Decimal values (e.g. summary totals) as JSON strings instead of
+# numbers. Serializer DecimalFields follow COERCE_DECIMAL_TO_STRING instead.
+JSON_DECIMAL_AS_STRING = False
+
+
+# Seconds a cached summary/series/breakdown response stays valid; writes
+# invalidate earlier entries immediately through the user's data version
+RESPONSE_CACHE_TIMEOUT = 300
+
+
+# PostgreSQL range partitioning of transactions by date, see the
+# partition_transactions command. Interval is "year" or "month".
+TRANSACTION_PARTITION_INTERVAL = "year"
+TRANSACTION_PARTITIONS_AHEAD = 1
+
+
+# Bulk transaction create
+TRANSACTION_BULK_MAX_ROWS = 1000
+TRANSACTION_BULK_BATCH_SIZE = 500
+
+
+# Recurring transaction rules locked and materialized per database transaction
+RECURRING_TRANSACTION_BATCH_SIZE = 500
 
 
+# Budgets: seconds a cached spend counter lives before it is re-read from
+# the database. Alert emails go through the outbox (OUTBOX_* above).
+BUDGET_COUNTER_TIMEOUT = 3600
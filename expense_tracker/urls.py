@@ -23,4 +23,5 @@ urlpatterns = [
     path("users/", include("users.urls")),
     path('categories/', include('categories.urls')),
     path('transactions/', include('transactions.urls')),
+    path('budgets/', include('budgets.urls')),
 ]
@@ -0,0 +1,222 @@
+import calendar
+import datetime
+import hashlib
+import re
+import uuid
+from decimal import Decimal, InvalidOperation
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from .models import DESCRIPTION_SEARCH_VECTOR, Transaction
+
+
+class TransactionFilter:
+    """
+    Compiles whitelisted query parameters into an index-friendly transaction filter.
+
+    Supported parameters:
+    - from, to: date range (YYYY-MM-DD)
+    - year, month: a calendar year, or a month (of the current year by default)
+    - amount_min, amount_max: amount range
+    - transaction_type, payment_method: one of the model choices
+    - category: comma separated category ids, "none" for uncategorized
+    - search: words in the description (at least 3 characters), ranked by
+      relevance on PostgreSQL, so not available with cursor pagination
+
+    Anything else (arbitrary lookups, joins, date__month style extracts) is
+    rejected, since it cannot be answered from the indexes. Values are
+    normalized so equivalent requests share one ``signature``, usable as a
+    cache key.
+    """
+
+    params = [
+        "from",
+        "to",
+        "year",
+        "month",
+        "amount_min",
+        "amount_max",
+        "transaction_type",
+        "payment_method",
+        "category",
+        "search",
+    ]
+    min_search_length = 3
+
+    def __init__(self, query_params, ignore=()):
+        unknown = set(query_params) - set(self.params) - set(ignore)
+        if unknown:
+            raise ValidationError(
+                {param: ["Unsupported filter."] for param in sorted(unknown)}
+            )
+
+        self.errors = {}
+        self.filters = {}
+        for param in self.params:
+            value = query_params.get(param)
+            if value not in (None, ""):
+                cleaned = getattr(self, f"clean_{param}")(value)
+                if cleaned is not None:
+                    self.filters[param] = cleaned
+        self.clean_period()
+        if self.errors:
+            raise ValidationError(self.errors)
+
+    def add_error(self, param, message):
+        self.errors.setdefault(param, []).append(message)
+
+    def parse_date(self, param, value):
+        try:
+            return datetime.date.fromisoformat(value)
+        except ValueError:
+            self.add_error(param, "Expected a date in YYYY-MM-DD format.")
+
+    def parse_int(self, param, value, low, high):
+        try:
+            number = int(value)
+            if low <= number <= high:
+                return number
+        except ValueError:
+            pass
+        self.add_error(param, f"Expected a number between {low} and {high}.")
+
+    def parse_amount(self, param, value):
+        try:
+            return Decimal(value).quantize(Decimal("0.01"))
+        except InvalidOperation:
+            self.add_error(param, "Expected a decimal amount.")
+
+    def parse_choice(self, param, value, choices):
+        if value in dict(choices):
+            return value
+        self.add_error(param, f"Expected one of {', '.join(dict(choices))}.")
+
+    def clean_from(self, value):
+        return self.parse_date("from", value)
+
+    def clean_to(self, value):
+        return self.parse_date("to", value)
+
+    def clean_year(self, value):
+        return self.parse_int("year", value, 1000, 9999)
+
+    def clean_month(self, value):
+        return self.parse_int("month", value, 1, 12)
+
+    def clean_amount_min(self, value):
+        return self.parse_amount("amount_min", value)
+
+    def clean_amount_max(self, value):
+        return self.parse_amount("amount_max", value)
+
+    def clean_transaction_type(self, value):
+        return self.parse_choice("transaction_type", value, Transaction.TRANSACTION_TYPE_CHOICES)
+
+    def clean_payment_method(self, value):
+        return self.parse_choice("payment_method", value, Transaction.PAYMENT_METHOD_CHOICES)
+
+    def clean_category(self, value):
+        categories = set()
+        for item in value.split(","):
+            item = item.strip().lower()
+            if item == "none":
+                categories.add(None)
+                continue
+            try:
+                categories.add(uuid.UUID(item))
+            except ValueError:
+                self.add_error("category", f"Invalid category id {item!r}.")
+        return categories
+
+    def clean_search(self, value):
+        value = " ".join(value.split())
+        if len(value) < self.min_search_length:
+            self.add_error("search", f"Use at least {self.min_search_length} characters.")
+        return value
+
+    def clean_period(self):
+        """
+        Folds year/month into the from/to range, which the date indexes can use.
+        """
+        year = self.filters.pop("year", None)
+        month = self.filters.pop("month", None)
+        if month is not None and year is None:
+            year = timezone.localdate().year
+        if year is not None:
+            first_month, last_month = (month, month) if month else (1, 12)
+            start = datetime.date(year, first_month, 1)
+            end = datetime.date(year, last_month, calendar.monthrange(year, last_month)[1])
+            self.filters["from"] = max(start, self.filters.get("from", start))
+            self.filters["to"] = min(end, self.filters.get("to", end))
+
+    def get_q(self):
+        """
+        Returns the compiled filter as a Q object.
+        """
+        q = Q()
+        filters = self.filters
+        if "from" in filters:
+            q &= Q(date__gte=filters["from"])
+        if "to" in filters:
+            q &= Q(date__lte=filters["to"])
+        if "amount_min" in filters:
+            q &= Q(amount__gte=filters["amount_min"])
+        if "amount_max" in filters:
+            q &= Q(amount__lte=filters["amount_max"])
+        if "transaction_type" in filters:
+            q &= Q(transaction_type=filters["transaction_type"])
+        if "payment_method" in filters:
+            q &= Q(payment_method=filters["payment_method"])
+        if "category" in filters:
+            categories = filters["category"]
+            category_q = Q(category__in=[pk for pk in categories if pk is not None])
+            if None in categories:
+                category_q |= Q(category__isnull=True)
+            q &= category_q
+        return q
+
+    def get_search_query(self):
+        """
+        Returns a prefix-matching tsquery for the search terms, e.g. "ube rid" -> ube:* & rid:*.
+        """
+        words = re.findall(r"[^\W_]+", self.filters["search"].lower())
+        return SearchQuery(
+            " & ".join(f"{word}:*" for word in words), config="simple", search_type="raw"
+        )
+
+    def filter_queryset(self, queryset):
+        """
+        Applies the filter. On PostgreSQL a search is answered from the full-text
+        index and ranked by relevance; other databases fall back to icontains.
+        """
+        queryset = queryset.filter(self.get_q())
+        if "search" not in self.filters:
+            return queryset
+
+        has_words = re.search(r"\w", self.filters["search"])
+        if connections[queryset.db].vendor != "postgresql" or not has_words:
+            return queryset.filter(description__icontains=self.filters["search"])
+
+        search_query = self.get_search_query()
+        return (
+            queryset.alias(search_vector=DESCRIPTION_SEARCH_VECTOR)
+            .filter(search_vector=search_query)
+            .annotate(search_rank=SearchRank(DESCRIPTION_SEARCH_VECTOR, search_query))
+            .order_by("-search_rank", "-date", "-id")
+        )
+
+    @property
+    def signature(self):
+        """
+        Canonical, order independent representation of the filter.
+        """
+        parts = []
+        for param, value in sorted(self.filters.items()):
+            if isinstance(value, set):
+                value = ",".join(sorted(str(item).lower() for item in value))
+            elif param == "search":
+                value = value.lower()
+            parts.append(f"{param}={value}")
+        return hashlib.md5("&".join(parts).encode()).hexdigest()
@@ -0,0 +1,182 @@
+import csv
+import datetime
+import itertools
+import time
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import F, Q
+from categories.models import Category
+from .models import ImportJob, Transaction
+
+# Transaction field -> CSV column
+DEFAULT_COLUMNS = {
+    "amount": "amount",
+    "date": "date",
+    "description": "description",
+    "transaction_type": "transaction_type",
+    "payment_method": "payment_method",
+    "category": "category",
+}
+TRANSACTION_TYPES = {
+    "debit": "debit",
+    "dr": "debit",
+    "withdrawal": "debit",
+    "credit": "credit",
+    "cr": "credit",
+    "deposit": "credit",
+}
+MAX_AMOUNT = Decimal("9999999.99")
+
+
+def read_csv_rows(stream, skip=0):
+    """
+    Yields (line number, row dict) from a CSV text stream without loading it,
+    skipping the first ``skip`` data rows.
+    """
+    reader = csv.DictReader(stream)
+    rows = ((reader.line_num, row) for row in reader)
+    return itertools.islice(rows, skip, None)
+
+
+class TransactionImporter:
+    """
+    Imports transactions from a CSV stream in chunks.
+
+    Each chunk is inserted with bulk_create and committed together with the
+    job's counters, so rerunning with the same job resumes after the last
+    committed chunk.
+    """
+
+    def __init__(self, job, chunk_size=2000, progress=None):
+        self.job = job
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.throughput = 0
+        self.columns = {**DEFAULT_COLUMNS, **job.options.get("columns", {})}
+        self.date_format = job.options.get("date_format", "%Y-%m-%d")
+        self.default_payment_method = job.options.get("payment_method", "online")
+        # Categories are resolved by slug without a query per row
+        self.categories = dict(
+            Category.objects.filter(
+                Q(user=job.user) | Q(user=None), is_active=True, slug__isnull=False
+            ).values_list("slug", "id")
+        )
+
+    @classmethod
+    def start(cls, user, source, columns=None, date_format=None, **kwargs):
+        """
+        Creates a job for a new import and returns its importer.
+        """
+        options = {"columns": columns or {}}
+        if date_format:
+            options["date_format"] = date_format
+        job = ImportJob.objects.create(user=user, source=source, options=options)
+        return cls(job, **kwargs)
+
+    def get_value(self, row, field):
+        column = self.columns.get(field)
+        return (row.get(column) or "").strip() if column else ""
+
+    def parse_row(self, row):
+        """
+        Maps a CSV row to Transaction fields. Raises ValueError on invalid data.
+        """
+        raw_amount = self.get_value(row, "amount").replace(",", "")
+        try:
+            amount = Decimal(raw_amount)
+        except InvalidOperation:
+            raise ValueError(f"Invalid amount {raw_amount!r}")
+
+        raw_type = self.get_value(row, "transaction_type").lower()
+        if raw_type:
+            if raw_type not in TRANSACTION_TYPES:
+                raise ValueError(f"Invalid transaction type {raw_type!r}")
+            transaction_type = TRANSACTION_TYPES[raw_type]
+        else:
+            # Signed amounts, as most bank exports use
+            transaction_type = "debit" if amount < 0 else "credit"
+        amount = abs(amount)
+        if amount <= 0 or amount >= MAX_AMOUNT:
+            raise ValueError(f"Amount out of range {raw_amount!r}")
+
+        raw_date = self.get_value(row, "date")
+        try:
+            date = datetime.datetime.strptime(raw_date, self.date_format).date()
+        except ValueError:
+            raise ValueError(f"Invalid date {raw_date!r}, expected {self.date_format}")
+
+        payment_method = self.get_value(row, "payment_method").lower()
+        if payment_method not in dict(Transaction.PAYMENT_METHOD_CHOICES):
+            payment_method = self.default_payment_method
+
+        slug = self.get_value(row, "category")
+        if slug and slug not in self.categories:
+            raise ValueError(f"Unknown category {slug!r}")
+
+        return Transaction(
+            user=self.job.user,
+            amount=amount.quantize(Decimal("0.01")),
+            date=date,
+            description=self.get_value(row, "description")[:255],
+            transaction_type=transaction_type,
+            payment_method=payment_method,
+            category_id=self.categories.get(slug),
+        )
+
+    def run(self, stream):
+        """
+        Imports the stream, resuming after the rows the job already committed.
+        Sets ``throughput`` to the rows imported per second by this run.
+        """
+        job = self.job
+        rows = read_csv_rows(stream, skip=job.rows_processed)
+        started = time.monotonic()
+        imported = 0
+        try:
+            while True:
+                chunk_started = time.monotonic()
+                chunk = list(itertools.islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+                transactions, errors = [], []
+                for line, row in chunk:
+                    try:
+                        transactions.append(self.parse_row(row))
+                    except ValueError as e:
+                        errors.append({"line": line, "error": str(e)})
+                self.commit_chunk(
+                    len(chunk), transactions, errors, time.monotonic() - chunk_started
+                )
+                imported += len(transactions)
+                self.throughput = imported / max(time.monotonic() - started, 1e-6)
+                if self.progress:
+                    self.progress(job, self.throughput)
+        except Exception:
+            ImportJob.objects.filter(pk=job.pk).update(status="failed")
+            job.status = "failed"
+            raise
+
+        ImportJob.objects.filter(pk=job.pk).update(status="completed")
+        job.status = "completed"
+        return job
+
+    def commit_chunk(self, processed, transactions, errors, elapsed):
+        """
+        Inserts a chunk and advances the job counters in one database transaction.
+        """
+        job = self.job
+        with transaction.atomic():
+            Transaction.objects.bulk_create(transactions)
+            job.errors = (job.errors + errors)[: ImportJob.MAX_ERRORS]
+            ImportJob.objects.filter(pk=job.pk).update(
+                status="running",
+                rows_processed=F("rows_processed") + processed,
+                rows_imported=F("rows_imported") + len(transactions),
+                rows_failed=F("rows_failed") + len(errors),
+                errors=job.errors,
+                elapsed_seconds=F("elapsed_seconds") + elapsed,
+            )
+        job.rows_processed += processed
+        job.rows_imported += len(transactions)
+        job.rows_failed += len(errors)
+        job.elapsed_seconds += elapsed
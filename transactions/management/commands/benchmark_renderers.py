@@ -0,0 +1,81 @@
+import datetime
+import random
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from base.renderers import FastJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares JSONRenderer and FastJSONRenderer on transaction-shaped payloads "
+        "and fails if their output differs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100, help="Rows per payload")
+        parser.add_argument("--repeat", type=int, default=200, help="Renders per renderer")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed, both use the stdlib."))
+
+        rows, repeat = options["rows"], options["repeat"]
+        for name, payload in self.get_payloads(rows):
+            timings = {}
+            for renderer in (JSONRenderer(), FastJSONRenderer()):
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    output = renderer.render(payload)
+                timings[type(renderer).__name__] = (time.perf_counter() - start) / repeat
+                if type(renderer) is JSONRenderer:
+                    expected = output
+                elif output != expected:
+                    raise CommandError(f"{name}: FastJSONRenderer output differs.")
+            stock, fast = timings["JSONRenderer"], timings["FastJSONRenderer"]
+            self.stdout.write(
+                f"{name}: JSONRenderer {stock * 1e6:.0f} us, FastJSONRenderer "
+                f"{fast * 1e6:.0f} us ({stock / fast:.1f}x)"
+            )
+        self.stdout.write(self.style.SUCCESS("Identical output."))
+
+    def get_payloads(self, rows):
+        """
+        Yields (name, data) pairs: a serialized list page, where UUID foreign
+        keys are the only non-string values, and raw values() rows.
+        """
+        user_id = uuid.uuid4()
+        now = timezone.now()
+        raw = [
+            {
+                "id": uuid.uuid4(),
+                "date": timezone.localdate() - datetime.timedelta(days=random.randint(0, 365)),
+                "created_at": now,
+                "updated_at": now,
+                "amount": Decimal(random.randint(100, 500000)) / 100,
+                "description": random.choice(["", "Groceries", "Rent", "Salary"]),
+                "payment_method": random.choice(["online", "cash"]),
+                "transaction_type": random.choice(["debit", "credit"]),
+                "user": user_id,
+                "category": random.choice([None, uuid.uuid4()]),
+            }
+            for _ in range(rows)
+        ]
+        page = [
+            {
+                **row,
+                "id": str(row["id"]),
+                "date": row["date"].isoformat(),
+                "created_at": timezone.localtime(row["created_at"]).isoformat(),
+                "updated_at": timezone.localtime(row["updated_at"]).isoformat(),
+                "amount": f"{row['amount']:f}",
+            }
+            for row in raw
+        ]
+        yield "list page", {"count": rows, "next": None, "previous": None, "results": page}
+        yield "values rows", raw
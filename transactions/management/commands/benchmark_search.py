@@ -0,0 +1,120 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from transactions.filters import TransactionFilter
+from transactions.models import Transaction
+from users.models import CustomUser
+
+WORDS = [
+    "uber", "ride", "groceries", "rent", "salary", "coffee", "lunch", "dinner",
+    "electricity", "internet", "fuel", "pharmacy", "movie", "books", "gym",
+    "insurance", "taxi", "flight", "hotel", "refund", "transfer", "market",
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Times description search with the full-text index against the icontains "
+        "scan it replaced, on a user seeded with millions of transactions that "
+        "are rolled back afterwards. PostgreSQL only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2_000_000, help="Transactions seeded")
+        parser.add_argument("--repeat", type=int, default=3, help="Searches per term and path")
+        parser.add_argument(
+            "--term",
+            action="append",
+            dest="terms",
+            help="Search term to time (repeatable), default: common, rare and missing words",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("The search index only exists on PostgreSQL.")
+
+        try:
+            with transaction.atomic():
+                user = CustomUser.objects.create_user(
+                    email="benchmark@example.com", username="benchmark", password=None
+                )
+                started = time.perf_counter()
+                self.seed(user, options["rows"])
+                self.stdout.write(
+                    f"Seeded {options['rows']} rows in {time.perf_counter() - started:.1f} s."
+                )
+                # Every seeded description ends with its row number, a rare word
+                terms = options["terms"] or [
+                    "uber rid", "groceries", str(options["rows"] // 2 + 1), "electricity bill"
+                ]
+                for term in terms:
+                    self.compare(user, term, options["repeat"])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def compare(self, user, term, repeat):
+        queryset = Transaction.objects.filter(user=user).order_by("-date", "-id")
+        paths = {
+            "full-text": TransactionFilter({"search": term}).filter_queryset(queryset),
+            "icontains": queryset.filter(description__icontains=term),
+        }
+        plan = json.loads(paths["full-text"].explain(format="json"))
+        if not self.uses_index(plan[0]["Plan"], "txn_description_search_idx"):
+            raise CommandError("The full-text search does not use txn_description_search_idx.")
+
+        timings = {}
+        for name, results in paths.items():
+            page = results[:20]
+            started = time.perf_counter()
+            for _ in range(repeat):
+                rows = list(page.values_list("id", flat=True))
+            timings[name] = (time.perf_counter() - started) / repeat
+            self.stdout.write(
+                f"{term!r} {name}: {len(rows)} row(s) on the first page, "
+                f"{timings[name] * 1000:.1f} ms"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{term!r}: icontains takes {timings['icontains'] / timings['full-text']:.1f}x "
+                "the full-text time."
+            )
+        )
+
+    def uses_index(self, node, name):
+        if node.get("Index Name") == name:
+            return True
+        return any(self.uses_index(child, name) for child in node.get("Plans", []))
+
+    def seed(self, user, count):
+        """
+        Inserts the rows with a single INSERT ... SELECT, since bulk_create is
+        too slow at this size. The rollups are not updated, the rows are rolled
+        back anyway.
+        """
+        words = "(ARRAY[{}])".format(", ".join(f"'{word}'" for word in WORDS))
+        pick = f"{words}[1 + floor(random() * {len(WORDS)})::int]"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {Transaction._meta.db_table}
+                    (id, created_at, updated_at, user_id, amount, date, description,
+                     payment_method, transaction_type)
+                SELECT gen_random_uuid(), now(), now(), %s,
+                       round((random() * 5000 + 1)::numeric, 2),
+                       current_date - (random() * 3650)::int,
+                       initcap({pick}) || ' ' || {pick} || ' ' || n,
+                       CASE WHEN random() < 0.5 THEN 'online' ELSE 'cash' END,
+                       CASE WHEN random() < 0.8 THEN 'debit' ELSE 'credit' END
+                FROM generate_series(1, %s) AS n
+                """,
+                [user.id, count],
+            )
+            cursor.execute(f"ANALYZE {Transaction._meta.db_table}")
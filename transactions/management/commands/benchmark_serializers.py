@@ -0,0 +1,84 @@
+import datetime
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from transactions.models import Transaction
+from transactions.serializers import TRANSACTION_VALUES_PLAN, TransactionSerializer
+from users.models import CustomUser
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares rendering transaction list pages with TransactionSerializer and "
+        "with the values() plan, and fails if their JSON output differs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100, help="Rows per page")
+        parser.add_argument("--repeat", type=int, default=50, help="Pages rendered per path")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = CustomUser.objects.create_user(
+                    email="benchmark@example.com", username="benchmark", password=None
+                )
+                self.seed(user, options["rows"])
+                self.compare(user, options["rows"], options["repeat"])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def compare(self, user, rows, repeat):
+        queryset = Transaction.objects.filter(user=user).order_by("-date", "-id")[:rows]
+        renderer = JSONRenderer()
+
+        def serializer_page():
+            return renderer.render(TransactionSerializer(queryset, many=True).data)
+
+        def plan_page():
+            values = queryset.values(*TRANSACTION_VALUES_PLAN.fields)
+            return renderer.render(TRANSACTION_VALUES_PLAN.convert(values))
+
+        if serializer_page() != plan_page():
+            raise CommandError("The values() plan renders differently from the serializer.")
+
+        timings = {}
+        for name, render in (("serializer", serializer_page), ("values plan", plan_page)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                render()
+            timings[name] = (time.perf_counter() - start) / repeat
+            self.stdout.write(
+                f"{name}: {timings[name] * 1000:.2f} ms/page, "
+                f"{timings[name] / rows * 1e6:.1f} us/row"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Identical output, {timings['serializer'] / timings['values plan']:.1f}x faster."
+            )
+        )
+
+    def seed(self, user, count):
+        today = timezone.localdate()
+        Transaction.objects.bulk_create(
+            Transaction(
+                user=user,
+                amount=Decimal(random.randint(100, 500000)) / 100,
+                date=today - datetime.timedelta(days=random.randint(0, 365)),
+                payment_method=random.choice(["online", "cash"]),
+                transaction_type=random.choice(["debit", "credit"]),
+                description=random.choice(["", "Groceries", "Rent", "Salary"]),
+            )
+            for _ in range(count)
+        )
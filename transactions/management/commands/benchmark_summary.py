@@ -0,0 +1,120 @@
+import datetime
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from transactions.models import Transaction, month_start
+from transactions.utils import add_months, get_summary_query
+from users.models import CustomUser
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the monthly summary computed with the five queries the view "
+        "used to run against the single aggregate over the rollups (month "
+        "aligned) and over the transactions (any other range), on a seeded user "
+        "that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50000, help="Transactions seeded")
+        parser.add_argument("--repeat", type=int, default=20, help="Summaries per path")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = CustomUser.objects.create_user(
+                    email="benchmark@example.com", username="benchmark", password=None
+                )
+                self.seed(user, options["rows"])
+                self.compare(user, options["repeat"])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def compare(self, user, repeat):
+        start = month_start(timezone.localdate())
+        end = add_months(start, 1) - datetime.timedelta(days=1)
+
+        def before():
+            queryset = Transaction.objects.filter(
+                user=user, date__year=start.year, date__month=start.month
+            )
+            credit = Transaction.objects.filter(user=user, transaction_type="credit")
+            debit = Transaction.objects.filter(user=user, transaction_type="debit")
+            return (
+                queryset.count(),
+                queryset.filter(transaction_type="debit").aggregate(total=Sum("amount"))["total"] or 0,
+                queryset.filter(transaction_type="credit").aggregate(total=Sum("amount"))["total"] or 0,
+                (credit.aggregate(total=Sum("amount"))["total"] or 0)
+                - (debit.aggregate(total=Sum("amount"))["total"] or 0),
+            )
+
+        def after(period_end):
+            queryset, aggregates = get_summary_query(user, {"current": (start, period_end)})
+            totals = queryset.aggregate(**aggregates)
+            return (
+                totals["current_count"],
+                totals["current_expense"],
+                totals["current_income"],
+                totals["all_credit"] - totals["all_debit"],
+            )
+
+        paths = (
+            ("before", before),
+            ("rollups", lambda: after(end)),
+            # Nothing is dated after today, one more day only makes the range unaligned
+            ("transactions", lambda: after(end + datetime.timedelta(days=1))),
+        )
+        def rounded(result):
+            # SQLite sums decimals as floats
+            return tuple(Decimal(value).quantize(Decimal("0.01")) for value in result)
+
+        expected = rounded(before())
+        timings = {}
+        for name, summary in paths:
+            with CaptureQueriesContext(connection) as queries:
+                result = summary()
+            if rounded(result) != expected:
+                raise CommandError(f"The {name} summary differs: {result} != {expected}")
+
+            began = time.perf_counter()
+            for _ in range(repeat):
+                summary()
+            timings[name] = (time.perf_counter() - began) / repeat
+            self.stdout.write(
+                f"{name}: {len(queries)} quer{'y' if len(queries) == 1 else 'ies'}, "
+                f"{timings[name] * 1000:.2f} ms/summary"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Same totals, {timings['before'] / timings['rollups']:.1f}x faster "
+                "from the rollups."
+            )
+        )
+
+    def seed(self, user, count):
+        today = timezone.localdate()
+        Transaction.objects.bulk_create(
+            (
+                Transaction(
+                    user=user,
+                    amount=Decimal(random.randint(100, 500000)) / 100,
+                    date=today - datetime.timedelta(days=random.randint(0, 3 * 365)),
+                    payment_method=random.choice(["online", "cash"]),
+                    transaction_type=random.choice(["debit", "credit"]),
+                )
+                for _ in range(count)
+            ),
+            batch_size=5000,
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.urls import get_resolver
+
+from base.cache import get_cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Reports (or with --reset, clears) the response cache hit/miss counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Reset the counters")
+
+    def handle(self, *args, **options):
+        # Loading the URLconf imports every view, registering the cached ones
+        get_resolver().url_patterns
+
+        if options["reset"]:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS("Response cache counters reset."))
+            return
+
+        for view_name, stats in get_cache_stats().items():
+            hit_rate = "-" if stats["hit_rate"] is None else f"{stats['hit_rate']:.1%}"
+            self.stdout.write(
+                f"{view_name}: {stats['hits']} hit(s), {stats['misses']} miss(es), "
+                f"hit rate {hit_rate}"
+            )
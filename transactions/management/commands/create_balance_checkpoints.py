@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from transactions.models import BalanceCheckpoint, MonthlyRollup, month_start
+from transactions.utils import add_months
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the missing monthly balance checkpoints up to the current month "
+        "from the rollups. Run it periodically, e.g. on the first of each month."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only create the checkpoints of this email")
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Also correct existing checkpoints that differ from the rollups",
+        )
+
+    def handle(self, *args, **options):
+        rollups = MonthlyRollup.objects.all()
+        if options["user"]:
+            try:
+                user = CustomUser.objects.get(email=options["user"])
+            except CustomUser.DoesNotExist:
+                raise CommandError(f"No user with email {options['user']}")
+            rollups = rollups.filter(user=user)
+
+        current = month_start(timezone.localdate())
+        created = updated = 0
+        for user_id in rollups.values_list("user", flat=True).distinct().order_by():
+            user_created, user_updated = self.checkpoint_user(
+                user_id, current, options["rebuild"]
+            )
+            created += user_created
+            updated += user_updated
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {created} checkpoint(s), corrected {updated}.")
+        )
+
+    @transaction.atomic
+    def checkpoint_user(self, user_id, current, rebuild):
+        """
+        Returns (created, corrected) checkpoints of a user. Locking the rollups
+        keeps writers from moving them while the balances are summed.
+        """
+        monthly = {
+            row["month"]: row["credit_total"] - row["debit_total"]
+            for row in MonthlyRollup.objects.select_for_update()
+            .filter(user_id=user_id, month__lt=current)
+            .values("month", "debit_total", "credit_total")
+        }
+        if not monthly:
+            return 0, 0
+        stored = {
+            checkpoint.date: checkpoint
+            for checkpoint in BalanceCheckpoint.objects.select_for_update().filter(user_id=user_id)
+        }
+
+        missing, mismatched = [], []
+        balance, month = 0, min(monthly)
+        while month < current:
+            balance += monthly.get(month, 0)
+            month = add_months(month, 1)
+            checkpoint = stored.get(month)
+            if checkpoint is None:
+                missing.append(BalanceCheckpoint(user_id=user_id, date=month, balance=balance))
+            elif rebuild and checkpoint.balance != balance:
+                self.stdout.write(
+                    f"{user_id} {month}: stored {checkpoint.balance}, expected {balance}"
+                )
+                checkpoint.balance = balance
+                checkpoint.updated_at = timezone.now()
+                mismatched.append(checkpoint)
+
+        BalanceCheckpoint.objects.bulk_create(missing, batch_size=1000)
+        BalanceCheckpoint.objects.bulk_update(mismatched, ["balance", "updated_at"], batch_size=1000)
+        return len(missing), len(mismatched)
@@ -0,0 +1,174 @@
+import datetime
+import json
+import random
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from categories.models import Category
+from transactions.models import MonthlyRollup, Transaction
+from transactions.utils import add_months, get_summary_query, is_month_aligned
+from users.models import CustomUser
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs EXPLAIN on the SQL behind the transaction endpoints and fails if a "
+        "plan contains a sequential scan of the transactions table or a sort node."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("email", help="User whose queries are explained")
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help=(
+                "Insert this many synthetic transactions for the user first, and "
+                "copies for other users (rolled back afterwards)"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Query plans can only be checked on PostgreSQL.")
+
+        try:
+            user = CustomUser.objects.get(email=options["email"])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        failures = []
+        try:
+            with transaction.atomic():
+                if options["seed"]:
+                    self.seed(user, options["seed"])
+                for name, query in self.get_queries(user):
+                    problems = self.check_plan(query)
+                    status = "ok" if not problems else ", ".join(problems)
+                    self.stdout.write(f"{name}: {status}")
+                    if problems:
+                        failures.append(name)
+                if options["seed"]:
+                    raise Rollback()
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError(f"Unindexed plans: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("All plans use the indexes."))
+
+    def get_queries(self, user):
+        """
+        Yields (name, queryset or SQL) pairs mirroring the SQL each endpoint runs.
+        """
+        today = timezone.localdate()
+        month_start = today.replace(day=1)
+        base = Transaction.objects.filter(user=user)
+        ordered = base.order_by("-date", "-id")
+        last = ordered.values_list("date", "id").first() or (today, None)
+
+        yield "list page", ordered[:5]
+        if last[1] is not None:
+            yield "list cursor page", ordered.filter(
+                Q(date__lt=last[0]) | Q(date=last[0], id__lt=last[1])
+            )[:5]
+        yield "month range", ordered.filter(date__gte=month_start, date__lte=today)[:5]
+        # The summary reads the rollups for whole months, the rows otherwise.
+        # Nothing is dated after today, so one more day leaves the month unaligned.
+        month_end = add_months(month_start, 1) - datetime.timedelta(days=1)
+        end = today
+        if is_month_aligned(month_start, end):
+            end += datetime.timedelta(days=1)
+        yield "summary rollups", self.get_summary_sql(user, {"current": (month_start, month_end)})
+        yield "summary transactions", self.get_summary_sql(user, {"current": (month_start, end)})
+        category = base.exclude(category=None).values_list("category", flat=True).first()
+        if category is not None:
+            yield "category filter", ordered.filter(category=category)[:5]
+
+    def get_summary_sql(self, user, periods):
+        """
+        Returns the SQL of the aggregate the summary endpoint runs for periods.
+        """
+        queryset, aggregates = get_summary_query(user, periods)
+        # aggregate() evaluates straight away, so take the SQL it ran
+        with CaptureQueriesContext(connection) as queries:
+            queryset.aggregate(**aggregates)
+        return queries[-1]["sql"]
+
+    def check_plan(self, query):
+        """
+        Returns the problems found in the plan of the queryset or SQL.
+        """
+        if isinstance(query, str):
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {query}")
+                plan = cursor.fetchone()[0]
+        else:
+            plan = json.loads(query.explain(format="json"))
+
+        problems = []
+        nodes = [plan[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            if (
+                node["Node Type"] == "Seq Scan"
+                # Partitions (see partition_transactions) are named after the table
+                and node.get("Relation Name", "").startswith(Transaction._meta.db_table)
+            ):
+                problems.append("sequential scan")
+            if "Sort" in node["Node Type"]:
+                problems.append(node["Node Type"].lower())
+            nodes.extend(node.get("Plans", []))
+        return problems
+
+    def seed(self, user, count):
+        """
+        Inserts synthetic transactions spread over ten years and twenty of the
+        user's categories (a tenth uncategorized), copies them to nineteen
+        synthetic users so the user holds a twentieth of the table, and
+        refreshes statistics.
+        """
+        today = timezone.localdate()
+        categories = Category.objects.bulk_create(
+            Category(user=user, name=f"Seeded {index}") for index in range(20)
+        )
+        Transaction.objects.bulk_create(
+            (
+                Transaction(
+                    user=user,
+                    amount=Decimal(random.randint(100, 500000)) / 100,
+                    date=today - datetime.timedelta(days=random.randint(0, 3650)),
+                    payment_method=random.choice(["online", "cash"]),
+                    transaction_type=random.choice(["debit", "credit"]),
+                    category=random.choice(categories) if random.random() > 0.1 else None,
+                )
+                for _ in range(count)
+            ),
+            batch_size=5000,
+        )
+        others = CustomUser.objects.bulk_create(
+            CustomUser(email=f"seeded-{index}@example.invalid", username=f"seeded-{index}")
+            for index in range(19)
+        )
+        # Copied in SQL, only the user's own rollups are read
+        table = Transaction._meta.db_table
+        copied = {"id": "gen_random_uuid()", "user_id": "owner", "category_id": "NULL"}
+        columns = [field.column for field in Transaction._meta.concrete_fields]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"SELECT {', '.join(copied.get(column, column) for column in columns)} "
+                f"FROM {table}, unnest(%s::uuid[]) AS owner WHERE user_id = %s",
+                [[other.id for other in others], user.id],
+            )
+            cursor.execute(f"ANALYZE {table}")
+            cursor.execute(f"ANALYZE {MonthlyRollup._meta.db_table}")
@@ -0,0 +1,34 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from transactions.utils import generate_recurring_transactions
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the transactions of every due recurring rule, for all users, "
+        "including periods missed since the last run. Safe to rerun and to run "
+        "concurrently; schedule it at least daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            help="Create occurrences due on or before this date (default: today)",
+        )
+        parser.add_argument("--batch-size", type=int, help="Rules per database transaction")
+
+    def handle(self, *args, **options):
+        as_of = timezone.localdate()
+        if options["date"]:
+            try:
+                as_of = datetime.date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError("--date must be YYYY-MM-DD")
+
+        rules, created = generate_recurring_transactions(as_of, options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {created} transaction(s) from {rules} rule(s).")
+        )
@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.importers import DEFAULT_COLUMNS, TransactionImporter
+from transactions.models import ImportJob
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports transactions from a CSV bank export in chunked bulk inserts. "
+        "Pass --job to resume an interrupted import from its last committed chunk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file to import")
+        parser.add_argument("--user", help="Email of the user who owns the transactions")
+        parser.add_argument("--job", help="Id of an earlier import of the same file to resume")
+        parser.add_argument(
+            "--column",
+            action="append",
+            default=[],
+            metavar="FIELD=COLUMN",
+            help=f"Map a transaction field ({', '.join(DEFAULT_COLUMNS)}) to a CSV column",
+        )
+        parser.add_argument("--date-format", help="strptime format of the date column")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options["job"]:
+            try:
+                job = ImportJob.objects.select_related("user").get(pk=options["job"])
+            except (ImportJob.DoesNotExist, ValueError):
+                raise CommandError(f"No import job {options['job']}")
+            importer = TransactionImporter(
+                job, chunk_size=options["chunk_size"], progress=self.report
+            )
+            self.stdout.write(f"Resuming after {job.rows_processed} rows")
+        else:
+            if not options["user"]:
+                raise CommandError("--user is required for a new import")
+            try:
+                user = CustomUser.objects.get(email=options["user"])
+            except CustomUser.DoesNotExist:
+                raise CommandError(f"No user with email {options['user']}")
+            importer = TransactionImporter.start(
+                user,
+                options["path"],
+                columns=self.parse_columns(options["column"]),
+                date_format=options["date_format"],
+                chunk_size=options["chunk_size"],
+                progress=self.report,
+            )
+            self.stdout.write(f"Started import job {importer.job.id}")
+
+        with open(options["path"], newline="", encoding="utf-8-sig") as stream:
+            job = importer.run(stream)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {job.rows_imported} rows, {job.rows_failed} failed "
+                f"({importer.throughput:.0f} rows/s)"
+            )
+        )
+        for error in job.errors:
+            self.stdout.write(f"line {error['line']}: {error['error']}")
+
+    def parse_columns(self, mappings):
+        columns = {}
+        for mapping in mappings:
+            field, _, column = mapping.partition("=")
+            if field not in DEFAULT_COLUMNS or not column:
+                raise CommandError(f"Invalid column mapping {mapping!r}")
+            columns[field] = column
+        return columns
+
+    def report(self, job, throughput):
+        self.stdout.write(f"{job.rows_processed} rows processed, {throughput:.0f} rows/s")
@@ -0,0 +1,66 @@
+import statistics
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends concurrent GET requests to a running server and reports throughput "
+        "and latency. Run it against the same endpoint served by a WSGI server "
+        "(e.g. /transactions/) and an ASGI server (e.g. /transactions/async/)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="Full URL to request")
+        parser.add_argument("--token", help="Access token sent as a Bearer header")
+        parser.add_argument("--concurrency", type=int, default=50, help="Parallel clients")
+        parser.add_argument("--requests", type=int, default=1000, help="Total requests")
+        parser.add_argument("--timeout", type=float, default=30, help="Seconds per request")
+
+    def handle(self, *args, **options):
+        headers = {"Accept": "application/json"}
+        if options["token"]:
+            headers["Authorization"] = f"Bearer {options['token']}"
+
+        def fetch(_):
+            request = urllib.request.Request(options["url"], headers=headers)
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=options["timeout"]) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except OSError as e:
+                status = type(e).__name__
+            return status, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            results = list(executor.map(fetch, range(options["requests"])))
+        elapsed = time.perf_counter() - start
+
+        statuses = Counter(status for status, _ in results)
+        latencies = sorted(latency for _, latency in results)
+        if not latencies:
+            raise CommandError("No requests were sent.")
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        self.stdout.write(
+            f"{len(results)} requests, concurrency {options['concurrency']}, {elapsed:.2f}s: "
+            f"{len(results) / elapsed:.1f} req/s"
+        )
+        self.stdout.write(
+            f"latency ms: mean {statistics.mean(latencies) * 1000:.1f}, "
+            f"p50 {percentile(0.5):.1f}, p95 {percentile(0.95):.1f}, p99 {percentile(0.99):.1f}"
+        )
+        self.stdout.write(f"statuses: {dict(statuses)}")
+        if set(statuses) != {200}:
+            raise CommandError("Some requests failed.")
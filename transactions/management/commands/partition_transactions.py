@@ -0,0 +1,243 @@
+import datetime
+import json
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from transactions.models import Transaction
+from transactions.utils import bucket_start, next_bucket
+
+INTERVALS = ("year", "month")
+BOUND_RE = re.compile(r"FOR VALUES FROM \('([\d-]+)'\) TO \('([\d-]+)'\)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Range-partitions the transactions table by date on PostgreSQL. --convert "
+        "turns the existing table into a partitioned one (once), every run creates "
+        "the partitions for the coming periods, --verify checks that date-bounded "
+        "queries are pruned to one partition."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Convert the plain table, copying its rows (locks the table)",
+        )
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=settings.TRANSACTION_PARTITIONS_AHEAD,
+            help="Periods after the current one to create partitions for",
+        )
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Fail unless a one-period query scans a single partition",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning is only supported on PostgreSQL.")
+
+        self.table = Transaction._meta.db_table
+        self.interval = settings.TRANSACTION_PARTITION_INTERVAL
+        if self.interval not in INTERVALS:
+            raise CommandError("TRANSACTION_PARTITION_INTERVAL must be year or month.")
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if options["convert"]:
+                self.convert(cursor)
+            elif not self.is_partitioned(cursor):
+                raise CommandError(f"{self.table} is not partitioned, run with --convert.")
+
+            start = bucket_start(timezone.localdate(), self.interval)
+            created = self.create_partitions(cursor, start, options["ahead"] + 1)
+        self.stdout.write(self.style.SUCCESS(f"Created {created} partition(s)."))
+
+        if options["verify"]:
+            self.verify()
+
+    def is_partitioned(self, cursor):
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = %s::regclass", [self.table])
+        return cursor.fetchone()[0] == "p"
+
+    def convert(self, cursor):
+        """
+        Replaces the table with a partitioned copy: same columns, defaults and
+        checks, primary key (id, date), and the same indexes, unique and
+        foreign key constraints.
+        """
+        table = connection.ops.quote_name(self.table)
+        if self.is_partitioned(cursor):
+            raise CommandError(f"{self.table} is already partitioned.")
+
+        cursor.execute(
+            "SELECT conrelid::regclass::text FROM pg_constraint "
+            "WHERE confrelid = %s::regclass AND contype = 'f'",
+            [self.table],
+        )
+        referencing = [row[0] for row in cursor.fetchall()]
+        if referencing:
+            # Foreign keys would have to target (id, date)
+            raise CommandError(
+                f"Tables referencing {self.table} cannot be kept: {', '.join(referencing)}"
+            )
+
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+
+        # Indexes that do not back a constraint, and unique/foreign key constraints
+        cursor.execute(
+            "SELECT pg_get_indexdef(x.indexrelid) FROM pg_index x "
+            "WHERE x.indrelid = %s::regclass AND NOT EXISTS "
+            "(SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)",
+            [self.table],
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('u', 'f')",
+            [self.table],
+        )
+        constraints = cursor.fetchall()
+        for name, kind, definition in constraints:
+            if kind == "u" and "date" not in definition:
+                raise CommandError(f"Unique constraint {name} must include the date column.")
+
+        old_table = connection.ops.quote_name(f"{self.table}_unpartitioned")
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {old_table}")
+        cursor.execute(
+            f"CREATE TABLE {table} (LIKE {old_table} INCLUDING DEFAULTS "
+            f"INCLUDING CONSTRAINTS INCLUDING STORAGE) PARTITION BY RANGE (date)"
+        )
+
+        cursor.execute(f"SELECT min(date), max(date) FROM {old_table}")
+        first, last = cursor.fetchone()
+        if first is not None:
+            start = bucket_start(first, self.interval)
+            self.create_partitions(cursor, start, self.count_periods(start, last))
+        self.create_default_partition(cursor)
+
+        cursor.execute(f"INSERT INTO {table} SELECT * FROM {old_table}")
+        self.stdout.write(f"Copied {cursor.rowcount} row(s).")
+        cursor.execute(f"DROP TABLE {old_table}")
+
+        cursor.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT "
+            f"{connection.ops.quote_name(self.table + '_pkey')} PRIMARY KEY (id, date)"
+        )
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, kind, definition in constraints:
+            cursor.execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT {connection.ops.quote_name(name)} {definition}"
+            )
+        self.stdout.write(f"Partitioned {self.table} by {self.interval}.")
+
+    def count_periods(self, start, last):
+        count, current = 0, start
+        while current <= last:
+            count += 1
+            current = next_bucket(current, self.interval)
+        return count
+
+    def get_partition_name(self, start):
+        if self.interval == "year":
+            return f"{self.table}_p{start:%Y}"
+        return f"{self.table}_p{start:%Y_%m}"
+
+    def get_partitions(self, cursor):
+        """
+        Returns {(start, end): name} of the existing range partitions.
+        """
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass",
+            [self.table],
+        )
+        partitions = {}
+        for name, bound in cursor.fetchall():
+            match = BOUND_RE.search(bound)
+            if match:
+                start, end = map(datetime.date.fromisoformat, match.groups())
+                partitions[start, end] = name
+        return partitions
+
+    def create_default_partition(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE {connection.ops.quote_name(self.table + '_default')} "
+            f"PARTITION OF {connection.ops.quote_name(self.table)} DEFAULT"
+        )
+
+    def create_partitions(self, cursor, start, count):
+        """
+        Creates the missing partitions of count periods from start. Rows that
+        fell into the default partition for those periods are moved over.
+        """
+        table = connection.ops.quote_name(self.table)
+        default = connection.ops.quote_name(self.table + "_default")
+        existing = self.get_partitions(cursor)
+        created = 0
+        for _ in range(count):
+            end = next_bucket(start, self.interval)
+            if (start, end) not in existing:
+                overlapping = [
+                    name
+                    for (other_start, other_end), name in existing.items()
+                    if other_start < end and start < other_end
+                ]
+                if overlapping:
+                    raise CommandError(
+                        f"{start}..{end} overlaps {', '.join(overlapping)}, "
+                        "was TRANSACTION_PARTITION_INTERVAL changed?"
+                    )
+
+                name = connection.ops.quote_name(self.get_partition_name(start))
+                bounds = [start, end]
+                cursor.execute("SELECT to_regclass(%s)", [self.table + "_default"])
+                has_default = cursor.fetchone()[0] is not None
+                if has_default:
+                    cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {default}")
+                cursor.execute(
+                    f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)",
+                    bounds,
+                )
+                if has_default:
+                    cursor.execute(
+                        f"WITH moved AS (DELETE FROM {default} WHERE date >= %s AND date < %s "
+                        f"RETURNING *) INSERT INTO {table} SELECT * FROM moved",
+                        bounds,
+                    )
+                    cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+                self.stdout.write(f"Created {name} for {start}..{end}.")
+                created += 1
+            start = end
+        return created
+
+    def verify(self):
+        """
+        Explains a one-period query and fails unless it scans only that
+        period's partition.
+        """
+        start = bucket_start(timezone.localdate(), self.interval)
+        end = next_bucket(start, self.interval) - datetime.timedelta(days=1)
+        queryset = Transaction.objects.filter(date__range=(start, end)).values_list("amount")
+        plan = json.loads(queryset.explain(format="json"))
+
+        scanned, nodes = set(), [plan[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            if node.get("Relation Name", "").startswith(self.table):
+                scanned.add(node["Relation Name"])
+            nodes.extend(node.get("Plans", []))
+
+        expected = self.get_partition_name(start)
+        if scanned != {expected}:
+            raise CommandError(
+                f"{start}..{end} scanned {', '.join(sorted(scanned))}, expected only {expected}."
+            )
+        self.stdout.write(self.style.SUCCESS(f"{start}..{end} is pruned to {expected}."))
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from transactions.models import MonthlyRollup, Transaction
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Rebuilds (or with --verify, checks) the monthly transaction rollups."
+
+    fields = ("debit_total", "credit_total", "debit_count", "credit_count")
+    empty = dict.fromkeys(fields, 0)
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only rebuild the rollups of this email")
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Report rollups that differ from the transactions without writing",
+        )
+
+    def handle(self, *args, **options):
+        transactions = Transaction.objects.all()
+        rollups = MonthlyRollup.objects.all()
+        if options["user"]:
+            try:
+                user = CustomUser.objects.get(email=options["user"])
+            except CustomUser.DoesNotExist:
+                raise CommandError(f"No user with email {options['user']}")
+            transactions = transactions.filter(user=user)
+            rollups = rollups.filter(user=user)
+
+        with transaction.atomic():
+            expected = MonthlyRollup.collect_queryset(transactions)
+            stored = {
+                (row["user"], row["month"]): {field: row[field] for field in self.fields}
+                for row in rollups.select_for_update().values("user", "month", *self.fields)
+            }
+            mismatched = [
+                key
+                for key in expected.keys() | stored.keys()
+                if expected.get(key, self.empty) != stored.get(key, self.empty)
+            ]
+
+            for user_id, month in sorted(mismatched, key=lambda key: (str(key[0]), key[1])):
+                self.stdout.write(
+                    f"{user_id} {month:%Y-%m}: stored {stored.get((user_id, month))}, "
+                    f"expected {expected.get((user_id, month))}"
+                )
+
+            if options["verify"]:
+                if mismatched:
+                    raise CommandError(f"{len(mismatched)} rollup(s) are out of date.")
+                self.stdout.write(self.style.SUCCESS("Rollups match the transactions."))
+                return
+
+            rollups.delete()
+            MonthlyRollup.objects.bulk_create(
+                (
+                    MonthlyRollup(user_id=user_id, month=month, **totals)
+                    for (user_id, month), totals in expected.items()
+                ),
+                batch_size=1000,
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {len(expected)} rollup(s), {len(mismatched)} were out of date."
+            )
+        )
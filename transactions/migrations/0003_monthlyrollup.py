@@ -0,0 +1,69 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:52
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    MonthlyRollup = apps.get_model('transactions', 'MonthlyRollup')
+    grouped = (
+        Transaction.objects.order_by()
+        .annotate(rollup_month=TruncMonth('date'))
+        .values('user', 'rollup_month')
+        .annotate(
+            debit_total=Sum('amount', filter=Q(transaction_type='debit'), default=0),
+            credit_total=Sum('amount', filter=Q(transaction_type='credit'), default=0),
+            debit_count=Count('id', filter=Q(transaction_type='debit')),
+            credit_count=Count('id', filter=Q(transaction_type='credit')),
+        )
+    )
+    MonthlyRollup.objects.bulk_create(
+        (
+            MonthlyRollup(
+                user_id=row['user'],
+                month=row['rollup_month'],
+                debit_total=row['debit_total'],
+                credit_total=row['credit_total'],
+                debit_count=row['debit_count'],
+                credit_count=row['credit_count'],
+            )
+            for row in grouped.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_transaction_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('month', models.DateField()),
+                ('debit_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('credit_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('debit_count', models.IntegerField(default=0)),
+                ('credit_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='monthly_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Monthly rollup',
+                'verbose_name_plural': 'Monthly rollups',
+                'constraints': [models.UniqueConstraint(fields=('user', 'month'), name='rollup_user_month_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,283 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import TruncMonth
 from users.models import CustomUser
 from categories.models import Category
+import datetime
+import operator
 import uuid
+from decimal import Decimal
+from functools import reduce
 from django.utils import timezone
 from base.models import BaseModel
+from base.cache import bump_data_version
+from budgets.models import BudgetSpend
+from django.contrib.postgres.search import SearchVector
+
+# The search filter must use this exact expression to hit the GIN index that
+# migration 0005 creates on PostgreSQL only (it is not part of the model state)
+DESCRIPTION_SEARCH_VECTOR = SearchVector("description", config="simple")
+
+
+def month_start(value):
+    """
+    Returns the first day of the month of a date (or datetime, in local time).
+    """
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        value = value.date()
+    elif isinstance(value, str):
+        value = datetime.date.fromisoformat(value)
+    return value.replace(day=1)
+
+
+class MonthlyRollup(BaseModel):
+    """
+    Per-user, per-month debit/credit sums and counts.
+
+    Kept in step with Transaction writes inside the same database transaction,
+    so summaries read O(months) rows instead of scanning every transaction.
+    """
+
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.DO_NOTHING, related_name="monthly_rollups"
+    )
+    month = models.DateField()  # First day of the month
+    debit_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    credit_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    debit_count = models.IntegerField(default=0)
+    credit_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Rollup {self.user_id} - {self.month:%Y-%m}"
+
+    class Meta:
+        verbose_name = "Monthly rollup"
+        verbose_name_plural = "Monthly rollups"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "month"], name="rollup_user_month_uniq"),
+        ]
+
+    @staticmethod
+    def collect(rows, sign=1, deltas=None):
+        """
+        Builds {(user_id, month): {field: delta}} from transactions or value dicts,
+        accumulating into ``deltas`` when given.
+        """
+        deltas = {} if deltas is None else deltas
+        for row in rows:
+            if isinstance(row, dict):
+                user_id, date = row["user"], row["date"]
+                amount, transaction_type = row["amount"], row["transaction_type"]
+            else:
+                user_id, date = row.user_id, row.date
+                amount, transaction_type = row.amount, row.transaction_type
+            delta = deltas.setdefault(
+                (user_id, month_start(date)),
+                {"debit_total": 0, "credit_total": 0, "debit_count": 0, "credit_count": 0},
+            )
+            delta[f"{transaction_type}_total"] += sign * Decimal(str(amount))
+            delta[f"{transaction_type}_count"] += sign
+        return deltas
+
+    @staticmethod
+    def collect_queryset(queryset, sign=1):
+        """
+        Same as collect() but grouped in the database, one row per user and month.
+        """
+        grouped = (
+            queryset.order_by()
+            .annotate(rollup_month=TruncMonth("date"))
+            .values("user", "rollup_month")
+            .annotate(
+                debit_total=Sum("amount", filter=Q(transaction_type="debit"), default=0),
+                credit_total=Sum("amount", filter=Q(transaction_type="credit"), default=0),
+                debit_count=Count("id", filter=Q(transaction_type="debit")),
+                credit_count=Count("id", filter=Q(transaction_type="credit")),
+            )
+        )
+        fields = ("debit_total", "credit_total", "debit_count", "credit_count")
+        return {
+            (row["user"], month_start(row["rollup_month"])): {
+                field: sign * row[field] for field in fields
+            }
+            for row in grouped
+        }
+
+    @classmethod
+    def apply(cls, deltas):
+        """
+        Adds the deltas to the stored rollups, creating missing months.
+
+        Must run inside the transaction that wrote the rows. Keys are applied in
+        a fixed order so concurrent writers lock rollup rows in the same order.
+        A single save touches one or two months and updates them in place,
+        larger batches go through apply_bulk().
+        """
+        keys = sorted(
+            (key for key, delta in deltas.items() if any(delta.values())),
+            key=lambda key: (str(key[0]), key[1]),
+        )
+        if len(keys) > 2:
+            keys = cls.apply_bulk(keys, deltas)
+        for user_id, month in keys:
+            delta = deltas[user_id, month]
+            changes = {field: F(field) + value for field, value in delta.items()}
+            updated = cls.objects.filter(user_id=user_id, month=month).update(
+                updated_at=timezone.now(), **changes
+            )
+            if updated:
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(user_id=user_id, month=month, **delta)
+            except models.IntegrityError:
+                # Another writer created the month first
+                cls.objects.filter(user_id=user_id, month=month).update(
+                    updated_at=timezone.now(), **changes
+                )
+
+    @classmethod
+    def apply_bulk(cls, keys, deltas):
+        """
+        Applies the deltas of many months with one locking select, one
+        bulk_update and one bulk_create. Returns the keys left to apply one by
+        one because another writer created some of the missing months first.
+        """
+        locked = cls.objects.select_for_update().filter(
+            reduce(operator.or_, (Q(user_id=user_id, month=month) for user_id, month in keys))
+        )
+        rollups = {
+            (rollup.user_id, rollup.month): rollup
+            for rollup in locked.order_by("user", "month")
+        }
+        now = timezone.now()
+        for key, rollup in rollups.items():
+            for field, value in deltas[key].items():
+                setattr(rollup, field, getattr(rollup, field) + value)
+            rollup.updated_at = now
+        fields = ["debit_total", "credit_total", "debit_count", "credit_count", "updated_at"]
+        cls.objects.bulk_update(rollups.values(), fields, batch_size=1000)
+
+        missing = [key for key in keys if key not in rollups]
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create(
+                    [
+                        cls(user_id=user_id, month=month, **deltas[user_id, month])
+                        for user_id, month in missing
+                    ],
+                    batch_size=1000,
+                )
+        except models.IntegrityError:
+            return missing
+        return []
+
+
+class BalanceCheckpoint(BaseModel):
+    """
+    A user's balance (credits minus debits) over every transaction dated
+    before ``date``, which is always the first of a month.
+
+    Point-in-time balances start from the nearest checkpoint and only sum the
+    transactions after it. Like the rollups, checkpoints are adjusted inside
+    the transaction that writes the rows.
+    """
+
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.DO_NOTHING, related_name="balance_checkpoints"
+    )
+    date = models.DateField()
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"Checkpoint {self.user_id} - {self.date} - {self.balance}"
+
+    class Meta:
+        verbose_name = "Balance checkpoint"
+        verbose_name_plural = "Balance checkpoints"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "date"], name="checkpoint_user_date_uniq"),
+        ]
+
+    @classmethod
+    def apply(cls, deltas):
+        """
+        Adds rollup deltas to the checkpoints after each month. Checkpoints are
+        month aligned, so a transaction counts towards every checkpoint later
+        than its month.
+
+        Every user and month is covered by one UPDATE: per user, a checkpoint
+        gains the net of all changed months before it.
+        """
+        nets = {}
+        for (user_id, month), delta in deltas.items():
+            net = delta["credit_total"] - delta["debit_total"]
+            if net:
+                nets.setdefault(user_id, {})[month] = net
+
+        whens = []
+        for user_id, months in nets.items():
+            total = sum(months.values())
+            # Latest month first, Case() picks the first match
+            for month in sorted(months, reverse=True):
+                whens.append(When(user_id=user_id, date__gt=month, then=Value(total)))
+                total -= months[month]
+        if not whens:
+            return
+        cls.objects.filter(
+            reduce(
+                operator.or_,
+                (Q(user_id=user_id, date__gt=min(months)) for user_id, months in nets.items()),
+            )
+        ).update(
+            updated_at=timezone.now(),
+            balance=F("balance")
+            + Case(*whens, default=Value(0), output_field=models.DecimalField()),
+        )
+
+
+def apply_ledger(deltas, spends):
+    """
+    Applies collected deltas to the monthly rollups and balance checkpoints,
+    and spends (BudgetSpend.collect()) to the budgets.
+    """
+    MonthlyRollup.apply(deltas)
+    BalanceCheckpoint.apply(deltas)
+    BudgetSpend.apply(spends)
+
+
+class TransactionQuerySet(models.QuerySet):
+    """
+    Keeps monthly rollups, balance checkpoints and budget spends in step with
+    bulk writes.
+
+    bulk_create() expects every object to be inserted, so conflict handling
+    flags are not supported. update() is not tracked, rebuild the rollups with
+    the rebuild_rollups command, then the checkpoints with
+    create_balance_checkpoints --rebuild, after mass updates.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        if kwargs.get("ignore_conflicts") or kwargs.get("update_conflicts"):
+            raise ValueError("Transaction.bulk_create() must insert every object.")
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            apply_ledger(MonthlyRollup.collect(objs), BudgetSpend.collect(objs))
+            # No signals here, bump like invalidate_transaction_cache does
+            for user_id in {obj.user_id for obj in objs}:
+                transaction.on_commit(lambda user_id=user_id: bump_data_version(user_id))
+        return objs
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            deltas = MonthlyRollup.collect_queryset(self, sign=-1)
+            spends = BudgetSpend.collect_queryset(self, sign=-1)
+            result = super().delete()
+            apply_ledger(deltas, spends)
+        return result
+
 
 class Transaction(BaseModel):
     
@@ -27,13 +301,191 @@ class Transaction(BaseModel):
         blank=True,
         related_name="transactions",
     )
+    # Indexed by the (recurrence, date) unique constraint
+    recurrence = models.ForeignKey(
+        "RecurringTransaction",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
+        related_name="transactions",
+    )
+
+    objects = TransactionQuerySet.as_manager()
+
+    LEDGER_FIELDS = ("user", "category", "date", "amount", "transaction_type")
 
     def __str__(self):
         return f"Transaction {self.id} - {self.transaction_type} - {self.amount}"
 
+    def save(self, *args, **kwargs):
+        """
+        Saves the transaction and moves its amount between monthly rollups,
+        balance checkpoints and budget spends.
+        """
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = (
+                    Transaction.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values(*self.LEDGER_FIELDS)
+                    .first()
+                )
+            super().save(*args, **kwargs)
+            deltas = MonthlyRollup.collect([self])
+            spends = BudgetSpend.collect([self])
+            if previous:
+                MonthlyRollup.collect([previous], sign=-1, deltas=deltas)
+                BudgetSpend.collect([previous], sign=-1, deltas=spends)
+            apply_ledger(deltas, spends)
+
+    def delete(self, *args, **kwargs):
+        """
+        Deletes the transaction and removes its amount from the monthly rollup,
+        balance checkpoints and budget spends.
+        """
+        with transaction.atomic():
+            previous = (
+                Transaction.objects.select_for_update()
+                .filter(pk=self.pk)
+                .values(*self.LEDGER_FIELDS)
+                .first()
+            )
+            result = super().delete(*args, **kwargs)
+            if previous:
+                apply_ledger(
+                    MonthlyRollup.collect([previous], sign=-1),
+                    BudgetSpend.collect([previous], sign=-1),
+                )
+        return result
+
     class Meta:
         verbose_name = "Transaction"
         verbose_name_plural = "Transactions"
+        indexes = [
+            # List ordering and keyset pagination
+            models.Index(fields=["user", "-date", "-id"], name="txn_user_date_id_idx"),
+            # Summaries: per type sums over a date range, answered from the index
+            models.Index(
+                fields=["user", "transaction_type", "date"],
+                include=["amount"],
+                name="txn_user_type_date_idx",
+            ),
+            # Category filters in list order, and breakdowns
+            models.Index(
+                fields=["user", "category", "-date", "-id"], name="txn_user_category_date_id_idx"
+            ),
+        ]
+        constraints = [
+            # One transaction per occurrence, includes date so it also holds
+            # on a date partitioned table
+            models.UniqueConstraint(
+                fields=["recurrence", "date"], name="txn_recurrence_date_uniq"
+            ),
+        ]
+
+
+class RecurringTransaction(BaseModel):
+    """
+    A rule that creates the same transaction on a schedule, e.g. rent every month.
+
+    Occurrence n falls n * interval days, weeks, months or years after
+    start_date (month ends are clamped, not carried over). next_due is the
+    next occurrence to create, occurrences the number already created; the
+    generate_recurring_transactions command advances both together with
+    inserting the transactions.
+    """
+
+    FREQUENCY_CHOICES = [
+        ("daily", "Daily"),
+        ("weekly", "Weekly"),
+        ("monthly", "Monthly"),
+        ("yearly", "Yearly"),
+    ]
+
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.DO_NOTHING, related_name="recurring_transactions"
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="recurring_transactions",
+    )
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    description = models.TextField(blank=True, max_length=255)
+    payment_method = models.CharField(max_length=10, choices=Transaction.PAYMENT_METHOD_CHOICES)
+    transaction_type = models.CharField(
+        max_length=6, choices=Transaction.TRANSACTION_TYPE_CHOICES
+    )
+    frequency = models.CharField(max_length=7, choices=FREQUENCY_CHOICES)
+    interval = models.PositiveSmallIntegerField(default=1)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    next_due = models.DateField()
+    occurrences = models.IntegerField(default=0)
+    is_active = models.BooleanField(default=True)
 
+    TEMPLATE_FIELDS = (
+        "user_id",
+        "category_id",
+        "amount",
+        "description",
+        "payment_method",
+        "transaction_type",
+    )
+
+    def __str__(self):
+        return f"Recurring {self.id} - {self.frequency} - {self.amount}"
 
+    class Meta:
+        verbose_name = "Recurring transaction"
+        verbose_name_plural = "Recurring transactions"
+        indexes = [
+            # The generator scans active rules by due date
+            models.Index(
+                fields=["next_due"],
+                condition=models.Q(is_active=True),
+                name="recurring_next_due_idx",
+            ),
+        ]
+
+    def build_transaction(self, date):
+        """
+        Returns the unsaved transaction of the occurrence on date.
+        """
+        return Transaction(
+            recurrence=self,
+            date=date,
+            **{field: getattr(self, field) for field in self.TEMPLATE_FIELDS},
+        )
+
+
+class ImportJob(BaseModel):
+    """
+    Progress of a CSV import. Counters are committed together with each chunk
+    of inserted rows, so an interrupted import resumes after the last chunk.
+    """
+
+    STATUS_CHOICES = [
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+    user = models.ForeignKey(CustomUser, on_delete=models.DO_NOTHING, related_name="import_jobs")
+    source = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="running")
+    options = models.JSONField(default=dict)  # Column map and date format used
+    rows_processed = models.IntegerField(default=0)
+    rows_imported = models.IntegerField(default=0)
+    rows_failed = models.IntegerField(default=0)
+    errors = models.JSONField(default=list)  # First MAX_ERRORS failures
+    elapsed_seconds = models.FloatField(default=0)
+
+    MAX_ERRORS = 100
+
+    def __str__(self):
+        return f"Import {self.id} - {self.source} - {self.status}"
 
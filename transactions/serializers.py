@@ -1,12 +1,90 @@
 from rest_framework import serializers
-from .models import Transaction
+from django.conf import settings
+from base.serializers import ValuesPlan
+from .models import ImportJob, RecurringTransaction, Transaction
+from .utils import reschedule_recurrence
+import uuid
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves primary keys from objects prefetched into the serializer context,
+    falling back to one query per value when nothing was prefetched.
+    """
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get("prefetched", {}).get(self.field_name)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        try:
+            pk = uuid.UUID(str(data))
+        except (TypeError, ValueError, AttributeError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in prefetched:
+            self.fail("does_not_exist", pk_value=data)
+        return prefetched[pk]
+
+
+class TransactionListSerializer(serializers.ListSerializer):
+    """
+    Validates and inserts many transactions at once.
+
+    Related objects of all rows are fetched with one query per field, and rows
+    are validated independently so one bad row does not reject the batch.
+    """
+
+    def prefetch_related_objects(self, rows):
+        """
+        Loads the objects every row refers to into the context, one query per field.
+        """
+        prefetched = {}
+        for name, field in self.child.fields.items():
+            if not isinstance(field, PrefetchedPrimaryKeyRelatedField) or field.read_only:
+                continue
+            pks = set()
+            for row in rows:
+                try:
+                    pks.add(uuid.UUID(str(row[name])))
+                except (KeyError, TypeError, ValueError, AttributeError):
+                    pass
+            prefetched[name] = field.get_queryset().in_bulk(pks)
+        self._context["prefetched"] = prefetched
+
+    def validate_rows(self):
+        """
+        Returns (validated rows, errors) where each error carries the row index.
+        """
+        rows = self.initial_data
+        self.prefetch_related_objects([row for row in rows if isinstance(row, dict)])
+
+        validated, errors = [], []
+        for index, row in enumerate(rows):
+            if not isinstance(row, dict):
+                errors.append(
+                    {"index": index, "errors": {"non_field_errors": ["Expected an object."]}}
+                )
+                continue
+            try:
+                validated.append(self.child.run_validation(row))
+            except serializers.ValidationError as e:
+                errors.append({"index": index, "errors": e.detail})
+        return validated, errors
+
+    def create(self, validated_data, batch_size=None):
+        batch_size = batch_size or settings.TRANSACTION_BULK_BATCH_SIZE
+        return Transaction.objects.bulk_create(
+            [Transaction(**row) for row in validated_data], batch_size=batch_size
+        )
+
 
 class TransactionSerializer(serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
     date = serializers.DateField(required=False)  
     class Meta:
         model = Transaction
         fields = '__all__'
-        read_only_fields = ['id','created_at', 'updated_at']
+        read_only_fields = ['id','created_at', 'updated_at', 'recurrence']
+        list_serializer_class = TransactionListSerializer
 
     
     def validate_amount(self, amount):
@@ -15,4 +93,72 @@ class TransactionSerializer(serializers.ModelSerializer):
         max_amount = 9999999.99
         if amount >= max_amount:
             raise serializers.ValidationError("Amount must be greater than zero")
-        return amount
\ No newline at end of file
+        return amount
+
+
+# Renders list rows from QuerySet.values() exactly like TransactionSerializer
+TRANSACTION_VALUES_PLAN = ValuesPlan(TransactionSerializer)
+
+
+class RunningBalanceSerializer(TransactionSerializer):
+    """
+    A transaction with the balance after it (annotated by get_running_balance_query).
+    """
+
+    balance = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+
+
+RUNNING_BALANCE_VALUES_PLAN = ValuesPlan(RunningBalanceSerializer)
+
+
+class RecurringTransactionSerializer(serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+
+    # Changing these moves next_due to the first occurrence not yet created
+    SCHEDULE_FIELDS = ("frequency", "interval", "start_date", "end_date")
+
+    class Meta:
+        model = RecurringTransaction
+        fields = "__all__"
+        read_only_fields = ["id", "created_at", "updated_at", "next_due", "occurrences"]
+
+    validate_amount = TransactionSerializer.validate_amount
+
+    def validate_interval(self, interval):
+        if interval < 1:
+            raise serializers.ValidationError("Interval must be at least 1")
+        return interval
+
+    def validate(self, attrs):
+        start_date = attrs.get("start_date", getattr(self.instance, "start_date", None))
+        end_date = attrs.get("end_date", getattr(self.instance, "end_date", None))
+        if end_date and start_date and end_date < start_date:
+            raise serializers.ValidationError({"end_date": "End date must not be before start date"})
+        return attrs
+
+    def create(self, validated_data):
+        rule = RecurringTransaction(**validated_data)
+        reschedule_recurrence(rule)
+        rule.save()
+        return rule
+
+    def update(self, instance, validated_data):
+        rescheduled = any(
+            field in validated_data and validated_data[field] != getattr(instance, field)
+            for field in self.SCHEDULE_FIELDS
+        )
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        if rescheduled:
+            reschedule_recurrence(instance)
+        elif instance.end_date and instance.next_due > instance.end_date:
+            instance.is_active = False
+        instance.save()
+        return instance
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        exclude = ["user"]
+        read_only_fields = [field.name for field in ImportJob._meta.fields]
@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from base.cache import bump_data_version
+from .models import Transaction
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def invalidate_transaction_cache(sender, instance, **kwargs):
+    """
+    Bumps the owner's data version once the write commits, so cached counts
+    are not read again. Bumping earlier would let a concurrent reader cache
+    the rows it cannot see yet under the new version.
+    """
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_data_version(user_id))
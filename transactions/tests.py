@@ -1,3 +1,1113 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import unittest
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework.utils.encoders import JSONEncoder
+from base.cache import get_cache_stats, get_data_version
+from base.pagination import CachedCount, EstimatedCount, ExactCount
+from base.testing import APITestCase, create_user
+from categories.models import Category
+from .filters import TransactionFilter
+from .importers import TransactionImporter
+from .serializers import (
+    RUNNING_BALANCE_VALUES_PLAN,
+    TRANSACTION_VALUES_PLAN,
+    RunningBalanceSerializer,
+    TransactionSerializer,
+)
+from .views import TransactionExportView
+from .models import BalanceCheckpoint, ImportJob, MonthlyRollup, RecurringTransaction, Transaction
+from .utils import (
+    generate_recurring_transactions,
+    get_balance,
+    get_category_breakdown,
+    get_running_balance_query,
+)
+
+
+def create_transaction(user, amount="10.00", date=datetime.date(2024, 3, 15), **fields):
+    fields.setdefault("transaction_type", "debit")
+    fields.setdefault("payment_method", "cash")
+    return Transaction.objects.create(user=user, amount=Decimal(amount), date=date, **fields)
+
+
+class CursorPaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        # Several rows per date, so pages split ties on the date
+        for day in range(1, 5):
+            for _ in range(3):
+                create_transaction(self.user, date=datetime.date(2024, 3, day))
+        create_transaction(create_user("other@example.com"))
+        self.expected = list(
+            Transaction.objects.filter(user=self.user)
+            .order_by("-date", "-id")
+            .values_list("id", flat=True)
+        )
+
+    def get_ids(self, response):
+        return [row["id"] for row in response.data["results"]]
+
+    def walk(self, url, direction):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(self.get_ids(response))
+            url = response.data[direction]
+        return pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        pages = self.walk("/transactions/?pagination=cursor&page_size=5", "next")
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+        self.assertEqual([pk for page in pages for pk in page], [str(pk) for pk in self.expected])
+
+    def test_previous_links_walk_back_over_the_same_pages(self):
+        forward = self.walk("/transactions/?pagination=cursor&page_size=5", "next")
+        response = self.client.get("/transactions/?pagination=cursor&page_size=5")
+        last_url = self.client.get(response.data["next"]).data["next"]
+        backward = self.walk(last_url, "previous")
+        self.assertEqual(backward, forward[::-1])
+        self.assertIsNone(response.data["previous"])
+
+    def test_pages_do_not_shift_when_newer_rows_are_added(self):
+        first = self.client.get("/transactions/?pagination=cursor&page_size=5")
+        create_transaction(self.user, date=datetime.date(2024, 3, 31))
+        second = self.client.get(first.data["next"])
+        self.assertEqual(self.get_ids(second), [str(pk) for pk in self.expected[5:10]])
+
+    def test_count_is_only_computed_on_request(self):
+        response = self.client.get("/transactions/?pagination=cursor")
+        self.assertIsNone(response.data["count"])
+        response = self.client.get("/transactions/?pagination=cursor&count=true")
+        self.assertEqual(response.data["count"], 12)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/transactions/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
+
+
+class CountStrategyTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        for day in range(1, 4):
+            create_transaction(self.user, date=datetime.date(2024, 3, day))
+
+    def get_count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        counts = [query for query in queries if "COUNT(" in query["sql"].upper()]
+        return response, len(counts)
+
+    def test_list_count_is_cached_until_the_user_writes(self):
+        response, counted = self.get_count_queries("/transactions/")
+        self.assertEqual((response.data["count"], response.data["count_strategy"]), (3, "cached"))
+        self.assertEqual(counted, 1)
+
+        response, counted = self.get_count_queries("/transactions/")
+        self.assertEqual((response.data["count"], counted), (3, 0))
+
+        # The version is bumped once the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            create_transaction(self.user)
+        response, counted = self.get_count_queries("/transactions/")
+        self.assertEqual((response.data["count"], counted), (4, 1))
+
+    def test_version_is_bumped_after_the_write_commits(self):
+        version = get_data_version(self.user.id)
+        writes = (
+            lambda: create_transaction(self.user),
+            lambda: Transaction.objects.bulk_create(
+                [Transaction(user=self.user, amount=Decimal("1.00"), transaction_type="debit")]
+            ),
+        )
+        for write in writes:
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+                # A reader must not pair the new version with uncommitted rows
+                self.assertEqual(get_data_version(self.user.id), version)
+            self.assertNotEqual(get_data_version(self.user.id), version)
+            version = get_data_version(self.user.id)
+
+    def test_cached_counts_are_per_filter(self):
+        create_transaction(self.user, transaction_type="credit")
+        self.assertEqual(self.client.get("/transactions/").data["count"], 4)
+        response = self.client.get("/transactions/?transaction_type=credit")
+        self.assertEqual(response.data["count"], 1)
+
+    def test_strategies_agree_on_small_querysets(self):
+        request = APIRequestFactory().get("/")
+        request.user = self.user
+        queryset = Transaction.objects.filter(user=self.user)
+        self.assertEqual(ExactCount().count(queryset, request), (3, "exact"))
+        self.assertEqual(CachedCount().count(queryset, request), (3, "cached"))
+        # Below the threshold the estimate is replaced by an exact count
+        self.assertEqual(EstimatedCount().count(queryset, request), (3, "exact"))
+
+    def test_estimate_above_threshold(self):
+        request = APIRequestFactory().get("/")
+        request.user = self.user
+        queryset = Transaction.objects.filter(user=self.user)
+        count, name = EstimatedCount(threshold=0).count(queryset, request)
+        if connection.vendor == "postgresql":
+            self.assertEqual(name, "estimated")
+            self.assertGreaterEqual(count, 0)
+        else:
+            self.assertEqual((count, name), (3, "exact"))
+
+
+class TransactionFilterTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.food = Category.objects.create(name="Food", user=self.user)
+        self.rows = {
+            "lunch": create_transaction(self.user, amount="12.00", description="Lunch at work",
+                                        category=self.food, date=datetime.date(2024, 3, 4)),
+            "salary": create_transaction(self.user, amount="5000.00", description="March salary",
+                                         transaction_type="credit", payment_method="online",
+                                         date=datetime.date(2024, 3, 1)),
+            "taxi": create_transaction(self.user, amount="40.00", description="Taxi ride home",
+                                       date=datetime.date(2023, 3, 20)),
+        }
+        create_transaction(create_user("other@example.com"), description="Lunch at work")
+
+    def get_names(self, query):
+        response = self.client.get(f"/transactions/?{query}")
+        self.assertEqual(response.status_code, 200, response.data)
+        ids = {row["id"] for row in response.data["results"]}
+        return sorted(name for name, row in self.rows.items() if str(row.id) in ids)
+
+    def test_filters(self):
+        self.assertEqual(self.get_names("from=2024-03-02&to=2024-03-31"), ["lunch"])
+        self.assertEqual(self.get_names("year=2024&month=3"), ["lunch", "salary"])
+        self.assertEqual(self.get_names("year=2023"), ["taxi"])
+        self.assertEqual(self.get_names("amount_min=20&amount_max=100"), ["taxi"])
+        self.assertEqual(self.get_names("transaction_type=credit"), ["salary"])
+        self.assertEqual(self.get_names("payment_method=cash"), ["lunch", "taxi"])
+        self.assertEqual(self.get_names(f"category={self.food.id}"), ["lunch"])
+        self.assertEqual(self.get_names(f"category=none,{self.food.id}"), ["lunch", "salary", "taxi"])
+        self.assertEqual(self.get_names("search=lunch"), ["lunch"])
+        self.assertEqual(self.get_names("search=sal"), ["salary"])
+
+    def test_unknown_and_invalid_params_are_rejected(self):
+        for query, param in (
+            ("date__month=3", "date__month"),
+            ("user=someone", "user"),
+            ("category__name=Food", "category__name"),
+            ("from=2024-02-30", "from"),
+            ("month=13", "month"),
+            ("amount_min=lots", "amount_min"),
+            ("transaction_type=refund", "transaction_type"),
+            ("category=food", "category"),
+            ("search=ab", "search"),
+            # Ranked results cannot be paged by (date, id)
+            ("search=lunch&pagination=cursor", "search"),
+        ):
+            for url in ("/transactions/", "/transactions/async/"):
+                response = self.client.get(f"{url}?{query}")
+                self.assertEqual(response.status_code, 400, query)
+                self.assertIn(param, response.data)
+
+    def test_response_params_are_not_filters(self):
+        self.assertEqual(
+            self.get_names("page=1&page_size=10&count=true&pagination=cursor"),
+            ["lunch", "salary", "taxi"],
+        )
+
+    def test_equivalent_filters_share_a_signature(self):
+        first = TransactionFilter(
+            {"year": "2024", "month": "3", "category": f"{self.food.id},none", "search": "Lunch  At"}
+        )
+        second = TransactionFilter(
+            {"from": "2024-03-01", "to": "2024-03-31", "category": f"NONE,{self.food.id}", "search": "lunch at"}
+        )
+        self.assertEqual(first.signature, second.signature)
+        self.assertNotEqual(first.signature, TransactionFilter({"year": "2024"}).signature)
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.food = Category.objects.create(name="Food", user=self.user)
+        self.lunch = create_transaction(self.user, amount="12.00", description="Lunch, at work",
+                                        category=self.food, date=datetime.date(2024, 3, 4))
+        self.salary = create_transaction(self.user, amount="5000.00", transaction_type="credit",
+                                         payment_method="online", date=datetime.date(2024, 3, 1))
+        self.taxi = create_transaction(self.user, amount="40.00", date=datetime.date(2023, 3, 20))
+        create_transaction(create_user("other@example.com"), description="Not mine")
+
+    def export(self, query=""):
+        response = self.client.get(f"/transactions/export/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return response, list(response.streaming_content)
+
+    def test_csv(self):
+        response, chunks = self.export()
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="transactions.csv"')
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+        self.assertEqual(rows[0], TransactionExportView.fields)
+        self.assertEqual(
+            [row[0] for row in rows[1:]],
+            [str(row.id) for row in (self.lunch, self.salary, self.taxi)],
+        )
+        self.assertEqual(
+            rows[1][1:7],
+            ["2024-03-04", "12.00", "Lunch, at work", "cash", "debit", str(self.food.id)],
+        )
+        self.assertEqual(rows[2][6], "")
+
+    def test_ndjson(self):
+        response, chunks = self.export("export_format=ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(list(lines[0]), TransactionExportView.fields)
+        expected = json.loads(json.dumps(TransactionSerializer(self.lunch).data, cls=JSONEncoder))
+        self.assertEqual(lines[0], {field: expected[field] for field in TransactionExportView.fields})
+
+    def test_filters_apply(self):
+        _, chunks = self.export("export_format=ndjson&year=2024&transaction_type=debit")
+        self.assertEqual(
+            [json.loads(line)["id"] for line in b"".join(chunks).decode().splitlines()],
+            [str(self.lunch.id)],
+        )
+        self.assertEqual(self.client.get("/transactions/export/?month=13").status_code, 400)
+
+    def test_invalid_format(self):
+        response = self.client.get("/transactions/export/?export_format=xml")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("export_format", response.data["error"])
+
+    def test_rows_are_sent_in_chunks(self):
+        with mock.patch.object(TransactionExportView, "chunk_size", 2):
+            for export_format in ("csv", "ndjson"):
+                _, chunks = self.export(f"export_format={export_format}")
+                self.assertEqual(len(chunks), 2, export_format)
+
+
+class ValuesPlanTests(APITestCase):
+    """
+    The values() plans must render exactly what the serializers render.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        food = Category.objects.create(name="Food", user=self.user)
+        rule = RecurringTransaction.objects.create(
+            user=self.user, category=food, amount=Decimal("1200.00"), payment_method="online",
+            transaction_type="debit", frequency="monthly", start_date=datetime.date(2024, 3, 1),
+            next_due=datetime.date(2024, 4, 1),
+        )
+        create_transaction(self.user, amount="1200.00", category=food, recurrence=rule,
+                           description="Rent", date=datetime.date(2024, 3, 1))
+        create_transaction(self.user, amount="0.05", date=datetime.date(2024, 3, 2))
+        create_transaction(self.user, amount="9999999.99", transaction_type="credit",
+                           payment_method="online", description="", date=datetime.date(2024, 3, 2))
+
+    def assertSameOutput(self, plan, serializer_class, queryset):
+        expected = [dict(row) for row in serializer_class(queryset, many=True).data]
+        rows = plan.convert(queryset.values(*plan.fields))
+        self.assertEqual(rows, expected)
+        self.assertEqual([list(row) for row in rows], [list(row) for row in expected])
+
+    def test_transactions(self):
+        queryset = Transaction.objects.filter(user=self.user).order_by("date", "id")
+        self.assertSameOutput(TRANSACTION_VALUES_PLAN, TransactionSerializer, queryset)
+        row = TRANSACTION_VALUES_PLAN.convert(queryset.values(*TRANSACTION_VALUES_PLAN.fields))[0]
+        self.assertEqual((row["amount"], row["date"]), ("1200.00", "2024-03-01"))
+
+    def test_running_balances(self):
+        queryset = get_running_balance_query(
+            self.user, datetime.date(2024, 3, 1), datetime.date(2024, 3, 31), Decimal("-10.50")
+        )
+        self.assertSameOutput(RUNNING_BALANCE_VALUES_PLAN, RunningBalanceSerializer, queryset)
+
+
+class BulkCreateTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(name="Food", user=self.user)
+
+    def make_rows(self, count):
+        return [
+            {
+                "amount": f"{index + 1}.00",
+                "date": f"2024-03-{index % 28 + 1:02d}",
+                "payment_method": "cash",
+                "transaction_type": "debit",
+                "category": str(self.category.id),
+            }
+            for index in range(count)
+        ]
+
+    def post(self, rows, query=""):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f"/transactions/{query}", rows, format="json")
+        return response, queries
+
+    def test_creates_every_row_in_constant_queries(self):
+        # The first write of a month creates its rollup
+        self.post(self.make_rows(1))
+        response, few = self.post(self.make_rows(3))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["created"]), 3)
+        self.assertEqual(response.data["errors"], [])
+
+        response, many = self.post(self.make_rows(30))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 34)
+        rollup = MonthlyRollup.objects.get(user=self.user)
+        self.assertEqual(rollup.debit_count, 34)
+
+    def test_rows_belong_to_the_requesting_user(self):
+        other = create_user("other@example.com")
+        rows = self.make_rows(2)
+        rows[0]["user"] = str(other.id)
+        response, _ = self.post(rows)
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(Transaction.objects.filter(user=other).exists())
+
+    def test_invalid_rows_are_reported_by_index(self):
+        rows = self.make_rows(4)
+        rows[1]["amount"] = "-5.00"
+        rows[3]["category"] = "00000000-0000-0000-0000-000000000000"
+        rows.append("not an object")
+        response, _ = self.post(rows)
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [1, 3, 4])
+        self.assertIn("amount", response.data["errors"][0]["errors"])
+        self.assertIn("category", response.data["errors"][1]["errors"])
+        self.assertEqual(len(response.data["created"]), 2)
+        self.assertEqual(Transaction.objects.count(), 2)
+
+        response, _ = self.post([rows[1]])
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_size(self):
+        response, queries = self.post(self.make_rows(5), "?batch_size=2")
+        self.assertEqual(response.status_code, 201)
+        inserts = [query for query in queries if query["sql"].startswith('INSERT INTO "transactions_transaction"')]
+        self.assertEqual(len(inserts), 3)
+
+        for value in ("0", "abc"):
+            response, _ = self.post(self.make_rows(1), f"?batch_size={value}")
+            self.assertEqual(response.status_code, 400)
+
+    @override_settings(TRANSACTION_BULK_MAX_ROWS=3)
+    def test_row_limit(self):
+        response, _ = self.post(self.make_rows(4))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Transaction.objects.exists())
+
+
+class ImportTests(APITestCase):
+    csv = (
+        "Date,Amount,Narration,category\n"
+        "05/03/2024,-120.50,Groceries,food\n"
+        "06/03/2024,\"2,000.00\",Salary,\n"
+        "07/03/2024,abc,Broken amount,\n"
+        "31/02/2024,-10.00,Broken date,\n"
+        "08/03/2024,-15.00,Unknown category,travel\n"
+        "09/03/2024,-30.00,Dinner,food\n"
+    )
+    columns = '{"date": "Date", "amount": "Amount", "description": "Narration"}'
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.food = Category.objects.create(name="Food", user=self.user, slug="food")
+
+    def upload(self, content, **data):
+        data.setdefault("columns", self.columns)
+        data.setdefault("date_format", "%d/%m/%Y")
+        file = SimpleUploadedFile("export.csv", content, content_type="text/csv")
+        return self.client.post("/transactions/import/", {"file": file, **data}, format="multipart")
+
+    def test_import(self):
+        response = self.upload(self.csv.encode())
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            (response.data["status"], response.data["rows_imported"], response.data["rows_failed"]),
+            ("completed", 3, 3),
+        )
+        self.assertEqual([error["line"] for error in response.data["errors"]], [4, 5, 6])
+
+        rows = list(
+            Transaction.objects.filter(user=self.user)
+            .order_by("date")
+            .values_list("amount", "transaction_type", "category", "description")
+        )
+        self.assertEqual(rows, [
+            (Decimal("120.50"), "debit", self.food.id, "Groceries"),
+            (Decimal("2000.00"), "credit", None, "Salary"),
+            (Decimal("30.00"), "debit", self.food.id, "Dinner"),
+        ])
+        self.assertEqual(MonthlyRollup.objects.get(user=self.user).debit_total, Decimal("150.50"))
+
+        response = self.client.get(f"/transactions/import/{response.data['id']}/")
+        self.assertEqual(response.data["rows_processed"], 6)
+
+    def test_resume_imports_every_row_once(self):
+        def crash_after_first_chunk(job, throughput):
+            raise RuntimeError("worker died")
+
+        importer = TransactionImporter.start(
+            self.user, "export.csv", columns={"date": "Date", "amount": "Amount"},
+            date_format="%d/%m/%Y", chunk_size=2, progress=crash_after_first_chunk,
+        )
+        with self.assertRaises(RuntimeError):
+            importer.run(io.StringIO(self.csv))
+        job = ImportJob.objects.get(id=importer.job.id)
+        self.assertEqual((job.status, job.rows_processed), ("failed", 2))
+
+        job = TransactionImporter(job, chunk_size=2).run(io.StringIO(self.csv))
+        self.assertEqual((job.status, job.rows_processed, job.rows_imported), ("completed", 6, 3))
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 3)
+
+    def test_invalid_uploads(self):
+        self.assertEqual(self.client.post("/transactions/import/", {}, format="multipart").status_code, 400)
+        self.assertEqual(self.upload(self.csv.encode(), columns='{"nope": "x"}').status_code, 400)
+        response = self.upload("date,amount\n2024-03-01,caf\xe9\n".encode("latin-1"), columns="{}")
+        self.assertEqual(response.status_code, 400)
+
+        other = create_user("other@example.com")
+        job = ImportJob.objects.create(user=other, source="export.csv")
+        self.assertEqual(self.client.get(f"/transactions/import/{job.id}/").status_code, 404)
+        self.assertEqual(self.upload(self.csv.encode(), job=str(job.id)).status_code, 404)
+
+
+class MonthlyRollupTests(APITestCase):
+    fields = ("debit_total", "credit_total", "debit_count", "credit_count")
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def assertRollupsMatch(self):
+        expected = MonthlyRollup.collect_queryset(Transaction.objects.all())
+        stored = {
+            (row["user"], row["month"]): {field: row[field] for field in self.fields}
+            for row in MonthlyRollup.objects.values("user", "month", *self.fields)
+            if any(row[field] for field in self.fields)
+        }
+        self.assertEqual(stored, expected)
+
+    def test_rollups_follow_saves_and_deletes(self):
+        debit = create_transaction(self.user, amount="12.50")
+        create_transaction(self.user, amount="100.00", transaction_type="credit")
+        self.assertRollupsMatch()
+
+        # Moving a row to another month and type updates both months
+        debit.date = datetime.date(2024, 4, 2)
+        debit.transaction_type = "credit"
+        debit.amount = Decimal("7.25")
+        debit.save()
+        self.assertRollupsMatch()
+
+        debit.delete()
+        self.assertRollupsMatch()
+
+    def test_rollups_follow_bulk_writes(self):
+        other = create_user("other@example.com")
+        create_transaction(self.user, date=datetime.date(2024, 1, 10))
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=user,
+                amount=Decimal(f"{index}.10"),
+                date=datetime.date(2024, index % 12 + 1, 5),
+                transaction_type="credit" if index % 3 else "debit",
+                payment_method="cash",
+            )
+            for index in range(40)
+            for user in (self.user, other)
+        ])
+        self.assertRollupsMatch()
+
+        Transaction.objects.filter(user=self.user, date__month__in=[2, 3, 4]).delete()
+        self.assertRollupsMatch()
+
+    def test_rebuild_rollups_repairs_untracked_updates(self):
+        create_transaction(self.user)
+        call_command("rebuild_rollups", verify=True, stdout=io.StringIO())
+
+        # update() is not tracked
+        Transaction.objects.filter(user=self.user).update(amount=Decimal("99.00"))
+        with self.assertRaises(CommandError):
+            call_command("rebuild_rollups", verify=True, stdout=io.StringIO())
+
+        call_command("rebuild_rollups", stdout=io.StringIO())
+        self.assertRollupsMatch()
+
+    def test_month_summary_from_rollups_matches_the_transactions(self):
+        create_transaction(self.user, amount="30.00")
+        create_transaction(self.user, amount="5.00", date=datetime.date(2024, 2, 29))
+        create_transaction(self.user, amount="80.00", transaction_type="credit")
+        create_transaction(create_user("other@example.com"), amount="999.00")
+
+        response = self.client.get("/transactions/summary/?year=2024&month=3&compare=previous")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_transactions"], 2)
+        self.assertEqual(response.data["total_expense"], Decimal("30.00"))
+        self.assertEqual(response.data["total_income"], Decimal("80.00"))
+        self.assertEqual(response.data["net_amount"], Decimal("45.00"))
+        self.assertEqual(response.data["comparison"]["total_expense"], Decimal("5.00"))
+
+        # An unaligned range is answered from the transactions, with the same totals
+        response = self.client.get("/transactions/summary/?from=2024-03-01&to=2024-03-30")
+        self.assertEqual(response.data["total_expense"], Decimal("30.00"))
+        self.assertEqual(response.data["net_amount"], Decimal("45.00"))
+
+
+class ResponseCacheTests(APITestCase):
+    url = "/transactions/summary/?year=2024&month=3"
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.other = create_user("other@example.com")
+        create_transaction(self.user, amount="30.00")
+        create_transaction(self.other, amount="5.00")
+
+    def get(self, user, url=None):
+        self.client.force_authenticate(user)
+        response = self.client.get(url or self.url)
+        self.assertEqual(response.status_code, 200)
+        return response["X-Cache"], response.data["total_expense"]
+
+    def test_miss_then_hit(self):
+        self.assertEqual(self.get(self.user), ("MISS", Decimal("30.00")))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(self.user), ("HIT", Decimal("30.00")))
+        # Different parameters are cached apart, in any order
+        self.assertEqual(self.get(self.user, "/transactions/summary/?month=3&year=2024")[0], "HIT")
+        self.assertEqual(self.get(self.user, "/transactions/summary/?year=2024")[0], "MISS")
+        async_url = "/transactions/async/summary/?year=2024&month=3"
+        self.assertEqual(self.get(self.user, async_url), ("MISS", Decimal("30.00")))
+        self.assertEqual(self.get(self.user, async_url), ("HIT", Decimal("30.00")))
+
+    def test_writes_invalidate_their_users_entries(self):
+        self.get(self.user)
+        self.get(self.other)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_transaction(self.user, amount="12.00")
+        self.assertEqual(self.get(self.user), ("MISS", Decimal("42.00")))
+        self.assertEqual(self.get(self.other), ("HIT", Decimal("5.00")))
+
+    def test_entries_are_per_user(self):
+        self.assertEqual(self.get(self.user), ("MISS", Decimal("30.00")))
+        self.assertEqual(self.get(self.other), ("MISS", Decimal("5.00")))
+        self.assertEqual(self.get(self.other), ("HIT", Decimal("5.00")))
+
+    def test_hits_and_misses_are_counted(self):
+        call_command("cache_stats", "--reset", stdout=io.StringIO())
+        for _ in range(3):
+            self.get(self.user)
+        stats = get_cache_stats()["TransactionSummaryView"]
+        self.assertEqual(stats, {"hits": 2, "misses": 1, "hit_rate": 0.6667})
+
+        output = io.StringIO()
+        call_command("cache_stats", stdout=output)
+        self.assertIn(
+            "TransactionSummaryView: 2 hit(s), 1 miss(es), hit rate 66.7%", output.getvalue()
+        )
+
+
+class SummaryPeriodTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        create_transaction(self.user, amount="20.00", date=datetime.date(2023, 3, 10))
+        create_transaction(self.user, amount="30.00", date=datetime.date(2024, 3, 10))
+
+    def test_year_comparison(self):
+        response = self.client.get("/transactions/summary/?year=2024&month=3&compare=year")
+        self.assertEqual(response.data["total_expense"], Decimal("30.00"))
+        self.assertEqual(response.data["comparison"]["month"], "March")
+        self.assertEqual(response.data["comparison"]["total_expense"], Decimal("20.00"))
+        self.assertEqual(response.data["comparison"]["change"]["total_expense"], Decimal("10.00"))
+
+    def test_invalid_periods(self):
+        for query in (
+            "month=13",
+            "year=abc",
+            "from=2024-03-10&to=2024-03-01",
+            "from=2024-02-30",
+            "compare=next",
+            "to=2024-03-01&compare=previous",
+            # The comparison period would start before year 1
+            "from=0001-01-05&to=0001-02-01&compare=previous",
+        ):
+            response = self.client.get(f"/transactions/summary/?{query}")
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn("error", response.data)
+
+
+class CategorySummaryTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.other = create_user("other@example.com")
+        self.food = Category.objects.create(name="Food", user=self.user)
+        self.rent = Category.objects.create(name="Rent", user=self.user)
+        self.travel = Category.objects.create(name="Travel", user=None)
+        self.old = Category.objects.create(name="Old", user=self.user, is_active=False)
+        Category.objects.create(name="Hidden", user=self.user, is_active=False)
+        Category.objects.create(name="Theirs", user=self.other)
+
+        create_transaction(self.user, amount="30.00", category=self.food)
+        create_transaction(self.user, amount="10.00", category=self.food)
+        create_transaction(self.user, amount="5.00", category=self.old)
+        create_transaction(self.user, amount="100.00", transaction_type="credit")
+        create_transaction(self.user, amount="99.00", category=self.food, date=datetime.date(2024, 4, 1))
+        # Global categories are joined on the user's transactions only
+        create_transaction(self.other, amount="500.00", category=self.travel)
+
+    def test_lists_every_category(self):
+        response = self.client.get("/transactions/summary/categories/?year=2024&month=3")
+        self.assertEqual(response.status_code, 200)
+        rows = {
+            row["name"]: (row["total_transactions"], row["total_expense"], row["total_income"])
+            for row in response.data["categories"]
+        }
+        self.assertEqual(rows, {
+            "Food": (2, Decimal("40.00"), 0),
+            "Old": (1, Decimal("5.00"), 0),
+            "Rent": (0, 0, 0),
+            "Travel": (0, 0, 0),
+            "Uncategorized": (1, 0, Decimal("100.00")),
+        })
+        self.assertEqual(
+            [row["name"] for row in response.data["categories"]][:2], ["Food", "Old"]
+        )
+        self.assertEqual(response.data["total_expense"], Decimal("45.00"))
+        self.assertEqual(response.data["total_income"], Decimal("100.00"))
+        self.assertEqual(response.data["categories"][0]["expense_share"], Decimal("88.89"))
+
+    def test_totals_match_the_summary(self):
+        # The serializer accepts any category, even another user's
+        theirs = Category.objects.get(name="Theirs")
+        create_transaction(self.user, amount="7.00", category=theirs)
+        with self.assertNumQueries(2):
+            rows = get_category_breakdown(self.user, datetime.date(2024, 3, 1), datetime.date(2024, 3, 31))
+        self.assertEqual([row["name"] for row in rows][:3], ["Food", "Theirs", "Old"])
+
+        url = "?year=2024&month=3"
+        categories = self.client.get(f"/transactions/summary/categories/{url}").data
+        summary = self.client.get(f"/transactions/summary/{url}").data
+        self.assertEqual(categories["total_expense"], Decimal("52.00"))
+        self.assertEqual(
+            (categories["total_expense"], categories["total_income"]),
+            (summary["total_expense"], summary["total_income"]),
+        )
+
+    def test_top_transactions(self):
+        response = self.client.get("/transactions/summary/categories/?year=2024&month=3&top=1")
+        rows = {row["name"]: row["top_transactions"] for row in response.data["categories"]}
+        self.assertEqual([row["amount"] for row in rows["Food"]], [Decimal("30.00")])
+        self.assertEqual(rows["Rent"], [])
+        self.assertEqual(
+            self.client.get("/transactions/summary/categories/?top=21").status_code, 400
+        )
+
+
+class SeriesTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        create_transaction(self.user, amount="10.00", date=datetime.date(2024, 3, 4))
+        create_transaction(self.user, amount="5.00", date=datetime.date(2024, 3, 6))
+        create_transaction(self.user, amount="70.00", date=datetime.date(2024, 3, 20),
+                           transaction_type="credit")
+
+    def get_series(self, query):
+        response = self.client.get(f"/transactions/series/?{query}")
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_buckets_include_empty_ones(self):
+        series = self.get_series("interval=week&from=2024-03-05&to=2024-03-20")
+        self.assertEqual(
+            series["buckets"],
+            [datetime.date(2024, 3, 4), datetime.date(2024, 3, 11), datetime.date(2024, 3, 18)],
+        )
+        self.assertEqual(series["debit"], [Decimal("15.00"), 0, 0])
+        self.assertEqual(series["credit_count"], [0, 0, 1])
+
+        # Month buckets are read from the rollups
+        series = self.get_series("interval=month&from=2024-02-10&to=2024-03-10")
+        self.assertEqual(series["debit"], [0, Decimal("15.00")])
+        self.assertEqual(series["credit"], [0, Decimal("70.00")])
+
+    def test_ranges_at_the_ends_of_the_calendar(self):
+        series = self.get_series("from=9999-12-01&to=9999-12-31&interval=day")
+        self.assertEqual(len(series["buckets"]), 31)
+        series = self.get_series("to=9999-12-31&interval=year")
+        self.assertEqual(series["buckets"][-1], datetime.date(9999, 1, 1))
+        series = self.get_series("to=0001-01-05&interval=day")
+        self.assertEqual(series["buckets"][0], datetime.date(1, 1, 1))
+
+    def test_invalid_series(self):
+        for query in ("interval=hour", "from=2024-03-10&to=2024-03-01", "interval=day&from=2000-01-01"):
+            response = self.client.get(f"/transactions/series/?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+
+class BalanceTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.other = create_user("other@example.com")
+        for index in range(30):
+            create_transaction(
+                self.user,
+                amount=f"{index + 1}.00",
+                date=datetime.date(2024, index % 6 + 1, index % 28 + 1),
+                transaction_type="credit" if index % 3 == 0 else "debit",
+            )
+        create_transaction(self.other, amount="500.00", transaction_type="credit")
+
+    def brute_force_balance(self, as_of):
+        balance = Decimal(0)
+        for amount, transaction_type in Transaction.objects.filter(
+            user=self.user, date__lte=as_of
+        ).values_list("amount", "transaction_type"):
+            balance += amount if transaction_type == "credit" else -amount
+        return balance
+
+    def assertBalancesMatch(self):
+        day = datetime.date(2023, 12, 30)
+        while day < datetime.date(2024, 8, 3):
+            self.assertEqual(get_balance(self.user, day)[0], self.brute_force_balance(day), day)
+            day += datetime.timedelta(days=3)
+
+    def test_balance_with_and_without_checkpoints(self):
+        self.assertBalancesMatch()
+        call_command("create_balance_checkpoints", stdout=io.StringIO())
+        self.assertTrue(BalanceCheckpoint.objects.filter(user=self.user).exists())
+        self.assertEqual(get_balance(self.user, datetime.date(2024, 3, 31))[1], datetime.date(2024, 4, 1))
+        self.assertBalancesMatch()
+
+    def test_checkpoints_follow_writes(self):
+        call_command("create_balance_checkpoints", stdout=io.StringIO())
+        transaction = create_transaction(self.user, amount="42.00", date=datetime.date(2024, 2, 10))
+        self.assertBalancesMatch()
+        transaction.date = datetime.date(2024, 5, 1)
+        transaction.save()
+        self.assertBalancesMatch()
+
+        # Many months of several users are moved by one update
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=user,
+                amount=Decimal("3.00"),
+                date=datetime.date(2024, month, 9),
+                transaction_type="credit" if month % 2 else "debit",
+                payment_method="online",
+            )
+            for month in range(1, 7)
+            for user in (self.user, self.other)
+        ])
+        self.assertBalancesMatch()
+        Transaction.objects.filter(user=self.user, date__month__in=[1, 4]).delete()
+        self.assertBalancesMatch()
+
+        stdout = io.StringIO()
+        call_command("create_balance_checkpoints", rebuild=True, stdout=stdout)
+        self.assertIn("corrected 0", stdout.getvalue())
+
+    def test_balance_endpoint(self):
+        call_command("create_balance_checkpoints", stdout=io.StringIO())
+        response = self.client.get("/transactions/balance/?date=2024-03-20")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["balance"], self.brute_force_balance(datetime.date(2024, 3, 20)))
+        self.assertEqual(response.data["checkpoint"], datetime.date(2024, 3, 1))
+
+        for value in ("9999-12-31", "2024-13-01"):
+            response = self.client.get(f"/transactions/balance/?date={value}")
+            self.assertEqual(response.status_code, 400)
+
+    def test_running_balance_follows_the_transactions(self):
+        call_command("create_balance_checkpoints", stdout=io.StringIO())
+        url = "/transactions/balance/running/?year=2024&month=3"
+        opening = self.brute_force_balance(datetime.date(2024, 2, 29))
+        balance, rows = opening, []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.data["opening_balance"], opening)
+            rows.extend(response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(len(rows), Transaction.objects.filter(user=self.user, date__month=3).count())
+        for row in rows:
+            amount = Decimal(row["amount"])
+            balance += amount if row["transaction_type"] == "credit" else -amount
+            self.assertEqual(Decimal(row["balance"]), balance)
+
+
+class RecurringTransactionTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def create_rule(self, **fields):
+        data = {
+            "amount": "1200.00",
+            "payment_method": "online",
+            "transaction_type": "debit",
+            "frequency": "monthly",
+            "start_date": "2024-01-31",
+            **fields,
+        }
+        response = self.client.post("/transactions/recurring/", data, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        return RecurringTransaction.objects.get(id=response.data["id"])
+
+    def get_dates(self, rule):
+        return list(
+            Transaction.objects.filter(recurrence=rule).order_by("date").values_list("date", flat=True)
+        )
+
+    def test_catches_up_once(self):
+        rule = self.create_rule()
+        self.assertEqual(generate_recurring_transactions(datetime.date(2024, 5, 15)), (1, 4))
+        # Month ends are clamped, not carried over
+        self.assertEqual(
+            self.get_dates(rule),
+            [datetime.date(2024, 1, 31), datetime.date(2024, 2, 29),
+             datetime.date(2024, 3, 31), datetime.date(2024, 4, 30)],
+        )
+        rule.refresh_from_db()
+        self.assertEqual((rule.next_due, rule.occurrences), (datetime.date(2024, 5, 31), 4))
+
+        self.assertEqual(generate_recurring_transactions(datetime.date(2024, 5, 15)), (0, 0))
+        self.assertEqual(len(self.get_dates(rule)), 4)
+
+    def test_batches_cover_every_rule(self):
+        rules = [self.create_rule(frequency="weekly", start_date=f"2024-03-0{day}") for day in range(4, 9)]
+        self.assertEqual(generate_recurring_transactions(datetime.date(2024, 3, 31), batch_size=2), (5, 20))
+        for rule in rules:
+            self.assertEqual(len(self.get_dates(rule)), 4)
+
+    def test_rule_ends_after_end_date(self):
+        rule = self.create_rule(frequency="weekly", start_date="2024-02-01", end_date="2024-02-20")
+        generate_recurring_transactions(datetime.date(2024, 12, 31))
+        rule.refresh_from_db()
+        self.assertEqual(len(self.get_dates(rule)), 3)
+        self.assertFalse(rule.is_active)
+
+    def test_paused_rule_stays_paused(self):
+        rule = self.create_rule(is_active=False)
+        self.assertFalse(rule.is_active)
+        self.assertEqual(generate_recurring_transactions(datetime.date(2024, 5, 15)), (0, 0))
+
+        # Changing the schedule must not resume it
+        response = self.client.put(f"/transactions/recurring/{rule.id}/", {"interval": 2}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertFalse(response.data["is_active"])
+        self.assertEqual(generate_recurring_transactions(datetime.date(2024, 5, 15)), (0, 0))
+
+    def test_schedule_change_does_not_repeat_occurrences(self):
+        rule = self.create_rule(start_date="2024-01-10")
+        generate_recurring_transactions(datetime.date(2024, 3, 15))
+        response = self.client.put(
+            f"/transactions/recurring/{rule.id}/", {"frequency": "weekly"}, format="json"
+        )
+        self.assertEqual(response.data["next_due"], "2024-03-13")
+        generate_recurring_transactions(datetime.date(2024, 3, 31))
+        dates = self.get_dates(rule)
+        self.assertEqual(len(dates), len(set(dates)))
+        self.assertEqual(dates[3:], [datetime.date(2024, 3, day) for day in (13, 20, 27)])
+
+
+class TransactionConditionalGetTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.transaction = create_transaction(self.user)
+
+    def get(self, etag=None, url="/transactions/"):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get(url, headers=headers)
+
+    def test_unchanged_list_is_not_modified(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(response["ETag"]).status_code, 304)
+        # The validator varies with the query string
+        self.assertEqual(self.get(response["ETag"], "/transactions/?year=2024").status_code, 200)
+
+    def test_writes_change_the_etag(self):
+        writes = (
+            ("post", "/transactions/", {"amount": "5.00", "payment_method": "cash",
+                                        "transaction_type": "debit", "date": "2024-03-01"}),
+            ("put", f"/transactions/{self.transaction.id}/", {"amount": "7.00"}),
+            ("delete", f"/transactions/{self.transaction.id}/", None),
+        )
+        etag = self.get()["ETag"]
+        for method, url, data in writes:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = getattr(self.client, method)(url, data, format="json")
+            self.assertLess(response.status_code, 300, method)
+            response = self.get(etag)
+            self.assertEqual(response.status_code, 200, method)
+            self.assertNotEqual(response["ETag"], etag)
+            etag = response["ETag"]
+
+
+class AsyncTransactionViewTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.transaction = create_transaction(self.user)
+
+    def get(self, url, etag=None):
+        headers = {"If-None-Match": etag} if etag else {}
+        # The ETag must come from the async cache API, not from the event loop
+        with mock.patch("base.cache.get_data_version", side_effect=AssertionError("sync cache read")):
+            return self.client.get(url, headers=headers)
+
+    def test_unchanged_data_is_not_modified(self):
+        for url in ("/transactions/async/", f"/transactions/async/{self.transaction.id}/"):
+            response = self.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.get(url, response["ETag"]).status_code, 304)
+            self.assertEqual(self.get(url, "*").status_code, 304)
+
+    def test_write_changes_the_etag(self):
+        etag = self.get("/transactions/async/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            create_transaction(self.user, amount="5.00")
+        response = self.get("/transactions/async/", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.data["results"]), 2)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Query plans are checked on PostgreSQL")
+class QueryPlanTests(APITestCase):
+    """
+    EXPLAINs the SQL behind the transaction endpoints on a seeded dataset and
+    fails on a sequential scan of the transactions table or a sort node.
+    """
+
+    def test_endpoint_queries_use_the_indexes(self):
+        user = create_user()
+        stdout = io.StringIO()
+        call_command("explain_transactions", user.email, seed=10000, stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        for name in ("list page", "list cursor page", "month range", "summary rollups",
+                     "summary transactions", "category filter"):
+            self.assertIn(f"{name}: ok", lines)
+
+    def test_search_index_is_kept_out_of_the_model_state(self):
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(cursor, Transaction._meta.db_table)
+        self.assertIn("txn_description_search_idx", indexes)
+        self.assertNotIn(
+            "txn_description_search_idx", [index.name for index in Transaction._meta.indexes]
+        )
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Partitioning needs PostgreSQL")
+@override_settings(TRANSACTION_PARTITION_INTERVAL="month", TRANSACTION_PARTITIONS_AHEAD=1)
+class PartitionTests(APITestCase):
+    """
+    Converts the transactions table inside the test transaction, rolled back
+    afterwards like the rows.
+    """
+
+    table = Transaction._meta.db_table
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        for day in ((2023, 1, 31), (2024, 3, 1), (2024, 3, 31)):
+            create_transaction(self.user, date=datetime.date(*day))
+        create_transaction(self.user, date=timezone.localdate())
+        with connection.cursor() as cursor:
+            # Deferred foreign key checks would block the ALTER TABLEs
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+    def get_partition_counts(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT tableoid::regclass::text, count(*) FROM {self.table} GROUP BY 1"
+            )
+            return dict(cursor.fetchall())
+
+    def get_scanned(self, queryset):
+        scanned, nodes = set(), [json.loads(queryset.explain(format="json"))[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            if node.get("Relation Name", "").startswith(self.table):
+                scanned.add(node["Relation Name"])
+            nodes.extend(node.get("Plans", []))
+        return scanned
+
+    def test_convert_keeps_rows_and_prunes(self):
+        before = list(Transaction.objects.order_by("id").values_list("id", "date", "amount"))
+        stdout = io.StringIO()
+        call_command("partition_transactions", "--convert", "--verify", stdout=stdout)
+        self.assertIn("Copied 4 row(s).", stdout.getvalue())
+        self.assertIn("is pruned to", stdout.getvalue())
+
+        self.assertEqual(
+            list(Transaction.objects.order_by("id").values_list("id", "date", "amount")), before
+        )
+        counts = self.get_partition_counts()
+        self.assertEqual(counts[f"{self.table}_p2023_01"], 1)
+        self.assertEqual(counts[f"{self.table}_p2024_03"], 2)
+        self.assertEqual(sum(counts.values()), 4)
+
+        march = Transaction.objects.filter(
+            user=self.user, date__range=(datetime.date(2024, 3, 1), datetime.date(2024, 3, 31))
+        )
+        self.assertEqual(self.get_scanned(march), {f"{self.table}_p2024_03"})
+        response = self.client.get("/transactions/?year=2024&month=3")
+        self.assertEqual(response.data["count"], 2)
+
+    def test_rows_in_the_default_partition_move_to_new_partitions(self):
+        call_command("partition_transactions", "--convert", "--ahead", "0", stdout=io.StringIO())
+        future = timezone.localdate().replace(day=1) + datetime.timedelta(days=62)
+        create_transaction(self.user, date=future)
+        self.assertEqual(self.get_partition_counts()[f"{self.table}_default"], 1)
+
+        call_command("partition_transactions", "--ahead", "3", stdout=io.StringIO())
+        counts = self.get_partition_counts()
+        self.assertNotIn(f"{self.table}_default", counts)
+        self.assertEqual(counts[f"{self.table}_p{future:%Y_%m}"], 1)
+        self.assertEqual(sum(counts.values()), 5)
@@ -1,14 +1,50 @@
 # transactions/urls.py
 from django.urls import path
 from .views import (
+    AsyncTransactionSummaryView,
+    AsyncTransactionView,
+    RecurringTransactionView,
     TransactionView,
+    TransactionBalanceView,
+    TransactionRunningBalanceView,
     TransactionSummaryView,
-    # CategoryTransactionSummaryView
+    TransactionImportView,
+    TransactionExportView,
+    TransactionSeriesView,
+    TransactionCategorySummaryView,
 )
 
 urlpatterns = [
     path("", TransactionView.as_view(), name="transaction-list-create"),
     path("<uuid:pk>/", TransactionView.as_view(), name="transaction-detail"),
     path("summary/", TransactionSummaryView.as_view(), name="transaction-summary"),
-    #    path('transactions/category/<uuid:category_uuid>/', CategoryTransactionSummaryView.as_view(), name='category-transaction-summary')
+    path(
+        "summary/categories/",
+        TransactionCategorySummaryView.as_view(),
+        name="transaction-category-summary",
+    ),
+    path("balance/", TransactionBalanceView.as_view(), name="transaction-balance"),
+    path(
+        "balance/running/",
+        TransactionRunningBalanceView.as_view(),
+        name="transaction-running-balance",
+    ),
+    path("recurring/", RecurringTransactionView.as_view(), name="recurring-transaction-list-create"),
+    path(
+        "recurring/<uuid:pk>/",
+        RecurringTransactionView.as_view(),
+        name="recurring-transaction-detail",
+    ),
+    path("series/", TransactionSeriesView.as_view(), name="transaction-series"),
+    path("export/", TransactionExportView.as_view(), name="transaction-export"),
+    path("import/", TransactionImportView.as_view(), name="transaction-import"),
+    path("import/<uuid:pk>/", TransactionImportView.as_view(), name="transaction-import-detail"),
+    # Async variants of the list/detail and summary endpoints, for ASGI servers
+    path("async/", AsyncTransactionView.as_view(), name="transaction-async-list-create"),
+    path("async/<uuid:pk>/", AsyncTransactionView.as_view(), name="transaction-async-detail"),
+    path(
+        "async/summary/",
+        AsyncTransactionSummaryView.as_view(),
+        name="transaction-async-summary",
+    ),
 ]
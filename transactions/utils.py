@@ -0,0 +1,479 @@
+import calendar
+import datetime
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Case, Count, DecimalField, F, Q, Sum, Value, When, Window,
+)
+from django.db.models.functions import RowNumber, Trunc
+from django.utils import timezone
+from categories.models import Category
+from .models import BalanceCheckpoint, MonthlyRollup, RecurringTransaction, Transaction
+
+
+def add_months(date, months):
+    """
+    Shifts a date by whole months, clamping the day to the target month's length.
+    """
+    month_index = date.year * 12 + date.month - 1 + months
+    year, month = divmod(month_index, 12)
+    day = min(date.day, calendar.monthrange(year, month + 1)[1])
+    return datetime.date(year, month + 1, day)
+
+
+def is_month_aligned(start, end):
+    """
+    Returns True if the range starts on a first and ends on a last day of a month.
+    """
+    return start.day == 1 and end.day == calendar.monthrange(end.year, end.month)[1]
+
+
+def parse_period(query_params):
+    """
+    Parses the reporting period from query parameters into an inclusive (start, end).
+
+    - from / to: ISO dates, either side may be omitted
+    - year and month: a calendar month
+    - year: a calendar year
+    - nothing: the current month
+
+    Raises ValueError with a client facing message on invalid input.
+    """
+    today = timezone.localdate()
+    date_from = query_params.get("from")
+    date_to = query_params.get("to")
+    if date_from or date_to:
+        try:
+            start = datetime.date.fromisoformat(date_from) if date_from else datetime.date.min
+            end = datetime.date.fromisoformat(date_to) if date_to else today
+        except ValueError:
+            raise ValueError("Invalid from/to parameter, expected YYYY-MM-DD")
+        if start > end:
+            raise ValueError("from must not be after to")
+        return start, end
+
+    try:
+        year = int(query_params.get("year", today.year))
+        if year < 1000 or year > 9999:
+            raise ValueError("Invalid year")
+    except ValueError:
+        raise ValueError("Invalid year parameter")
+
+    month = query_params.get("month")
+    if month is None and "year" not in query_params:
+        month = today.month
+    if month is None:
+        return datetime.date(year, 1, 1), datetime.date(year, 12, 31)
+
+    try:
+        month = int(month)
+        if month < 1 or month > 12:
+            raise ValueError("Invalid month")
+    except ValueError:
+        raise ValueError("Invalid month parameter")
+    return (
+        datetime.date(year, month, 1),
+        datetime.date(year, month, calendar.monthrange(year, month)[1]),
+    )
+
+
+def get_comparison_period(start, end, compare):
+    """
+    Returns the period to compare (start, end) with.
+
+    compare: "previous" for the period of the same length right before it, or
+    "year" for the same dates one year earlier.
+    """
+    if compare not in ("previous", "year"):
+        raise ValueError("Invalid compare parameter, expected previous or year")
+    if start == datetime.date.min:
+        raise ValueError("An open-ended period cannot be compared")
+    try:
+        if compare == "year":
+            return add_months(start, -12), add_months(end, -12)
+        if is_month_aligned(start, end):
+            months = (end.year - start.year) * 12 + end.month - start.month + 1
+            previous_end = start - datetime.timedelta(days=1)
+            return add_months(start, -months), previous_end
+        length = end - start + datetime.timedelta(days=1)
+        return start - length, start - datetime.timedelta(days=1)
+    except (ValueError, OverflowError):
+        # The period would start before year 1
+        raise ValueError("The comparison period is out of range")
+
+
+def get_summary_query(user, periods):
+    """
+    Returns (queryset, aggregates) computing every period's totals in one query.
+
+    periods: {name: (start, end)}. Month aligned periods are answered from the
+    monthly rollups, anything else from the transactions themselves. Either way
+    the all-time debit and credit sums come from the same query.
+    """
+    if all(is_month_aligned(start, end) for start, end in periods.values()):
+        aggregates = {
+            "all_debit": Sum("debit_total", default=0),
+            "all_credit": Sum("credit_total", default=0),
+        }
+        for name, (start, end) in periods.items():
+            in_period = Q(month__range=(start, end))
+            aggregates.update({
+                f"{name}_count": Sum(F("debit_count") + F("credit_count"), filter=in_period, default=0),
+                f"{name}_expense": Sum("debit_total", filter=in_period, default=0),
+                f"{name}_income": Sum("credit_total", filter=in_period, default=0),
+            })
+        return MonthlyRollup.objects.filter(user=user), aggregates
+
+    debit, credit = Q(transaction_type="debit"), Q(transaction_type="credit")
+    aggregates = {
+        "all_debit": Sum("amount", filter=debit, default=0),
+        "all_credit": Sum("amount", filter=credit, default=0),
+    }
+    for name, (start, end) in periods.items():
+        in_period = Q(date__range=(start, end))
+        aggregates.update({
+            f"{name}_count": Count("id", filter=in_period),
+            f"{name}_expense": Sum("amount", filter=in_period & debit, default=0),
+            f"{name}_income": Sum("amount", filter=in_period & credit, default=0),
+        })
+    return Transaction.objects.filter(user=user), aggregates
+
+
+def format_period(totals, name, start, end):
+    """
+    Builds the response block of one period from the aggregate results.
+    """
+    single_month = (
+        is_month_aligned(start, end) and (start.year, start.month) == (end.year, end.month)
+    )
+    return {
+        "start": start if start != datetime.date.min else None,
+        "end": end,
+        "month": calendar.month_name[start.month] if single_month else None,
+        "total_transactions": totals[f"{name}_count"],
+        "total_expense": totals[f"{name}_expense"],
+        "total_income": totals[f"{name}_income"],
+    }
+
+
+SERIES_INTERVALS = ("day", "week", "month", "year")
+MAX_SERIES_BUCKETS = 1000
+
+
+def bucket_start(date, interval):
+    """
+    Returns the first day of the bucket containing date (weeks start on Monday).
+    """
+    if interval == "week":
+        return date - datetime.timedelta(days=date.weekday())
+    if interval == "month":
+        return date.replace(day=1)
+    if interval == "year":
+        return date.replace(month=1, day=1)
+    return date
+
+
+def next_bucket(date, interval):
+    """
+    Returns the start of the bucket after the one starting at date.
+    """
+    if interval == "week":
+        return date + datetime.timedelta(days=7)
+    if interval == "month":
+        return add_months(date, 1)
+    if interval == "year":
+        return add_months(date, 12)
+    return date + datetime.timedelta(days=1)
+
+
+def parse_series_range(query_params, interval):
+    """
+    Returns the bucket-aligned (start, end) of a series, both inclusive.
+
+    Defaults to the last 30 days, 12 weeks, 12 months or 5 years (by interval)
+    ending today in the project's time zone. Raises ValueError on invalid input.
+    """
+    today = timezone.localdate()
+    defaults = {"day": 29, "week": 11, "month": 11, "year": 4}
+    try:
+        end = datetime.date.fromisoformat(query_params["to"]) if query_params.get("to") else today
+        if query_params.get("from"):
+            start = datetime.date.fromisoformat(query_params["from"])
+        else:
+            start = bucket_start(end, interval)
+            for _ in range(defaults[interval]):
+                if start == datetime.date.min:
+                    break
+                start = bucket_start(start - datetime.timedelta(days=1), interval)
+    except ValueError:
+        raise ValueError("Invalid from/to parameter, expected YYYY-MM-DD")
+    if start > end:
+        raise ValueError("from must not be after to")
+    start = bucket_start(start, interval)
+    try:
+        end = next_bucket(bucket_start(end, interval), interval) - datetime.timedelta(days=1)
+    except (ValueError, OverflowError):
+        # The last bucket ends on the largest date
+        end = datetime.date.max
+    return start, end
+
+
+def get_series_buckets(start, end, interval):
+    """
+    Returns every bucket start between start and end. Raises ValueError if too many.
+    """
+    buckets = []
+    current = bucket_start(start, interval)
+    while current <= end:
+        buckets.append(current)
+        if len(buckets) > MAX_SERIES_BUCKETS:
+            raise ValueError(f"A series is limited to {MAX_SERIES_BUCKETS} buckets")
+        try:
+            current = next_bucket(current, interval)
+        except (ValueError, OverflowError):
+            break
+    return buckets
+
+
+def get_series_query(user, start, end, interval):
+    """
+    Returns a queryset grouped by bucket with debit/credit sums and counts.
+
+    Month and year buckets are summed from the monthly rollups, days and weeks
+    from the transactions. Either way it is a single GROUP BY query.
+    """
+    if interval in ("month", "year"):
+        return (
+            MonthlyRollup.objects.filter(user=user, month__range=(start, end))
+            .annotate(bucket=Trunc("month", interval))
+            .values("bucket")
+            .annotate(
+                debit=Sum("debit_total"),
+                credit=Sum("credit_total"),
+                debit_count=Sum("debit_count"),
+                credit_count=Sum("credit_count"),
+            )
+            .order_by("bucket")
+        )
+
+    debit, credit = Q(transaction_type="debit"), Q(transaction_type="credit")
+    return (
+        Transaction.objects.filter(user=user, date__range=(start, end))
+        .annotate(bucket=Trunc("date", interval))
+        .values("bucket")
+        .annotate(
+            debit=Sum("amount", filter=debit, default=0),
+            credit=Sum("amount", filter=credit, default=0),
+            debit_count=Count("id", filter=debit),
+            credit_count=Count("id", filter=credit),
+        )
+        .order_by("bucket")
+    )
+
+
+def get_category_breakdown(user, start, end):
+    """
+    Returns one row per category with the count and debit/credit totals of a
+    period, largest expense first, uncategorized (category None) included.
+
+    The totals come from a single GROUP BY over the period's transactions,
+    LEFT JOINed to their category for the name, so every transaction is
+    counted whichever category it was filed under. The user's and the global
+    active categories without any are then added with zeros.
+    """
+    debit, credit = Q(transaction_type="debit"), Q(transaction_type="credit")
+    grouped = (
+        Transaction.objects.filter(user=user, date__range=(start, end))
+        .order_by()
+        .values("category", "category__name")
+        .annotate(
+            count=Count("id"),
+            expense=Sum("amount", filter=debit, default=0),
+            income=Sum("amount", filter=credit, default=0),
+        )
+    )
+    rows = {
+        row["category"]: {
+            "category": row["category"],
+            "name": row["category__name"] or "Uncategorized",
+            "count": row["count"],
+            "expense": row["expense"],
+            "income": row["income"],
+        }
+        for row in grouped
+    }
+    unused = Category.objects.filter(Q(user=user) | Q(user=None), is_active=True).exclude(
+        id__in=[category for category in rows if category is not None]
+    )
+    for category, name in [*unused.values_list("id", "name"), (None, "Uncategorized")]:
+        rows.setdefault(
+            category, {"category": category, "name": name, "count": 0, "expense": 0, "income": 0}
+        )
+    return sorted(rows.values(), key=lambda row: (-row["expense"], row["name"]))
+
+
+def get_top_transactions_query(user, start, end, limit):
+    """
+    Returns the limit largest transactions of each category in a period, ranked
+    with ROW_NUMBER() over a per-category window.
+    """
+    return (
+        Transaction.objects.filter(user=user, date__range=(start, end))
+        .annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=[F("category")],
+                order_by=[F("amount").desc(), F("date").desc(), F("id").desc()],
+            )
+        )
+        .filter(rank__lte=limit)
+        .order_by("category", "rank")
+        .values(
+            "category", "id", "amount", "date", "transaction_type",
+            "payment_method", "description",
+        )
+    )
+
+
+# Credits add to the balance, debits subtract from it
+SIGNED_AMOUNT = Case(
+    When(transaction_type="credit", then=F("amount")),
+    default=-F("amount"),
+)
+
+
+def get_balance(user, as_of):
+    """
+    Returns (balance at the end of as_of, checkpoint date used or None).
+
+    Starts from the latest checkpoint on or before the next day and sums the
+    transactions between the two, so at most one checkpoint interval is scanned.
+    """
+    checkpoint = (
+        BalanceCheckpoint.objects.filter(user=user, date__lte=as_of + datetime.timedelta(days=1))
+        .order_by("-date")
+        .values("date", "balance")
+        .first()
+    )
+    transactions = Transaction.objects.filter(user=user, date__lte=as_of)
+    if checkpoint:
+        transactions = transactions.filter(date__gte=checkpoint["date"])
+    delta = transactions.aggregate(delta=Sum(SIGNED_AMOUNT, default=0))["delta"]
+    if checkpoint:
+        return checkpoint["balance"] + delta, checkpoint["date"]
+    return delta, None
+
+
+def get_running_balance_query(user, start, end, opening):
+    """
+    Returns the transactions of (start, end), oldest first, annotated with the
+    balance after each one. opening is the balance before start.
+
+    The window runs over the whole range, slicing the queryset afterwards
+    (LIMIT/OFFSET) keeps the balances right, filtering it does not.
+    """
+    return (
+        Transaction.objects.filter(user=user, date__range=(start, end))
+        .annotate(
+            balance=Window(
+                Sum(SIGNED_AMOUNT),
+                order_by=[F("date").asc(), F("id").asc()],
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            )
+            + Value(opening, output_field=DecimalField(max_digits=14, decimal_places=2))
+        )
+        .order_by("date", "id")
+    )
+
+
+def get_occurrence(rule, n):
+    """
+    Returns the date of a recurring transaction's n-th occurrence (from 0).
+    """
+    steps = n * rule.interval
+    if rule.frequency == "daily":
+        return rule.start_date + datetime.timedelta(days=steps)
+    if rule.frequency == "weekly":
+        return rule.start_date + datetime.timedelta(weeks=steps)
+    if rule.frequency == "monthly":
+        return add_months(rule.start_date, steps)
+    return add_months(rule.start_date, 12 * steps)
+
+
+def advance_recurrence(rule):
+    """
+    Moves next_due to the following occurrence, deactivating the rule past end_date.
+    """
+    rule.occurrences += 1
+    rule.next_due = get_occurrence(rule, rule.occurrences)
+    if rule.end_date and rule.next_due > rule.end_date:
+        rule.is_active = False
+
+
+def reschedule_recurrence(rule):
+    """
+    Recomputes next_due after the schedule changed, skipping the occurrences up
+    to the rule's latest transaction so none is created twice.
+    """
+    last = None
+    if rule.pk:
+        last = Transaction.objects.filter(recurrence=rule).order_by("-date").values_list(
+            "date", flat=True
+        ).first()
+    rule.occurrences = 0
+    if last is not None and last >= rule.start_date:
+        # Jump to an occurrence no later than the last one (steps are at most
+        # this many days) instead of stepping from the start
+        max_days = {"daily": 1, "weekly": 7, "monthly": 31, "yearly": 366}[rule.frequency]
+        rule.occurrences = (last - rule.start_date).days // (max_days * rule.interval)
+    rule.next_due = get_occurrence(rule, rule.occurrences)
+    while last is not None and rule.next_due <= last:
+        advance_recurrence(rule)
+    # Only ever ends the rule, pausing it is the user's choice
+    rule.is_active = rule.is_active and (not rule.end_date or rule.next_due <= rule.end_date)
+
+
+def generate_recurring_transactions(as_of, batch_size=None):
+    """
+    Creates every occurrence due on or before as_of, for all users, catching
+    up on missed periods. Returns (rules, transactions) processed.
+
+    Due rules are locked batch_size at a time with SKIP LOCKED, so concurrent
+    generators share the work. A batch is a few selects, bulk inserts and one
+    bulk update of next_due, committed together, so a rerun continues after
+    the last committed batch and never creates an occurrence twice.
+    """
+    batch_size = batch_size or settings.RECURRING_TRANSACTION_BATCH_SIZE
+    processed = created = 0
+    while True:
+        with transaction.atomic():
+            rules = list(
+                RecurringTransaction.objects.select_for_update(skip_locked=True)
+                .filter(is_active=True, next_due__lte=as_of)
+                .order_by("next_due")[:batch_size]
+            )
+            if not rules:
+                break
+            # Occurrences that already exist, e.g. a generated transaction was
+            # moved to a later occurrence's date
+            existing = set(
+                Transaction.objects.filter(
+                    recurrence__in=rules, date__gte=min(rule.next_due for rule in rules)
+                ).values_list("recurrence", "date")
+            )
+            occurrences = []
+            for rule in rules:
+                while rule.is_active and rule.next_due <= as_of:
+                    if (rule.pk, rule.next_due) not in existing:
+                        occurrences.append(rule.build_transaction(rule.next_due))
+                    advance_recurrence(rule)
+                rule.updated_at = timezone.now()
+            Transaction.objects.bulk_create(
+                occurrences, batch_size=settings.TRANSACTION_BULK_BATCH_SIZE
+            )
+            RecurringTransaction.objects.bulk_update(
+                rules, ["next_due", "occurrences", "is_active", "updated_at"]
+            )
+        processed += len(rules)
+        created += len(occurrences)
+    return processed, created
@@ -4,26 +4,83 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import Sum, Count
+from rest_framework.parsers import MultiPartParser
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.exceptions import ValidationError
+from django.db.transaction import atomic
 from django.utils import timezone
-from datetime import datetime
-# from django.db.models.functions import TruncMonth, TruncYear
-import calendar
-from .models import Transaction
-
-from .serializers import TransactionSerializer
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.utils.cache import get_conditional_response, quote_etag
+from datetime import date, timedelta
+import csv
+import io
+import json
+from .models import ImportJob, RecurringTransaction, Transaction
+from .utils import (
+    SERIES_INTERVALS,
+    format_period,
+    get_balance,
+    get_category_breakdown,
+    get_comparison_period,
+    get_running_balance_query,
+    get_series_buckets,
+    get_series_query,
+    get_summary_query,
+    get_top_transactions_query,
+    parse_period,
+    parse_series_range,
+)
+
+from .serializers import (
+    ImportJobSerializer,
+    RecurringTransactionSerializer,
+    TransactionSerializer,
+    RUNNING_BALANCE_VALUES_PLAN,
+    TRANSACTION_VALUES_PLAN,
+)
+from .importers import DEFAULT_COLUMNS, TransactionImporter
+from .filters import TransactionFilter
 from categories.models import Category
-from base.pagination import CustomPagination
-from django.core.mail import send_mail
+from base.pagination import CustomPagination, CursorPagination, CachedCount
+from base.cache import aget_data_etag, cache_response, get_data_etag
+from base.serializers import ValuesPlan
+from base.async_views import AsyncAPIView
+from asgiref.sync import sync_to_async
+
+
+class TransactionQueryMixin:
+    """
+    Builds the filtered transaction queryset shared by the list and export endpoints.
+    """
+
+    # Query parameters that control the response rather than filter it
+    control_params = []
+
+    def get_queryset(self, request):
+        """
+        Returns the user's transactions, newest first, filtered by the query parameters.
+        """
+        self.transaction_filter = TransactionFilter(
+            request.query_params, ignore=self.control_params
+        )
+        queryset = Transaction.objects.filter(user=request.user).order_by("-date", "-id")
+        return self.transaction_filter.filter_queryset(queryset)
 
 
-class TransactionView(APIView):
+class TransactionView(TransactionQueryMixin, APIView):
 
     """
     API endpoint for listing, creating, retrieving, updating, and deleting transactions.
     """
     permission_classes = [IsAuthenticated]
     pagination_class = CustomPagination
+    cursor_pagination_class = CursorPagination
+
+    # Query parameters that control the response rather than filter it
+    control_params = ["page", "page_size", "pagination", "cursor", "count"]
 
     def get_object(self, pk, user):
         """
@@ -34,6 +91,7 @@ class TransactionView(APIView):
         except Transaction.DoesNotExist:
             return None
 
+    @method_decorator(condition(etag_func=get_data_etag))
     def get(self, request, pk=None):
         """List all user transactions with filtering and pagination, or retrieve a specific transaction."""
 
@@ -48,18 +106,10 @@ class TransactionView(APIView):
             serializer = TransactionSerializer(transaction)
             return Response(serializer.data)
         else:
-            # List all transactions for the authenticated user
-            filters = {}
-            for param, value in request.query_params.items():
-                if param not in ["page", "page_size"]:
-                    filters[param] = value
-            
-            queryset = Transaction.objects.filter(user=request.user).order_by("-date")
-            if filters:
-                queryset = queryset.filter(**filters)
-
-            # Initialize paginator
-            paginator = self.pagination_class(page_size=5)
+            # List all transactions for the authenticated user, as values()
+            # rows rendered by the precompiled plan instead of model instances
+            queryset = self.get_queryset(request).values(*TRANSACTION_VALUES_PLAN.fields)
+            paginator = self.get_paginator(request)
             
             # Paginate the queryset
             paginated_queryset, total_count = paginator.paginate_queryset(
@@ -68,17 +118,41 @@ class TransactionView(APIView):
             )
             
             # Serialize the paginated data
-            serializer = TransactionSerializer(paginated_queryset, many=True)
+            data = TRANSACTION_VALUES_PLAN.convert(paginated_queryset)
             
             # Return paginated response
             return paginator.get_paginated_response(
-                data=serializer.data,
+                data=data,
                 request=request,
                 total_count=total_count
             )
 
+    def get_paginator(self, request):
+        """
+        Returns the paginator, ?pagination=cursor (or a cursor) selects keyset paging.
+
+        Search results are ranked by relevance, which a (date, id) cursor
+        cannot page through, so the two are not combined.
+        """
+        if (
+            request.query_params.get("pagination") == "cursor"
+            or "cursor" in request.query_params
+        ):
+            if "search" in self.transaction_filter.filters:
+                raise ValidationError(
+                    {"search": ["Cannot be combined with cursor pagination, use page numbers."]}
+                )
+            return self.cursor_pagination_class(page_size=5)
+        return self.pagination_class(
+            page_size=5,
+            count_strategy=CachedCount(signature=self.transaction_filter.signature),
+        )
+
     def post(self, request,pk=None):
-    # Create a new transaction
+    # Create a new transaction, or many when the body is a list
+        if isinstance(request.data, list):
+            return self.post_many(request)
+
         transaction_data = request.data.copy()
         transaction_data["user"] = request.user.id
         if "date" not in transaction_data:
@@ -86,11 +160,59 @@ class TransactionView(APIView):
         
         serializer = TransactionSerializer(data=transaction_data)
         if serializer.is_valid():
-            
+            serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def post_many(self, request):
+        """
+        Create a batch of transactions, e.g. queued offline entries.
+
+        Valid rows are inserted with bulk_create (``?batch_size=`` rows per INSERT),
+        invalid rows are reported by index without rejecting the rest.
+        """
+        if len(request.data) > settings.TRANSACTION_BULK_MAX_ROWS:
+            return Response(
+                {"error": f"At most {settings.TRANSACTION_BULK_MAX_ROWS} transactions per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            batch_size = int(
+                request.query_params.get("batch_size", settings.TRANSACTION_BULK_BATCH_SIZE)
+            )
+            if batch_size < 1:
+                raise ValueError("Invalid batch size")
+        except ValueError:
+            return Response(
+                {"error": "Invalid batch_size parameter"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = []
+        for row in request.data:
+            if isinstance(row, dict):
+                row = {**row, "user": request.user.id}
+                row.setdefault("date", timezone.now().date())
+            rows.append(row)
+
+        serializer = TransactionSerializer(data=rows, many=True)
+        validated, errors = serializer.validate_rows()
+        created = serializer.create(validated, batch_size=batch_size) if validated else []
+
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {
+                "created": TransactionSerializer(created, many=True).data,
+                "errors": errors,
+            },
+            status=response_status,
+        )
+
     def put(self, request, pk):
         # Update an existing transaction
         transaction = self.get_object(pk, request.user)
@@ -121,136 +243,524 @@ class TransactionView(APIView):
 
 
 
+class TransactionExportView(TransactionQueryMixin, APIView):
+    """
+    API endpoint for exporting transactions as CSV or NDJSON.
+
+    Rows are streamed from a server-side cursor, so memory stays flat no matter
+    how long the history is. Accepts the same filters as the list endpoint plus
+    export_format (csv or ndjson, default csv).
+    """
+
+    permission_classes = [IsAuthenticated]
+    control_params = ["export_format"]
+    fields = [
+        "id",
+        "date",
+        "amount",
+        "description",
+        "payment_method",
+        "transaction_type",
+        "category",
+        "created_at",
+        "updated_at",
+    ]
+    content_types = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+    chunk_size = 2000
+    plan = ValuesPlan(TransactionSerializer, fields=fields)
+
+    def get(self, request):
+        export_format = request.query_params.get("export_format", "csv")
+        if export_format not in self.content_types:
+            return Response(
+                {"error": "Invalid export_format parameter, expected csv or ndjson"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        rows = (
+            self.get_queryset(request)
+            .values(*self.plan.fields)
+            .iterator(chunk_size=self.chunk_size)
+        )
+
+        lines = self.stream_csv(rows) if export_format == "csv" else self.stream_ndjson(rows)
+        response = StreamingHttpResponse(lines, content_type=self.content_types[export_format])
+        response["Content-Disposition"] = f'attachment; filename="transactions.{export_format}"'
+        return response
+
+    def stream_csv(self, rows):
+        """
+        Yields the CSV a chunk of rows at a time, one write per database fetch
+        rather than per row.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.fields)
+        convert_row = self.plan.get_row_converter()
+        for count, row in enumerate(rows, 1):
+            record = convert_row(row)
+            writer.writerow(["" if value is None else value for value in record.values()])
+            if count % self.chunk_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def stream_ndjson(self, rows):
+        convert_row = self.plan.get_row_converter()
+        lines = []
+        for row in rows:
+            lines.append(json.dumps(convert_row(row), cls=JSONEncoder) + "\n")
+            if len(lines) == self.chunk_size:
+                yield "".join(lines)
+                lines = []
+        yield "".join(lines)
+
+
+class TransactionImportView(APIView):
+    """
+    API endpoint for importing a CSV bank export.
+
+    Form fields: file, plus optional columns (JSON object of field -> CSV column),
+    date_format, and job (id of an earlier import of the same file to resume).
+    """
+
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def get(self, request, pk):
+        job = ImportJob.objects.filter(id=pk, user=request.user).first()
+        if not job:
+            return Response(
+                {"error": "Import not found or you do not have permission"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(ImportJobSerializer(job).data)
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"error": "A CSV file is required"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if request.data.get("job"):
+            job = ImportJob.objects.filter(id=request.data["job"], user=request.user).first()
+            if not job:
+                return Response(
+                    {"error": "Import not found or you do not have permission"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            importer = TransactionImporter(job)
+        else:
+            try:
+                columns = json.loads(request.data.get("columns") or "{}")
+                if not isinstance(columns, dict) or set(columns) - set(DEFAULT_COLUMNS):
+                    raise ValueError("Invalid columns")
+            except ValueError:
+                return Response(
+                    {"error": f"columns must map {', '.join(DEFAULT_COLUMNS)} to CSV columns"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            importer = TransactionImporter.start(
+                request.user,
+                upload.name,
+                columns=columns,
+                date_format=request.data.get("date_format"),
+            )
+
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        try:
+            job = importer.run(stream)
+        except UnicodeDecodeError:
+            return Response(
+                {"error": "The file must be UTF-8 encoded CSV", "job": importer.job.id},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        data = ImportJobSerializer(job).data
+        data["throughput"] = round(importer.throughput, 1)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class TransactionSeriesView(APIView):
+    """
+    API endpoint for debit/credit totals per time bucket.
+
+    Query Parameters (optional):
+    - interval: day, week, month (default) or year
+    - from, to: date range (YYYY-MM-DD), widened to whole buckets, defaults to the last 30 days, 12 weeks,
+      12 months or 5 years ending today (Asia/Kolkata)
+
+    The response is columnar: parallel arrays indexed by bucket, empty buckets
+    included with zeros.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @cache_response()
+    def get(self, request):
+        interval = request.query_params.get("interval", "month")
+        if interval not in SERIES_INTERVALS:
+            return Response(
+                {"error": f"Invalid interval parameter, expected {', '.join(SERIES_INTERVALS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            start, end = parse_series_range(request.query_params, interval)
+            buckets = get_series_buckets(start, end, interval)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = {
+            row["bucket"]: row
+            for row in get_series_query(request.user, start, end, interval)
+        }
+        series = {
+            "interval": interval,
+            "buckets": buckets,
+            "debit": [],
+            "credit": [],
+            "debit_count": [],
+            "credit_count": [],
+        }
+        for bucket in buckets:
+            row = rows.get(bucket, {})
+            for field in ("debit", "credit", "debit_count", "credit_count"):
+                series[field].append(row.get(field) or 0)
+
+        return Response(series)
+
+
 class TransactionSummaryView(APIView):
     """
     API endpoint for getting transaction summaries
+
+    Query Parameters (optional):
+    - year, month: calendar month (default: current month), or a whole year without month
+    - from, to: arbitrary date range (YYYY-MM-DD), takes precedence over year/month
+    - compare: "previous" period or same period last "year"
     """
 
     permission_classes = [IsAuthenticated]
 
+    @cache_response()
     def get(self, request):
         # Get query parameters
-        month = request.query_params.get("month", timezone.now().month)
-
-        # Base queryset filtered by user
-        queryset = Transaction.objects.filter(user=request.user, date__month=month)
-
-        # Aggregate calculations
-        summary = {
-            "month": calendar.month_name(month),
-            "total_transactions": queryset.count(),
-            "total_expense": queryset.filter(transaction_type="debit").aggregate(
-                total=Sum("amount")
-            )["total"]
-            or 0,
-            "total_income": queryset.filter(transaction_type="credit").aggregate(
-                total=Sum("amount")
-            )["total"]
-            or 0,
-            "net_amount": (
-                Transaction.objects.filter(
-                    user=request.user, transaction_type="credit"
-                ).aggregate(total=Sum("amount"))["total"]
-                or 0
+        try:
+            periods = self.get_periods(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Every period plus the all-time net in a single conditional aggregate
+        queryset, aggregates = get_summary_query(request.user, periods)
+        totals = queryset.aggregate(**aggregates)
+
+        return Response(self.format_summary(totals, periods))
+
+    def get_periods(self, request):
+        """
+        Returns the {"current", "comparison"} periods requested. Raises ValueError.
+        """
+        periods = {"current": parse_period(request.query_params)}
+        compare = request.query_params.get("compare")
+        if compare:
+            periods["comparison"] = get_comparison_period(*periods["current"], compare)
+        return periods
+
+    def format_summary(self, totals, periods):
+        summary = format_period(totals, "current", *periods["current"])
+        summary["net_amount"] = totals["all_credit"] - totals["all_debit"]
+        if "comparison" in periods:
+            comparison = format_period(totals, "comparison", *periods["comparison"])
+            comparison["change"] = {
+                field: summary[field] - comparison[field]
+                for field in ("total_transactions", "total_expense", "total_income")
+            }
+            summary["comparison"] = comparison
+        return summary
+
+
+
+
+
+class TransactionCategorySummaryView(APIView):
+    """
+    API endpoint for per-category totals over a period: every category with
+    transactions in it, the user's and the global ones with zeros when unused,
+    and Uncategorized
+
+    Query Parameters (optional):
+    - year, month: calendar month (default: current month), or a whole year without month
+    - from, to: arbitrary date range (YYYY-MM-DD), takes precedence over year/month
+    - top: include the N largest transactions of each category (max 20)
+    """
+
+    permission_classes = [IsAuthenticated]
+    max_top = 20
+
+    @cache_response()
+    def get(self, request):
+        try:
+            start, end = parse_period(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            top = int(request.query_params.get("top", 0))
+            if not 0 <= top <= self.max_top:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": f"Invalid top parameter, expected 0-{self.max_top}"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            - (
-                Transaction.objects.filter(
-                    user=request.user, transaction_type="debit"
-                ).aggregate(total=Sum("amount"))["total"]
-                or 0
-            ),
-        }
 
-        return Response(summary)
+        rows = get_category_breakdown(request.user, start, end)
+        total_expense = sum(row["expense"] for row in rows)
+        total_income = sum(row["income"] for row in rows)
+
+        categories = {}
+        for row in rows:
+            categories[row["category"]] = {
+                "category": row["category"],
+                "name": row["name"],
+                "total_transactions": row["count"],
+                "total_expense": row["expense"],
+                "total_income": row["income"],
+                "expense_share": (
+                    round(row["expense"] * 100 / total_expense, 2) if total_expense else 0
+                ),
+            }
+        if top:
+            for category in categories.values():
+                category["top_transactions"] = []
+            for row in get_top_transactions_query(request.user, start, end, top):
+                categories[row.pop("category")]["top_transactions"].append(row)
+
+        return Response(
+            {
+                "start": start if start != date.min else None,
+                "end": end,
+                "total_expense": total_expense,
+                "total_income": total_income,
+                "categories": list(categories.values()),
+            }
+        )
+
+
+class TransactionBalanceView(APIView):
+    """
+    API endpoint for the balance (credits minus debits) at the end of a day
 
+    Query Parameters (optional):
+    - date: YYYY-MM-DD (default: today)
+    """
 
+    permission_classes = [IsAuthenticated]
 
+    @cache_response()
+    def get(self, request):
+        as_of = request.query_params.get("date")
+        try:
+            as_of = date.fromisoformat(as_of) if as_of else timezone.localdate()
+        except ValueError:
+            return Response(
+                {"error": "Invalid date parameter, expected YYYY-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # The checkpoint lookup reads the day after as_of
+        if as_of == date.max:
+            return Response(
+                {"error": f"date must be before {date.max}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
+        balance, checkpoint = get_balance(request.user, as_of)
+        return Response({"date": as_of, "balance": balance, "checkpoint": checkpoint})
 
-# class CategoryTransactionSummaryView(APIView):
-#     """
-#     API endpoint for getting transaction summary for a specific category.
-#     """
-#     permission_classes = [IsAuthenticated]
 
-#     def get(self, request, category_uuid):
-#         """
-#         Retrieve transaction summary for a specific category.
+class TransactionRunningBalanceView(APIView):
+    """
+    API endpoint listing transactions oldest first with the balance after each
 
-#         URL Parameters:
-#         - category_uuid: UUID of the category to filter transactions.
+    Query Parameters (optional):
+    - year, month: calendar month (default: current month), or a whole year without month
+    - from, to: arbitrary date range (YYYY-MM-DD), takes precedence over year/month
+    - page, page_size: pagination
+    """
 
-#         Query Parameters (optional):
-#         - year: Specific year to filter transactions (default: current year).
-#         - month: Specific month to filter transactions (default: all months).
-#         """
+    permission_classes = [IsAuthenticated]
+    pagination_class = CustomPagination
 
-#         # Get optional query parameters
-#         year = request.query_params.get('year', timezone.now().year)
-#         month = request.query_params.get('month')
+    @cache_response()
+    def get(self, request):
+        try:
+            start, end = parse_period(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        opening = 0
+        if start != date.min:
+            opening, _ = get_balance(request.user, start - timedelta(days=1))
+
+        queryset = get_running_balance_query(request.user, start, end, opening).values(
+            *RUNNING_BALANCE_VALUES_PLAN.fields
+        )
+        paginator = self.pagination_class(page_size=5)
+        paginated_queryset, total_count = paginator.paginate_queryset(
+            queryset=queryset, request=request
+        )
+        response = paginator.get_paginated_response(
+            data=RUNNING_BALANCE_VALUES_PLAN.convert(paginated_queryset),
+            request=request,
+            total_count=total_count,
+        )
+        response.data["opening_balance"] = opening
+        return response
+
+
+class RecurringTransactionView(APIView):
+    """
+    API endpoint for listing, creating, retrieving, updating, and deleting
+    recurring transaction rules. Their transactions are created by the
+    generate_recurring_transactions command.
+    """
 
-#         # Validate year
-#         try:
-#             year = int(year)
-#             if year < 1000 or year > 9999:
-#                 raise ValueError("Invalid year")
-#         except ValueError:
-#             return Response({'error': 'Invalid year parameter'}, status=400)
-
-#         # Validate month if provided
-#         if month:
-#             try:
-#                 month = int(month)
-#                 if month < 1 or month > 12:
-#                     raise ValueError("Invalid month")
-#             except ValueError:
-#                 return Response({'error': 'Invalid month parameter'}, status=400)
-
-#         # Base queryset filtered by user and specific category
-#         queryset = Transaction.objects.filter(
-#             user=request.user,
-#             category__uuid=category_uuid,  # Assuming category has a UUID field
-#             date__year=year
-#         )
-
-#         # Optional month filter
-#         if month:
-#             queryset = queryset.filter(date__month=month)
-
-#         # Calculate category-specific transaction summary
-
-#         summary = {
-#             'category_uuid': category_uuid,
-#             'total_transactions': queryset.count(),
-#             'total_amount': queryset.aggregate(total=Sum('amount'))['total'] or 0,
-#             'transactions_by_type': {
-#                 'debit': (
-#                     queryset.filter(transaction_type='debit')
-#                     .aggregate(
-#                         total_amount=Sum('amount'),
-#                         count=Count('id')
-#                     )
-#                 ),
-#                 'credit': (
-#                     queryset.filter(transaction_type='credit')
-#                     .aggregate(
-#                         total_amount=Sum('amount'),
-#                         count=Count('id')
-#                     )
-#                 )
-#             },
-#             'transactions_details': list(
-#                 queryset.values(
-#                     'id',
-#                     'amount',
-#                     'date',
-#                     'description',
-#                     'transaction_type'
-#                 ).order_by('-date')  # Order transactions by date descending
-#             )
-#         }
+    permission_classes = [IsAuthenticated]
+    pagination_class = CustomPagination
+
+    def get_object(self, pk, user, for_update=False):
+        """
+        Returns the user's rule or None. for_update locks it against the generator.
+        """
+        queryset = RecurringTransaction.objects.filter(id=pk, user=user)
+        if for_update:
+            queryset = queryset.select_for_update()
+        return queryset.first()
+
+    def not_found(self):
+        return Response(
+            {"error": "Recurring transaction not found or you do not have permission"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    def get(self, request, pk=None):
+        if pk:
+            rule = self.get_object(pk, request.user)
+            if not rule:
+                return self.not_found()
+            return Response(RecurringTransactionSerializer(rule).data)
+
+        queryset = RecurringTransaction.objects.filter(user=request.user).order_by(
+            "next_due", "id"
+        )
+        paginator = self.pagination_class(page_size=5)
+        paginated_queryset, total_count = paginator.paginate_queryset(
+            queryset=queryset, request=request
+        )
+        return paginator.get_paginated_response(
+            data=RecurringTransactionSerializer(paginated_queryset, many=True).data,
+            request=request,
+            total_count=total_count,
+        )
+
+    def post(self, request, pk=None):
+        data = request.data.copy()
+        data["user"] = request.user.id
+        serializer = RecurringTransactionSerializer(data=data)
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @method_decorator(atomic)
+    def put(self, request, pk):
+        rule = self.get_object(pk, request.user, for_update=True)
+        if not rule:
+            return self.not_found()
+        data = request.data.copy()
+        data.pop("user", None)  # Prevent user change
+        serializer = RecurringTransactionSerializer(rule, data=data, partial=True)
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def delete(self, request, pk):
+        """
+        Deletes the rule, the transactions it created are kept.
+        """
+        rule = self.get_object(pk, request.user)
+        if not rule:
+            return self.not_found()
+        rule.delete()
+        return Response({"message": "Deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
+
+
+class AsyncTransactionView(AsyncAPIView, TransactionView):
+    """
+    Async variant of TransactionView for ASGI deployments.
+
+    Reads use the async ORM, so a worker keeps serving other requests while
+    one waits on the database or a slow client. Writes reuse TransactionView
+    in a thread, since validation and the ledger hooks are synchronous.
+    """
+
+    async def get(self, request, pk=None):
+        # Validated here rather than with condition(), whose ETag function is
+        # synchronous and would read the cache from the event loop
+        etag = quote_etag(await aget_data_etag(request))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = await self.aget_response(request, pk)
+        response.headers.setdefault("ETag", etag)
+        return response
+
+    async def aget_response(self, request, pk):
+        if pk:
+            transaction = await Transaction.objects.filter(id=pk, user=request.user).afirst()
+            if not transaction:
+                return Response(
+                    {"error": "Transaction not found or you do not have permission"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            return Response(TransactionSerializer(transaction).data)
+
+        queryset = self.get_queryset(request).values(*TRANSACTION_VALUES_PLAN.fields)
+        paginator = self.get_paginator(request)
+        rows, total_count = await paginator.apaginate_queryset(queryset=queryset, request=request)
+        return paginator.get_paginated_response(
+            data=TRANSACTION_VALUES_PLAN.convert(rows),
+            request=request,
+            total_count=total_count,
+        )
+
+    async def post(self, request, pk=None):
+        return await sync_to_async(super().post)(request, pk)
+
+    async def put(self, request, pk):
+        return await sync_to_async(super().put)(request, pk)
+
+    async def delete(self, request, pk):
+        return await sync_to_async(super().delete)(request, pk)
+
+
+class AsyncTransactionSummaryView(AsyncAPIView, TransactionSummaryView):
+    """
+    Async variant of TransactionSummaryView for ASGI deployments.
+    """
+
+    @cache_response()
+    async def get(self, request):
+        try:
+            periods = self.get_periods(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset, aggregates = get_summary_query(request.user, periods)
+        totals = await queryset.aaggregate(**aggregates)
 
-#         return Response(summary,content_type='applcation/json')
+        return Response(self.format_summary(totals, periods))
 
 
 
@@ -0,0 +1,114 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django_redis.cache import RedisCache
+
+from users.utils import VerificationTokenStore
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover - fakeredis is only used by --fake
+    fakeredis = None
+
+
+class Command(BaseCommand):
+    help = (
+        "Times finding a user's verification token through the reverse mapping "
+        "and through a scan of every token, the way it was looked up before. "
+        "Runs against token_cache's Redis under a throwaway key prefix, or an "
+        "in-process fakeredis server with --fake."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tokens", type=int, default=2000, help="Tokens stored")
+        parser.add_argument("--lookups", type=int, default=20, help="Users looked up per path")
+        parser.add_argument(
+            "--fake", action="store_true", help="Use fakeredis instead of token_cache's Redis"
+        )
+
+    def handle(self, *args, **options):
+        cache = self.get_cache(options["fake"])
+        store = VerificationTokenStore(cache)
+        try:
+            self.compare(store, options["tokens"], options["lookups"])
+        finally:
+            cache.delete_pattern("*")
+
+    def get_cache(self, fake):
+        prefix = f"benchmark-{uuid.uuid4().hex}"
+        if fake:
+            if fakeredis is None:
+                raise CommandError("--fake needs the fakeredis package.")
+            return RedisCache(
+                "redis://localhost:6379/0",
+                {
+                    "KEY_PREFIX": prefix,
+                    "OPTIONS": {
+                        "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                        "CONNECTION_POOL_KWARGS": {"connection_class": fakeredis.FakeConnection},
+                    },
+                },
+            )
+
+        config = settings.CACHES["token_cache"]
+        if not config["BACKEND"].startswith("django_redis."):
+            raise CommandError("token_cache is not a django-redis cache, run with --fake.")
+        return RedisCache(config["LOCATION"], {**config, "KEY_PREFIX": prefix})
+
+    def compare(self, store, count, lookups):
+        timeout = settings.EMAIL_VERIFICATION_TOKEN_TIMEOUT
+        user_ids = [str(uuid.uuid4()) for _ in range(count)]
+
+        start = time.perf_counter()
+        tokens = {user_id: store.issue(user_id, timeout) for user_id in user_ids}
+        issued = time.perf_counter() - start
+
+        sample = user_ids[:: max(1, count // lookups)][:lookups]
+
+        def scan(user_id):
+            pattern = store.token_key("*")
+            for key in store.redis.scan_iter(match=pattern, count=1000):
+                if store.decode(store.redis.get(key)) == user_id:
+                    return store.decode(key)[len(pattern) - 1 :]
+            return None
+
+        timings = {}
+        for name, lookup in (("scan", scan), ("reverse mapping", store.get_token)):
+            start = time.perf_counter()
+            found = [lookup(user_id) for user_id in sample]
+            timings[name] = time.perf_counter() - start
+            if found != [tokens[user_id] for user_id in sample]:
+                raise CommandError(f"The {name} lookup returned the wrong tokens.")
+
+        start = time.perf_counter()
+        for user_id in sample:
+            store.issue(user_id, timeout)
+        reissued = time.perf_counter() - start
+        if any(store.get_user_id(tokens[user_id]) for user_id in sample):
+            raise CommandError("Reissuing left the previous token valid.")
+
+        start = time.perf_counter()
+        for user_id in sample:
+            store.invalidate(store.get_token(user_id))
+        invalidated = time.perf_counter() - start
+        if any(store.get_token(user_id) for user_id in sample):
+            raise CommandError("Invalidating left the user's mapping behind.")
+
+        self.stdout.write(f"Issued {count} token(s) in {issued * 1000:.1f} ms.")
+        for name, seconds in timings.items():
+            self.stdout.write(
+                f"{name}: {seconds * 1000 / len(sample):.3f} ms per lookup "
+                f"over {len(sample)} lookup(s)"
+            )
+        self.stdout.write(
+            f"reissue: {reissued * 1000 / len(sample):.3f} ms, "
+            f"invalidate: {invalidated * 1000 / len(sample):.3f} ms per token"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reverse mapping is {timings['scan'] / timings['reverse mapping']:.0f}x "
+                "faster than the scan."
+            )
+        )
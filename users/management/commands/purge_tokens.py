@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from users.utils import REVOCATIONS_SYNCED_KEY, mirror_revocation
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes expired outstanding refresh tokens and their blacklist entries "
+        "in batches, and mirrors the blacklist into the revocation store when it "
+        "has not been synced yet (or with --resync). Run it periodically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.TOKEN_PURGE_BATCH_SIZE)
+        parser.add_argument(
+            "--resync",
+            action="store_true",
+            help="Mirror the blacklisted tokens into token_cache even if already synced",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        now = timezone.now()
+        purged = 0
+        while True:
+            batch = self.purge_batch(now, batch_size)
+            purged += batch
+            if batch < batch_size:
+                break
+
+        if options["resync"] or caches["token_cache"].get(REVOCATIONS_SYNCED_KEY) is None:
+            mirrored = self.resync(batch_size)
+            self.stdout.write(f"Mirrored {mirrored} revoked token(s).")
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} expired token(s)."))
+
+    @transaction.atomic
+    def purge_batch(self, now, batch_size):
+        """
+        Deletes up to batch_size tokens that expired before now, with their
+        blacklist entries. Returns how many tokens were deleted.
+        """
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lt=now)
+            .order_by("expires_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        BlacklistedToken.objects.filter(token_id__in=ids).delete()
+        return OutstandingToken.objects.filter(id__in=ids).delete()[1].get(
+            OutstandingToken._meta.label, 0
+        )
+
+    def resync(self, batch_size):
+        """
+        Mirrors the blacklisted tokens that have not expired, then marks the
+        store synced so checks stop falling back to the database.
+        """
+        mirrored, last_id = 0, 0
+        while True:
+            batch = list(
+                BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now(), id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "token__jti", "token__expires_at")[:batch_size]
+            )
+            for _, jti, expires_at in batch:
+                mirror_revocation(jti, expires_at.timestamp())
+            mirrored += len(batch)
+            if len(batch) < batch_size:
+                break
+            last_id = batch[-1][0]
+        caches["token_cache"].set(REVOCATIONS_SYNCED_KEY, 1, timeout=None)
+        return mirrored
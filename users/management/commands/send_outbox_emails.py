@@ -0,0 +1,101 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import OutboxEmail
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends queued outbox emails in batches over one reused mail connection. "
+        "Failed emails are retried with exponential backoff up to "
+        "OUTBOX_MAX_ATTEMPTS times. Concurrent workers skip each other's batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for due emails instead of exiting when none are left",
+        )
+        parser.add_argument(
+            "--interval", type=float, default=5, help="Seconds between polls with --loop"
+        )
+
+    def handle(self, *args, **options):
+        self.connection = get_connection()
+        sent = failed = 0
+        try:
+            while True:
+                batch_sent, batch_failed = self.send_batch(options["batch_size"])
+                sent += batch_sent
+                failed += batch_failed
+                if batch_sent + batch_failed:
+                    continue
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        finally:
+            self.connection.close()
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} email(s), {failed} failed."))
+
+    def get_retry_delay(self, attempts):
+        delay = settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+        return datetime.timedelta(seconds=min(delay, settings.OUTBOX_MAX_RETRY_DELAY))
+
+    @transaction.atomic
+    def send_batch(self, batch_size):
+        """
+        Locks and sends up to batch_size due emails. Returns (sent, failed).
+
+        The connection stays open between batches; messages are handed to it
+        one at a time so a failure is recorded on its own email.
+        """
+        now = timezone.now()
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if not emails:
+            return 0, 0
+
+        errors = {}
+        try:
+            self.connection.open()
+        except Exception as e:
+            errors = {email.id: f"Cannot connect to the mail server: {e}" for email in emails}
+        else:
+            for email in emails:
+                try:
+                    self.connection.send_messages([email.to_message(self.connection)])
+                except Exception as e:
+                    errors[email.id] = str(e)
+            if errors:
+                # Start over with a fresh connection after a failure
+                self.connection.close()
+
+        for email in emails:
+            email.attempts += 1
+            email.updated_at = now
+            if email.id in errors:
+                email.last_error = errors[email.id]
+                self.stderr.write(f"Email {email.id}: {email.last_error}")
+                if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    email.status = "failed"
+                else:
+                    email.next_attempt_at = now + self.get_retry_delay(email.attempts)
+            else:
+                email.status = "sent"
+                email.sent_at = now
+        OutboxEmail.objects.bulk_update(
+            emails,
+            ["attempts", "updated_at", "last_error", "status", "next_attempt_at", "sent_at"],
+        )
+        return len(emails) - len(errors), len(errors)
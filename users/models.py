@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
+from django.core.mail import EmailMessage
 from django.db import models
+from django.utils import timezone
 from base.models import BaseModel
 
 
@@ -55,4 +57,67 @@ class CustomUser(AbstractBaseUser, BaseModel):
         """If the user is an admin, they are considered 'staff'."""
         return self.is_admin
 
-   
\ No newline at end of file
+   
+
+
+class OutboxEmail(BaseModel):
+    """
+    An email waiting to be sent by the send_outbox_emails command, so requests
+    never talk to the mail server. Queue it in the transaction that creates
+    the data it refers to.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    content_subtype = models.CharField(max_length=20, default="plain")  # "html" for HTML bodies
+    from_email = models.CharField(max_length=255, blank=True)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default="pending")
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Email {self.id} - {self.subject} - {self.status}"
+
+    class Meta:
+        verbose_name = "Outbox email"
+        verbose_name_plural = "Outbox emails"
+        indexes = [
+            # The worker scans pending emails by due time
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status="pending"),
+                name="outbox_pending_idx",
+            ),
+        ]
+
+    @classmethod
+    def enqueue(cls, message):
+        """
+        Queues an EmailMessage (attachments and headers are not kept).
+        """
+        return cls.objects.create(
+            subject=message.subject,
+            body=message.body,
+            content_subtype=message.content_subtype,
+            from_email=message.from_email or "",
+            to=list(message.to),
+        )
+
+    def to_message(self, connection=None):
+        message = EmailMessage(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email or None,
+            to=self.to,
+            connection=connection,
+        )
+        message.content_subtype = self.content_subtype
+        return message
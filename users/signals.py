@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from base.authentication import invalidate_cached_user
+from .models import CustomUser
+from .utils import mirror_revocation
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """
+    Drops the copies CachedJWTAuthentication serves once the change commits,
+    so profile updates, deactivation and password changes apply to the
+    next requests.
+    """
+    transaction.on_commit(lambda: invalidate_cached_user(instance.id))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def mirror_blacklisted_token(sender, instance, created, **kwargs):
+    """
+    Mirrors a revocation into token_cache once it commits, whatever wrote it:
+    logout, RefreshToken.blacklist() or the admin.
+    """
+    if created:
+        token = instance.token
+        transaction.on_commit(lambda: mirror_revocation(token.jti, token.expires_at.timestamp()))
@@ -1,3 +1,391 @@
-from django.test import TestCase
+import datetime
+import io
+import time
+import unittest
+import uuid
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.core.cache import caches
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django_redis.cache import RedisCache
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from base.authentication import _local_users, get_auth_user_key, get_auth_version
+from base.testing import APITestCase, create_user
+from .models import CustomUser, OutboxEmail
+from .utils import (
+    RevocableRefreshToken,
+    VerificationTokenStore,
+    generate_token_for_user,
+    get_revoked_key,
+    is_jti_revoked,
+)
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+class ProfileConditionalGetTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.other = create_user("other@example.com")
+        self.admin = create_user("admin@example.com", is_admin=True)
+
+    def get(self, user, url, etag=None):
+        self.client.force_authenticate(user)
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get(url, headers=headers)
+
+    def test_unchanged_profile_is_not_modified(self):
+        etag = self.get(self.user, "/users/profile/")["ETag"]
+        self.assertEqual(self.get(self.user, "/users/profile/", etag).status_code, 304)
+
+    def test_non_owners_get_forbidden_not_a_validator(self):
+        url = f"/users/profile/{self.user.id}/"
+        # "*" matches any current representation
+        response = self.get(self.other, url, "*")
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(response.has_header("ETag"))
+        self.assertFalse(response.has_header("Last-Modified"))
+
+    def test_admin_validator_follows_the_profile(self):
+        url = f"/users/profile/{self.user.id}/"
+        etag = self.get(self.admin, url)["ETag"]
+        self.assertEqual(self.get(self.admin, url, etag).status_code, 304)
+        self.user.first_name = "Renamed"
+        self.user.save()
+        self.assertEqual(self.get(self.admin, url, etag).status_code, 200)
+
+
+    def test_password_change_changes_the_validators(self):
+        response = self.get(self.user, "/users/profile/")
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+        # Last-Modified has a one second resolution
+        later = timezone.now() + datetime.timedelta(seconds=1)
+        with mock.patch("django.utils.timezone.now", return_value=later):
+            response = self.client.post(
+                "/users/change-password/",
+                {
+                    "old_password": "Passw0rd!",
+                    "new_password": "N3wPassw0rd!",
+                    "confirm_password": "N3wPassw0rd!",
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.user.refresh_from_db()
+        response = self.get(self.user, "/users/profile/", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["Last-Modified"], last_modified)
+
+class OutboxTests(APITestCase):
+    def signup(self, email="new@example.com"):
+        data = {
+            "email": email,
+            "username": email.split("@")[0],
+            "password": "Passw0rd!",
+            "first_name": "New",
+            "last_name": "User",
+        }
+        response = self.client.post("/users/signup/", data, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def send(self):
+        call_command("send_outbox_emails", stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_signup_queues_the_verification_email(self):
+        self.signup()
+        self.assertEqual(mail.outbox, [])
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.to, email.status), (["new@example.com"], "pending"))
+
+        self.send()
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual((message.to, message.content_subtype), (["new@example.com"], "html"))
+        token = VerificationTokenStore().get_token(CustomUser.objects.get(email="new@example.com").id)
+        self.assertIn(f"/users/verify-email/{token}/", message.body)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("sent", 1))
+
+        # Sent emails are not sent again
+        self.send()
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=3, OUTBOX_RETRY_DELAY=60, OUTBOX_MAX_RETRY_DELAY=90)
+    def test_failed_emails_back_off_then_fail(self):
+        self.signup()
+        email = OutboxEmail.objects.get()
+        delays = []
+        with mock.patch.object(EmailBackend, "send_messages", side_effect=OSError("refused")):
+            for attempt in range(1, 4):
+                self.send()
+                self.send()  # Not due again until the delay has passed
+                email.refresh_from_db()
+                self.assertEqual((email.attempts, email.last_error), (attempt, "refused"))
+                if email.status == "pending":
+                    delays.append((email.next_attempt_at - email.updated_at).total_seconds())
+                    OutboxEmail.objects.filter(id=email.id).update(next_attempt_at=timezone.now())
+        self.assertEqual(delays, [60, 90])
+        self.assertEqual((email.status, email.attempts), ("failed", 3))
+        self.send()
+        self.assertEqual(mail.outbox, [])
+
+    def test_one_failure_does_not_fail_the_batch(self):
+        self.signup("first@example.com")
+        self.signup("second@example.com")
+        send_messages = EmailBackend.send_messages
+
+        def fail_first(backend, messages):
+            if messages[0].to == ["first@example.com"]:
+                raise OSError("mailbox unavailable")
+            return send_messages(backend, messages)
+
+        with mock.patch.object(EmailBackend, "send_messages", fail_first):
+            self.send()
+        self.assertEqual([message.to for message in mail.outbox], [["second@example.com"]])
+        self.assertEqual(
+            dict(OutboxEmail.objects.values_list("to__0", "status")),
+            {"first@example.com": "pending", "second@example.com": "sent"},
+        )
+
+
+class VerificationTokenStoreTests(APITestCase):
+    """
+    Runs on the plain cache calls (locmem), the Redis subclass below covers
+    the WATCH/MULTI transactions.
+    """
+
+    def get_cache(self):
+        return caches["token_cache"]
+
+    def setUp(self):
+        super().setUp()
+        self.store = VerificationTokenStore(self.get_cache())
+
+    def test_tokens_map_both_ways(self):
+        token = self.store.issue("42", timeout=60)
+        self.assertEqual(self.store.get_user_id(token), "42")
+        self.assertEqual(self.store.get_token("42"), token)
+        self.assertIsNone(self.store.get_user_id("unknown"))
+
+    def test_reissue_replaces_the_previous_token(self):
+        first = self.store.issue("42", timeout=60)
+        second = self.store.issue("42", timeout=60)
+        self.assertIsNone(self.store.get_user_id(first))
+        self.assertEqual(self.store.get_user_id(second), "42")
+        self.assertEqual(self.store.get_token("42"), second)
+
+    def test_invalidate_keeps_a_newer_token(self):
+        first = self.store.issue("42", timeout=60)
+        self.store.invalidate(first)
+        self.assertIsNone(self.store.get_token("42"))
+
+        second = self.store.issue("42", timeout=60)
+        # A stale token (e.g. an old email link) must not drop the new mapping
+        self.store.invalidate(first)
+        self.assertEqual(self.store.get_token("42"), second)
+        self.store.invalidate(second)
+        self.assertIsNone(self.store.get_user_id(second))
+        self.assertIsNone(self.store.get_token("42"))
+
+    def test_verify_email_uses_the_token_once(self):
+        user = create_user(is_verified=False)
+        token = generate_token_for_user(user)
+        self.assertEqual(self.client.get(f"/users/verify-email/{token}/").status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.is_verified)
+        self.assertEqual(self.client.get(f"/users/verify-email/{token}/").status_code, 400)
+
+
+@unittest.skipIf(fakeredis is None, "Needs the fakeredis package")
+class RedisVerificationTokenStoreTests(VerificationTokenStoreTests):
+    def get_cache(self):
+        cache = RedisCache(
+            "redis://localhost:6379/0",
+            {
+                "KEY_PREFIX": f"tests-{uuid.uuid4().hex}",
+                "OPTIONS": {
+                    "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                    "CONNECTION_POOL_KWARGS": {"connection_class": fakeredis.FakeConnection},
+                },
+            },
+        )
+        self.addCleanup(cache.delete_pattern, "*")
+        return cache
+
+    def test_keys_expire(self):
+        token = self.store.issue("42", timeout=60)
+        for key in (self.store.token_key(token), self.store.user_key("42")):
+            self.assertTrue(0 < self.store.redis.ttl(key) <= 60)
+
+
+class CachedAuthenticationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def get_user_queries(self, url="/users/profile/"):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        table = CustomUser._meta.db_table
+        return [query["sql"] for query in queries if table in query["sql"]]
+
+    def test_user_is_loaded_once(self):
+        self.assertEqual(len(self.get_user_queries()), 1)
+        self.assertEqual(self.get_user_queries(), [])
+        self.assertEqual(self.get_user_queries("/transactions/async/"), [])
+
+        # Another process starts from the shared cache
+        _local_users.clear()
+        self.assertEqual(self.get_user_queries(), [])
+
+    def test_saving_the_user_applies_at_once(self):
+        self.get_user_queries()
+        self.user.first_name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.client.get("/users/profile/").data["first_name"], "Renamed")
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.client.get("/users/profile/").status_code, 401)
+
+    def test_changes_bypassing_save_apply_within_the_cache_timeout(self):
+        self.get_user_queries()
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get("/users/profile/").status_code, 200)
+
+        later = time.time() + settings.AUTH_USER_CACHE_TIMEOUT
+        with mock.patch("time.time", return_value=later):
+            self.assertEqual(self.client.get("/users/profile/").status_code, 401)
+
+    def test_password_hash_is_not_cached(self):
+        self.get_user_queries()
+        user_id = str(self.user.id)
+        values, _ = caches["default"].get(get_auth_user_key(user_id, get_auth_version(user_id)))
+        self.assertNotIn("password", values)
+        self.assertNotIn("password_digest", values)
+        self.assertNotIn("password", _local_users[user_id][1])
+
+    def test_revoke_token_check_uses_the_cached_digest(self):
+        with mock.patch.object(api_settings, "CHECK_REVOKE_TOKEN", True):
+            token = RefreshToken.for_user(self.user).access_token
+            self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+            self.get_user_queries()
+            self.assertEqual(self.get_user_queries(), [])
+
+            self.user.set_password("N3wPassw0rd!")
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.save()
+            self.assertEqual(self.client.get("/users/profile/").status_code, 401)
+
+    def test_updates_do_not_save_the_cached_copy(self):
+        self.get_user_queries()
+        # Changed without bumping the auth version, the cached copy is stale
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False, last_name="Newer")
+
+        response = self.client.patch("/users/profile/", {"first_name": "Renamed"}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.user.refresh_from_db()
+        self.assertEqual(
+            (self.user.first_name, self.user.last_name, self.user.is_active),
+            ("Renamed", "Newer", False),
+        )
+
+
+class TokenRevocationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+
+    def refresh(self, token):
+        return self.client.post("/users/token/refresh/", {"refresh_token": str(token)}, format="json")
+
+    def test_logout_revokes_the_refresh_token(self):
+        response = self.client.post(
+            "/users/login/", {"email": self.user.email, "password": "Passw0rd!"}, format="json"
+        )
+        token = response.data["refresh_token"]
+        self.assertEqual(self.refresh(token).status_code, 200)
+
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/users/logout/", {"refresh_token": token}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(None)
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+        jti = RefreshToken(token, verify=False)["jti"]
+        self.assertIsNotNone(caches["token_cache"].get(get_revoked_key(jti)))
+
+    def test_checks_use_the_database_until_synced(self):
+        revoked = RevocableRefreshToken.for_user(self.user)
+        live = RevocableRefreshToken.for_user(self.user)
+        # Blacklisted without mirroring, like tokens revoked before the store existed
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=revoked["jti"]))
+
+        with self.assertNumQueries(1):
+            self.assertTrue(is_jti_revoked(revoked["jti"]))
+
+        call_command("purge_tokens", stdout=io.StringIO())
+        with self.assertNumQueries(0):
+            self.assertTrue(is_jti_revoked(revoked["jti"]))
+            self.assertFalse(is_jti_revoked(live["jti"]))
+        self.assertEqual(self.refresh(revoked).status_code, 401)
+        self.assertEqual(self.refresh(live).status_code, 200)
+
+    def test_blacklist_writes_outside_the_token_class_are_mirrored(self):
+        call_command("purge_tokens", stdout=io.StringIO())
+        plain = RefreshToken.for_user(self.user)
+        admin = RefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            plain.blacklist()
+            # Like a row added in the admin
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=admin["jti"]))
+
+        with self.assertNumQueries(0):
+            self.assertTrue(is_jti_revoked(plain["jti"]))
+            self.assertTrue(is_jti_revoked(admin["jti"]))
+        self.assertEqual(self.refresh(plain).status_code, 401)
+        self.assertEqual(self.refresh(admin).status_code, 401)
+
+    def test_purge_deletes_expired_tokens(self):
+        now = timezone.now()
+        expired = [
+            OutstandingToken.objects.create(
+                user=self.user,
+                jti=uuid.uuid4().hex,
+                token="expired",
+                created_at=now - datetime.timedelta(days=2),
+                expires_at=now - datetime.timedelta(days=1),
+            )
+            for _ in range(3)
+        ]
+        BlacklistedToken.objects.create(token=expired[0])
+        live = RevocableRefreshToken.for_user(self.user)
+        live.blacklist()
+
+        output = io.StringIO()
+        call_command("purge_tokens", "--batch-size", "2", stdout=output)
+        self.assertIn("Purged 3 expired token(s).", output.getvalue())
+        self.assertEqual(
+            list(OutstandingToken.objects.values_list("jti", flat=True)), [live["jti"]]
+        )
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+        self.assertTrue(is_jti_revoked(live["jti"]))
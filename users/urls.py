@@ -6,6 +6,7 @@ urlpatterns = [
     path('verify-email/<str:token>/', VerifyEmailView.as_view(), name='verify-email'),
     path("login/", UserLoginView.as_view(), name="login"),
     path("logout/", UserLogoutView.as_view(), name="logout"),
+    path("token/refresh/", TokenRefreshView.as_view(), name="token-refresh"),
     path("profile/<uuid:pk>/", UserDetailView.as_view(), name="user-manage"),
     path("profile/", UserDetailView.as_view(), name="user-manage"),
     path("change-password/", ChangePasswordView.as_view(), name="change-password"),
@@ -4,74 +4,214 @@ from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
 import secrets
 from django.core.cache import caches
-from datetime import timedelta
 from django.template.loader import render_to_string
 from django.core.mail import EmailMessage
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from .models import OutboxEmail
+import math
+import time
 
-def send_verification_email(user, token, request):
-    """
-    Helper function to send verification email.
-    """
-    try:
-        # Get the current site and construct the verification URL
-        current_site = get_current_site(request)
-        verification_url = reverse("verify-email", kwargs={"token": token})
-        full_verification_url = f"http://{current_site.domain}{verification_url}"
-
-        # Prepare email content
-        email_subject = "Verify your email address"
-        email_body = render_to_string(
-            "email/verify_email.html",
-            {
-                "user": user,
-                "verification_url": full_verification_url,
-                "domain": current_site.domain,
-            },
-        )
-
-        # Create and send email
-        email = EmailMessage(
-            subject=email_subject,
-            body=email_body,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[user.email],
-        )
-        email.content_subtype = "html"
-        email.send(fail_silently=False)
-
-    except Exception as e:
-        print(f"Email sending failed: {str(e)}")
-        # Optionally, handle the exception or raise it for further handling
-        raise e
+def queue_verification_email(user, token, request):
+    """
+    Helper function to queue the verification email for the outbox worker.
+    """
+    # Get the current site and construct the verification URL
+    current_site = get_current_site(request)
+    verification_url = reverse("verify-email", kwargs={"token": token})
+    full_verification_url = f"http://{current_site.domain}{verification_url}"
+
+    # Prepare email content
+    email_subject = "Verify your email address"
+    email_body = render_to_string(
+        "email/verify_email.html",
+        {
+            "user": user,
+            "verification_url": full_verification_url,
+            "domain": current_site.domain,
+        },
+    )
+
+    email = EmailMessage(
+        subject=email_subject,
+        body=email_body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+    )
+    email.content_subtype = "html"
+    return OutboxEmail.enqueue(email)
+
+
+class VerificationTokenStore:
+    """
+    Email verification tokens kept both ways in a cache, token -> user id and
+    user id -> token, with the same timeout. Lookups, reissues and
+    invalidation read one key each instead of scanning the whole cache.
+
+    On django-redis both mappings change in one WATCH/MULTI transaction; other
+    backends (e.g. locmem in development) use plain cache calls.
+    """
+
+    TOKEN_KEY = "verify-token:{}"
+    USER_KEY = "verify-user:{}"
+
+    def __init__(self, cache=None):
+        self.cache = caches["token_cache"] if cache is None else cache
+        client = getattr(self.cache, "client", None)
+        self.redis = client.get_client(write=True) if hasattr(client, "get_client") else None
+
+    def token_key(self, token):
+        key = self.TOKEN_KEY.format(token)
+        return self.cache.make_key(key) if self.redis else key
+
+    def user_key(self, user_id):
+        key = self.USER_KEY.format(user_id)
+        return self.cache.make_key(key) if self.redis else key
+
+    @staticmethod
+    def decode(value):
+        return value.decode() if isinstance(value, bytes) else value
+
+    def issue(self, user_id, timeout):
+        """
+        Stores a new token for the user, replacing the previous one.
+        """
+        token = secrets.token_urlsafe(32)
+        user_id = str(user_id)
+        token_key, user_key = self.token_key(token), self.user_key(user_id)
+
+        if self.redis is None:
+            previous = self.cache.get(user_key)
+            if previous:
+                self.cache.delete(self.token_key(previous))
+            self.cache.set_many({token_key: user_id, user_key: token}, timeout=timeout)
+            return token
+
+        def reissue(pipe):
+            previous = self.decode(pipe.get(user_key))
+            pipe.multi()
+            if previous:
+                pipe.delete(self.token_key(previous))
+            pipe.set(token_key, user_id, ex=timeout)
+            pipe.set(user_key, token, ex=timeout)
+
+        self.redis.transaction(reissue, user_key)
+        return token
+
+    def get_user_id(self, token):
+        if self.redis is None:
+            return self.cache.get(self.token_key(token))
+        return self.decode(self.redis.get(self.token_key(token)))
+
+    def get_token(self, user_id):
+        if self.redis is None:
+            return self.cache.get(self.user_key(user_id))
+        return self.decode(self.redis.get(self.user_key(user_id)))
+
+    def invalidate(self, token):
+        """
+        Deletes a token, and its user's mapping unless a newer token replaced it.
+        """
+        token_key = self.token_key(token)
+
+        if self.redis is None:
+            user_id = self.cache.get(token_key)
+            keys = [token_key]
+            if user_id is not None and self.cache.get(self.user_key(user_id)) == token:
+                keys.append(self.user_key(user_id))
+            self.cache.delete_many(keys)
+            return
+
+        def invalidate(pipe):
+            user_id = self.decode(pipe.get(token_key))
+            current = None
+            if user_id is not None:
+                pipe.watch(self.user_key(user_id))
+                current = self.decode(pipe.get(self.user_key(user_id)))
+            pipe.multi()
+            pipe.delete(token_key)
+            if current == token:
+                pipe.delete(self.user_key(user_id))
+
+        self.redis.transaction(invalidate, token_key)
 
 
 def generate_token_for_user(user):
     """
-    Generate a secure token for user and store it in the cache.
+    Generate a secure token for user and store it in the cache, invalidating
+    the user's previous token.
     """
-    token = secrets.token_urlsafe(32)
-    token_cache = caches["token_cache"]
-    token_cache.set(
-        token, str(user.id), timeout=int(timedelta(minutes=1).total_seconds())
-    )
-    return token
+    return VerificationTokenStore().issue(user.id, settings.EMAIL_VERIFICATION_TOKEN_TIMEOUT)
 
 
 def get_user_from_token(token):
     """
     Retrieve user ID from cache using token. Returns None if invalid.
     """
-    token_cache = caches["token_cache"]
-    user_id = token_cache.get(token)
-    return user_id
+    return VerificationTokenStore().get_user_id(token)
 
 
 def get_existing_token(user):
     """
     Helper method to check if an existing token is still valid for the given user.
     """
-    token_cache = caches["token_cache"]
-    for token in token_cache.keys():
-        if token_cache.get(token) == str(user.id):
-            return token
-    return None
\ No newline at end of file
+    return VerificationTokenStore().get_token(user.id)
+
+
+def invalidate_token(token):
+    """
+    Remove a used token from the cache.
+    """
+    VerificationTokenStore().invalidate(token)
+
+
+REVOCATIONS_SYNCED_KEY = "revoked-jti:synced"
+
+
+def get_revoked_key(jti):
+    """
+    Returns the token_cache key marking a refresh token's JTI as revoked.
+    """
+    return f"revoked-jti:{jti}"
+
+
+def mirror_revocation(jti, exp):
+    """
+    Marks a JTI revoked in token_cache until its token expires at the epoch
+    timestamp exp, after which the token is rejected anyway.
+    """
+    timeout = math.ceil(exp - time.time())
+    if timeout > 0:
+        caches["token_cache"].set(get_revoked_key(jti), 1, timeout=timeout)
+
+
+def is_jti_revoked(jti):
+    """
+    Checks a JTI against the revocation store with a single cache read.
+
+    The token_blacklist tables stay the source of truth: until the
+    purge_tokens command has synced the store, or when Redis lost it, the
+    sync marker is missing and the database is queried instead. token_cache
+    must not evict keys (e.g. maxmemory-policy noeviction), or a revoked JTI
+    could disappear while the marker stays.
+    """
+    key = get_revoked_key(jti)
+    found = caches["token_cache"].get_many([key, REVOCATIONS_SYNCED_KEY])
+    if REVOCATIONS_SYNCED_KEY not in found:
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+    return key in found
+
+
+class RevocableRefreshToken(RefreshToken):
+    """
+    RefreshToken checked against the revocation store, so verifying it does
+    not query the token_blacklist tables. Blacklisting is mirrored into the
+    store by users.signals.
+    """
+
+    def check_blacklist(self):
+        if is_jti_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
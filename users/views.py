@@ -10,16 +10,19 @@ from rest_framework.permissions import IsAuthenticated
 # from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.exceptions import ValidationError
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth.hashers import make_password
 from django.db import transaction
 from base.permissions import IsAdminOrUserOwner
 from django.shortcuts import get_object_or_404
-from django.core.cache import caches
 
 from django.conf import settings
 
 # from django.utils.crypto import get_random_string
 from base.pagination import CustomPagination
+from base.cache import make_etag
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from .utils import *
 
 
@@ -37,9 +40,11 @@ class UserSignupView(APIView):
         data = request.data
         serializer = UserSerializer(data=data)
         if serializer.is_valid():
-            user = serializer.save()
-            token = generate_token_for_user(user)
-            send_verification_email(user, token, request)
+            with transaction.atomic():
+                user = serializer.save()
+                token = generate_token_for_user(user)
+                # Sent by the send_outbox_emails worker, not in the request
+                queue_verification_email(user, token, request)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -99,7 +104,7 @@ class UserLogoutView(APIView):
 
             # print(refresh_token)
             if refresh_token:
-                refresh = RefreshToken(refresh_token)
+                refresh = RevocableRefreshToken(refresh_token)
 
                 refresh.blacklist()  # Blacklist the token
                 return Response(
@@ -118,6 +123,65 @@ class UserLogoutView(APIView):
             )
 
 
+class TokenRefreshView(APIView):
+    """
+    Issues a new access token for a refresh token that has not been revoked.
+    """
+
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        refresh_token = request.data.get("refresh_token")
+        if not refresh_token:
+            return Response(
+                {"message": "Refresh token is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            refresh = RevocableRefreshToken(refresh_token)
+        except TokenError:
+            return Response(
+                {"message": "Invalid refresh token."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        data = {"access_token": str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh_token"] = str(refresh)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+def get_user_last_modified(request, pk=None):
+    if pk is None or pk == request.user.pk:
+        return request.user.updated_at
+    # Only admins may read other profiles (IsAdminOrUserOwner), everyone else
+    # gets no validator so the view answers 403 rather than 304
+    if not request.user.is_admin:
+        return None
+    # Looked up once for both the ETag and Last-Modified validators
+    if not hasattr(request, "_profile_updated_at"):
+        request._profile_updated_at = (
+            CustomUser.objects.filter(pk=pk).values_list("updated_at", flat=True).first()
+        )
+    return request._profile_updated_at
+
+
+def get_user_etag(request, pk=None):
+    """
+    Admins get a fuller representation, so the validator includes the role.
+    """
+    updated_at = get_user_last_modified(request, pk)
+    if updated_at is None:
+        return None
+    return make_etag(request, pk or request.user.pk, updated_at, request.user.is_admin)
+
+
 class UserDetailView(APIView):
     """
     API endpoint for retrieving, updating, and deleting user details.
@@ -125,6 +189,14 @@ class UserDetailView(APIView):
 
     permission_classes = [IsAdminOrUserOwner]
 
+    def get_user(self, request, pk=None):
+        """
+        Loads the profile to change from the database. request.user may be a
+        cached copy, saving it could overwrite newer values.
+        """
+        return get_object_or_404(CustomUser, pk=pk or request.user.pk)
+
+    @method_decorator(condition(etag_func=get_user_etag, last_modified_func=get_user_last_modified))
     def get(self, request, pk=None):
         paginator = CustomPagination(page_size=5)
         """
@@ -156,10 +228,7 @@ class UserDetailView(APIView):
         Update user details.
         """
 
-        if pk:
-            user = get_object_or_404(CustomUser, pk=pk)
-        else:
-            user = request.user
+        user = self.get_user(request, pk)
 
         self.check_object_permissions(request, user)
         if request.data.get("password"):
@@ -172,7 +241,7 @@ class UserDetailView(APIView):
                 {"message": "Email cannot be updated using this endpoint"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        serializer = UserSerializer(request.user, data=request.data)
+        serializer = UserSerializer(user, data=request.data)
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data)
@@ -192,14 +261,11 @@ class UserDetailView(APIView):
                 {"message": "Email cannot be updated using this endpoint"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        if pk:
-            user = get_object_or_404(CustomUser, pk=pk)
-        else:
-            user = request.user
+        user = self.get_user(request, pk)
 
         self.check_object_permissions(request, user)
 
-        serializer = UserSerializer(request.user, data=request.data, partial=True)
+        serializer = UserSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data)
@@ -210,10 +276,7 @@ class UserDetailView(APIView):
         Delete user account. #soft delete
         """
 
-        if pk:
-            user = get_object_or_404(CustomUser, pk=pk)
-        else:
-            user = request.user
+        user = self.get_user(request, pk)
 
         self.check_object_permissions(request, user)
 
@@ -270,7 +333,8 @@ class ChangePasswordView(APIView):
 
                     # Set new password
                     user.set_password(serializer.validated_data["new_password"])
-                    user.save(update_fields=["password"])
+                    # updated_at moves the profile validators and Last-Modified
+                    user.save(update_fields=["password", "updated_at"])
 
                     # Generate new tokens
                     refresh = RefreshToken.for_user(user)
@@ -326,7 +390,6 @@ class VerifyEmailView(APIView):
         user.is_verified = True
         user.save()
 
-        token_cache = caches["token_cache"]
-        token_cache.delete(token)
+        invalidate_token(token)
 
         return Response("Email verified successfully", status=status.HTTP_200_OK)